@@ -1,31 +1,44 @@
+import json
 import jsonschema
 import requests
 import logging
+import os
+import threading
+from collections import OrderedDict
 
 from UPISAS.exceptions import ServerNotReachable, IncompleteJSONSchema
 
 pull_image_tasks = {}
 
 
-def show_progress(line, progress):
-    """ Show task progress (red for download, green for extract). Used when pulling images."""
-    if line['status'] == 'Downloading':
-        id = f'[red][Download {line["id"]}]'
-    elif line['status'] == 'Extracting':
-        id = f'[green][Extract  {line["id"]}]'
+def show_progress(line, progress, tasks=None, image_name=""):
+    """ Show task progress (red for download, green for extract). Used when pulling images.
+    Each pull can keep its own tasks dict, the global pull_image_tasks is used otherwise."""
+    tasks = pull_image_tasks if tasks is None else tasks
+    prefix = f"{image_name} " if image_name else ""
+    if line.get('status') == 'Downloading':
+        id = f'[red][{prefix}Download {line["id"]}]'
+    elif line.get('status') == 'Extracting':
+        id = f'[green][{prefix}Extract  {line["id"]}]'
     else:
         # skip other statuses
         return
-    if id not in pull_image_tasks.keys():
-        pull_image_tasks[id] = progress.add_task(f"{id}", total=line['progressDetail']['total'])
+    if id not in tasks.keys():
+        tasks[id] = progress.add_task(f"{id}", total=line['progressDetail'].get('total'))
     else:
-        progress.update(pull_image_tasks[id], completed=line['progressDetail']['current'])
+        progress.update(tasks[id], completed=line['progressDetail'].get('current'))
 
 
-def get_response_for_get_request(url):
+def get_cache_dir():
+    """ Where UPISAS keeps what it caches across runs: $UPISAS_CACHE_DIR, or ~/.cache/upisas."""
+    return os.environ.get("UPISAS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "upisas"))
+
+
+def get_response_for_get_request(url, session=None, timeout=None, headers=None):
+    """ Perform a GET request, through the given requests.Session if any (keeps the connection alive)."""
     try:
         logging.info("GET request to " + str(url))
-        response = requests.get(url)
+        response = (session or requests).get(url, timeout=timeout, headers=headers)
         return response
     except requests.exceptions.ConnectionError as e:
         logging.error(e)
@@ -33,14 +46,70 @@ def get_response_for_get_request(url):
         raise ServerNotReachable
 
 
+class _CompiledSchema:
+    """ What validate_schema needs from a JSON Schema, computed once per schema content."""
+    __slots__ = ("content", "keys", "validator")
+
+    def __init__(self, json_schema, content):
+        self.content = content
+        self.keys = frozenset(json_schema["properties"].keys())
+        self.validator = None
+
+
+# least recently used first, by content so that the equal schemas fetched by many strategies are compiled once
+_compiled_schemas = OrderedDict()
+# (schema, its compiled form) by identity, so that a schema already seen is not serialized again; the schema is
+# kept referenced so its id cannot be reused
+_compiled_schemas_by_id = OrderedDict()
+_COMPILED_SCHEMAS_MAX_SIZE = 128
+# validate_schema is called from the threads of parallel runs, bootstraps and shadow strategies
+_compiled_schemas_lock = threading.Lock()
+
+
+def _get_compiled_schema(json_schema):
+    with _compiled_schemas_lock:
+        known = _compiled_schemas_by_id.get(id(json_schema))
+        if known is not None and known[0] is json_schema:
+            compiled = known[1]
+            _compiled_schemas_by_id.move_to_end(id(json_schema))
+            if compiled.content in _compiled_schemas:
+                _compiled_schemas.move_to_end(compiled.content)
+            return compiled
+        if not (json_schema and "type" in json_schema and "properties" in json_schema):
+            return None
+        content = json.dumps(json_schema, sort_keys=True, default=str)
+        compiled = _compiled_schemas.get(content)
+        if compiled is None:
+            compiled = _compiled_schemas[content] = _CompiledSchema(json_schema, content)
+        else:
+            _compiled_schemas.move_to_end(content)
+        _compiled_schemas_by_id[id(json_schema)] = (json_schema, compiled)
+        for cache in (_compiled_schemas, _compiled_schemas_by_id):
+            if len(cache) > _COMPILED_SCHEMAS_MAX_SIZE:
+                cache.popitem(last=False)
+        return compiled
+
+
+def clear_validator_cache():
+    """ Forget the compiled validators, e.g. after modifying a JSON Schema in place."""
+    with _compiled_schemas_lock:
+        _compiled_schemas.clear()
+        _compiled_schemas_by_id.clear()
+
+
 def validate_schema(json_instance, json_schema):
     try:
         incomplete_warning_message = "No complete JSON Schema provided for validation"
-        if json_schema and "type" in json_schema and "properties" in json_schema:
-            json_instance_keys = sorted(json_instance.keys())
-            json_schema_keys = sorted(json_schema["properties"].keys())
-            if json_instance_keys == json_schema_keys:
-                jsonschema.validate(json_instance, json_schema)
+        compiled = _get_compiled_schema(json_schema)
+        if compiled:
+            if json_instance.keys() == compiled.keys:
+                if compiled.validator is None:
+                    validator_class = jsonschema.validators.validator_for(json_schema)
+                    validator_class.check_schema(json_schema)
+                    compiled.validator = validator_class(json_schema)
+                error = jsonschema.exceptions.best_match(compiled.validator.iter_errors(json_instance))
+                if error is not None:
+                    raise error
                 logging.info("JSON object validated by JSON Schema")
             else:
                 logging.error(incomplete_warning_message + " Keys misaligned")
@@ -54,4 +123,3 @@ def validate_schema(json_instance, json_schema):
     except jsonschema.exceptions.SchemaError as error:
         logging.error(f"SchemaError in validating JSON object with JSON Schema: {error}")
         raise
-
@@ -0,0 +1,199 @@
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+
+class Aggregator(ABC):
+    """
+    A statistic of the values of one monitored key, updated with each new value in O(1) (amortized) instead of
+    being recomputed over the whole history. Bound to a key with Knowledge.bind, which feeds it as samples are
+    monitored.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.count = 0
+
+    @abstractmethod
+    def update(self, value):
+        """ Takes a new value into account. """
+        pass
+
+    def extend(self, values):
+        '''Takes several values into account, oldest first'''
+        for value in values:
+            self.update(value)
+
+    @property
+    @abstractmethod
+    def value(self):
+        """ The current value of the statistic, None before the first value. """
+        pass
+
+
+class RunningMean(Aggregator):
+    """ Mean and variance of all the values so far (Welford's algorithm, merged per batch with Chan's formula). """
+
+    def __init__(self):
+        super().__init__()
+        self.mean = None
+        self._m2 = 0.0
+
+    def update(self, value):
+        self.count += 1
+        if self.mean is None:
+            self.mean = float(value)
+            return
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        count, mean = len(values), float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        if self.mean is None:
+            self.count, self.mean, self._m2 = count, mean, m2
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def value(self):
+        return self.mean
+
+    @property
+    def variance(self):
+        '''Population variance, None before the first value'''
+        return self._m2 / self.count if self.count else None
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count else None
+
+
+class EWMA(Aggregator):
+    """ Exponentially weighted moving average, starting from the first value. """
+
+    def __init__(self, alpha: "Weight of each new value, between 0 and 1" = None,
+                 half_life: "Number of samples after which the weight of a value is halved, instead of alpha" = None):
+        super().__init__()
+        if (alpha is None) == (half_life is None):
+            raise ValueError("EWMA needs either alpha or half_life")
+        self.alpha = alpha if alpha is not None else 1 - 0.5 ** (1 / half_life)
+        if not 0 < self.alpha <= 1:
+            raise ValueError("EWMA needs an alpha between 0 and 1")
+        self.average = None
+
+    def update(self, value):
+        self.count += 1
+        self.average = float(value) if self.average is None else self.average + self.alpha * (value - self.average)
+
+    @property
+    def value(self):
+        return self.average
+
+
+class SlidingMinMax(Aggregator):
+    """ Minimum and maximum of the last `window` values, with monotonic queues (amortized O(1) per value). """
+
+    def __init__(self, window):
+        super().__init__()
+        if window < 1:
+            raise ValueError("SlidingMinMax needs a window of at least one value")
+        self.window = window
+        # (index, value) pairs, increasing values in _minima and decreasing ones in _maxima
+        self._minima = deque()
+        self._maxima = deque()
+
+    def update(self, value):
+        index = self.count
+        self.count += 1
+        while self._minima and self._minima[-1][1] >= value:
+            self._minima.pop()
+        self._minima.append((index, value))
+        while self._maxima and self._maxima[-1][1] <= value:
+            self._maxima.pop()
+        self._maxima.append((index, value))
+        for queue in (self._minima, self._maxima):
+            if queue[0][0] <= index - self.window:
+                queue.popleft()
+
+    @property
+    def min(self):
+        return self._minima[0][1] if self._minima else None
+
+    @property
+    def max(self):
+        return self._maxima[0][1] if self._maxima else None
+
+    @property
+    def value(self):
+        return (self.min, self.max) if self.count else None
+
+
+class StreamingQuantile(Aggregator):
+    """
+    Estimate of a quantile of all the values so far in constant memory, with the P² algorithm of Jain and Chlamtac
+    (five markers adjusted with piecewise-parabolic interpolation). Exact until the fifth value.
+    """
+
+    def __init__(self, quantile: "Between 0 and 1, e.g. 0.95" = 0.5):
+        super().__init__()
+        if not 0 < quantile < 1:
+            raise ValueError("StreamingQuantile needs a quantile between 0 and 1")
+        self.quantile = quantile
+        self._heights = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4]
+        self._increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def update(self, value):
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(float(value))
+            heights.sort()
+            return
+        if value < heights[0]:
+            heights[0] = float(value)
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = float(value)
+            k = 3
+        else:
+            k = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+        positions = self._positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+        for i in range(1, 4):
+            d = self._desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + d * (heights[i + d] - heights[i]) / (positions[i + d] - positions[i])
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                                                   + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self):
+        if not self.count:
+            return None
+        if self.count <= 5:
+            return float(np.quantile(self._heights, self.quantile))
+        return self._heights[2]
@@ -0,0 +1,154 @@
+from abc import ABC, abstractmethod
+import asyncio
+import logging
+
+import aiohttp
+
+from UPISAS.exceptions import EndpointNotReachable, ServerNotReachable
+from UPISAS.knowledge import Knowledge
+from UPISAS.columnar import ColumnarStore
+from UPISAS.events import events
+from UPISAS import validate_schema
+
+
+class AsyncStrategy(ABC):
+    """
+    The asyncio counterpart of Strategy: monitor/analyze/plan/execute are coroutines and the HTTP calls are
+    non-blocking, so that many MAPE-K loops can share a single event loop (see run_loops).
+    The Knowledge is filled in exactly as in Strategy.
+    """
+
+    def __init__(self, exemplar, session: "aiohttp.ClientSession to use, one is created lazily if None" = None,
+                 timeout: "Total seconds before giving up on a request" = None):
+        self.exemplar = exemplar
+        self.knowledge = Knowledge(ColumnarStore(), dict(), dict(), dict(), dict(), dict(), dict())
+        self.events = events.child()
+        self._session = session
+        self._owns_session = session is None
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def ping(self):
+        ping_res = await self._perform_get_request(self.exemplar.base_endpoint)
+        logging.info(f"ping result: {ping_res}")
+
+    async def monitor(self, endpoint_suffix="monitor", with_validation=True, verbose=False):
+        fresh_data = await self._perform_get_request(endpoint_suffix)
+        self.events.delta("monitor", fresh_data, level=logging.INFO if verbose else logging.DEBUG)
+        if with_validation:
+            if(not self.knowledge.monitor_schema): await self.get_monitor_schema()
+            validate_schema(fresh_data, self.knowledge.monitor_schema)
+        self.knowledge.add_monitored_data(fresh_data)
+        return True
+
+    async def execute(self, adaptation=None, endpoint_suffix="execute", with_validation=True):
+        if(not adaptation): adaptation= self.knowledge.plan_data
+        if with_validation:
+            if(not self.knowledge.execute_schema): await self.get_execute_schema()
+            validate_schema(adaptation, self.knowledge.execute_schema)
+        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+        session = await self._get_session()
+        try:
+            async with session.put(url, json=adaptation) as response:
+                status = response.status
+        except aiohttp.ClientConnectionError as e:
+            logging.error(e)
+            logging.error("Please check that the server is reachable and retry.")
+            raise ServerNotReachable
+        logging.info("[Execute]\tposted configuration: " + str(adaptation))
+        if status == 404:
+            logging.error("Cannot execute adaptation on remote system, check that the execute endpoint exists.")
+            raise EndpointNotReachable
+        return True
+
+    async def get_adaptation_options(self, endpoint_suffix: "API Endpoint" = "adaptation_options", with_validation=True):
+        self.knowledge.adaptation_options = await self._perform_get_request(endpoint_suffix)
+        if with_validation:
+            if(not self.knowledge.adaptation_options_schema): await self.get_adaptation_options_schema()
+            validate_schema(self.knowledge.adaptation_options, self.knowledge.adaptation_options_schema)
+        logging.info(f"adaptation_options set to: {self.knowledge.adaptation_options}")
+
+    async def get_monitor_schema(self, endpoint_suffix = "monitor_schema"):
+        self.knowledge.monitor_schema = await self._perform_get_request(endpoint_suffix)
+        logging.info(f"monitor_schema set to: {self.knowledge.monitor_schema}")
+
+    async def get_execute_schema(self, endpoint_suffix = "execute_schema"):
+        self.knowledge.execute_schema = await self._perform_get_request(endpoint_suffix)
+        logging.info(f"execute_schema set to: {self.knowledge.execute_schema}")
+
+    async def get_adaptation_options_schema(self, endpoint_suffix: "API Endpoint" = "adaptation_options_schema"):
+        self.knowledge.adaptation_options_schema = await self._perform_get_request(endpoint_suffix)
+        logging.info(f"adaptation_options_schema set to: {self.knowledge.adaptation_options_schema}")
+
+    async def close(self):
+        '''Closes the HTTP session, if it was created by this strategy'''
+        if self._session and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+        return self._session
+
+    async def _perform_get_request(self, endpoint_suffix: "API Endpoint"):
+        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+        session = await self._get_session()
+        try:
+            logging.info("GET request to " + str(url))
+            async with session.get(url) as response:
+                if response.status == 404:
+                    logging.error("Please check that the endpoint you are trying to reach actually exists.")
+                    raise EndpointNotReachable
+                # exemplars do not always set the application/json content type
+                return await response.json(content_type=None)
+        except aiohttp.ClientConnectionError as e:
+            logging.error(e)
+            logging.error("Please check that the server is reachable and retry.")
+            raise ServerNotReachable
+
+    @abstractmethod
+    async def analyze(self):
+        """ ... """
+        pass
+
+    @abstractmethod
+    async def plan(self):
+        """ ... """
+        pass
+
+
+async def run_loop(strategy: AsyncStrategy, iterations: "Number of iterations, None to loop forever" = None,
+                   period: "Seconds between the start of two iterations" = 0, with_validation=True):
+    '''Runs the MAPE-K loop of one AsyncStrategy, returning the number of executed adaptations'''
+    loop = asyncio.get_running_loop()
+    adaptations = 0
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        started = loop.time()
+        await strategy.monitor(with_validation=with_validation)
+        if await strategy.analyze():
+            if await strategy.plan():
+                await strategy.execute(with_validation=with_validation)
+                adaptations += 1
+        iteration += 1
+        await asyncio.sleep(max(0.0, period - (loop.time() - started)))
+    return adaptations
+
+
+async def run_loops(strategies, iterations=None, period=0, with_validation=True, close=True):
+    '''
+    Runs the MAPE-K loops of many AsyncStrategy instances (e.g. one per base_endpoint) concurrently on the
+    running event loop. Returns, in order, the number of adaptations of each loop or the exception it raised.
+    '''
+    try:
+        return await asyncio.gather(*[run_loop(strategy, iterations, period, with_validation)
+                                      for strategy in strategies], return_exceptions=True)
+    finally:
+        if close:
+            await asyncio.gather(*[strategy.close() for strategy in strategies])
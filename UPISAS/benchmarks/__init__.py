@@ -0,0 +1,127 @@
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import time
+import timeit
+
+from UPISAS import get_cache_dir
+
+# realistic history sizes, from a short run to a week of one sample per second
+DEFAULT_SIZES = (10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+QUICK_SIZES = (10 ** 2, 10 ** 3, 10 ** 4)
+
+_benchmarks = {}
+
+
+def benchmark(name, sized: "Whether the benchmark runs once per history size" = True):
+    '''
+    Registers a benchmark. The decorated function does the (untimed) setup for a history size, or without any
+    argument when sized=False, and returns the zero-argument callable that is timed.
+    '''
+    def register(setup):
+        _benchmarks[name] = (setup, sized)
+        return setup
+    return register
+
+
+def get_benchmarks():
+    # importing the suite registers its benchmarks
+    import UPISAS.benchmarks.hot_path  # noqa: F401
+    return dict(_benchmarks)
+
+
+def time_callable(function, repeat=5, min_time=0.2):
+    '''
+    Seconds per call of function: calls are batched until a batch lasts at least min_time,
+    then repeat batches are timed. Returns the best and the median seconds per call.
+    '''
+    timer = timeit.Timer(function)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 10
+    timings = [timing / number for timing in timer.repeat(repeat=repeat, number=number)]
+    return {"best": min(timings), "median": statistics.median(timings), "number": number, "repeat": repeat}
+
+
+def run(sizes=DEFAULT_SIZES, pattern: "Regular expression selecting the benchmarks to run" = None,
+        repeat=5, min_time=0.2, report: "Called as report(key, result) after each benchmark" = None):
+    '''Runs the selected benchmarks, returns a dict from "name" or "name[size]" to its timings'''
+    results = {}
+    for name, (setup, sized) in get_benchmarks().items():
+        if pattern and not re.search(pattern, name):
+            continue
+        for size in (sizes if sized else [None]):
+            key = f"{name}[{size}]" if sized else name
+            function = setup(size) if sized else setup()
+            results[key] = time_callable(function, repeat, min_time)
+            if report:
+                report(key, results[key])
+    return results
+
+
+def current_commit():
+    '''The short hash of HEAD, suffixed with +dirty when the tree has changes, "unknown" outside of git'''
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + "+dirty" if dirty else commit
+
+
+def get_results_dir():
+    return os.path.join(get_cache_dir(), "benchmarks")
+
+
+def save_results(results, commit, results_dir=None):
+    '''Stores the results of a commit as <results_dir>/<commit>.json, returns the path'''
+    results_dir = results_dir if results_dir else get_results_dir()
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{commit}.json")
+    with open(path, "w") as f:
+        json.dump({"commit": commit, "created_at": time.time(), "python": platform.python_version(),
+                   "machine": platform.machine(), "results": results}, f, indent=1)
+    return path
+
+
+def load_results(reference, results_dir=None):
+    '''The stored document of a commit, or of a path to a results file'''
+    results_dir = results_dir if results_dir else get_results_dir()
+    path = reference if os.path.isfile(reference) else os.path.join(results_dir, f"{reference}.json")
+    with open(path) as f:
+        return json.load(f)
+
+
+def latest_results(exclude_commit=None, results_dir=None):
+    '''The most recently stored document of another commit than exclude_commit, None when there is none'''
+    results_dir = results_dir if results_dir else get_results_dir()
+    if not os.path.isdir(results_dir):
+        return None
+    documents = []
+    for file_name in os.listdir(results_dir):
+        if file_name.endswith(".json") and file_name[:-len(".json")] != exclude_commit:
+            documents.append(load_results(os.path.join(results_dir, file_name)))
+    return max(documents, key=lambda document: document["created_at"], default=None)
+
+
+def compare(results, baseline_results, max_regression: "Tolerated slowdown, 0.25 is 25% slower" = 0.25,
+            statistic="best"):
+    '''
+    Compares the benchmarks present in both results. Returns a list of (key, baseline seconds, seconds, ratio,
+    regressed), regressed being True when the ratio exceeds 1 + max_regression.
+    '''
+    comparison = []
+    for key, result in results.items():
+        if key not in baseline_results:
+            continue
+        baseline = baseline_results[key][statistic]
+        ratio = result[statistic] / baseline if baseline else float("inf")
+        comparison.append((key, baseline, result[statistic], ratio, ratio > 1 + max_regression))
+    return comparison
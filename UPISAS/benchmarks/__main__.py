@@ -0,0 +1,75 @@
+'''
+Runs the micro-benchmarks of the UPISAS hot path, stores the results of the current commit and compares them
+with a baseline. Exits with status 1 when a benchmark regressed by more than --max-regression.
+
+    python -m UPISAS.benchmarks --quick
+    python -m UPISAS.benchmarks --baseline 1a2b3c4 --max-regression 0.1 --filter swim
+'''
+import argparse
+import logging
+import sys
+
+from UPISAS.benchmarks import DEFAULT_SIZES, QUICK_SIZES, run, current_commit, save_results, load_results, \
+    latest_results, compare
+
+
+def _format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.3f} {unit}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m UPISAS.benchmarks", description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help=f"history sizes of the sized benchmarks (default {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--quick", action="store_true", help=f"only the sizes {' '.join(map(str, QUICK_SIZES))}")
+    parser.add_argument("--filter", default=None, help="regular expression selecting the benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds of each timed batch")
+    parser.add_argument("--baseline", default=None,
+                        help="commit or results file to compare with (default: the latest results of another commit)")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="tolerated slowdown against the baseline, 0.25 is 25%% slower")
+    parser.add_argument("--results-dir", default=None, help="where results are stored (default: the UPISAS cache)")
+    parser.add_argument("--no-save", action="store_true", help="do not store the results of this run")
+    args = parser.parse_args(argv)
+    # the exemplar modules set the root logger to INFO when imported, which would flood the report
+    logging.disable(logging.INFO)
+    try:
+        return _benchmark(args)
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def _benchmark(args):
+    sizes = args.sizes if args.sizes else (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    commit = current_commit()
+    print(f"benchmarking {commit}")
+    results = run(sizes, args.filter, args.repeat, args.min_time,
+                  report=lambda key, result: print(f"{key:40} {_format_seconds(result['best'])}"
+                                                   f"  (median {_format_seconds(result['median'])})"))
+    if not args.no_save:
+        print(f"results stored in {save_results(results, commit, args.results_dir)}")
+
+    baseline = load_results(args.baseline, args.results_dir) if args.baseline \
+        else latest_results(exclude_commit=commit, results_dir=args.results_dir)
+    if baseline is None:
+        print("no baseline to compare with")
+        return 0
+    print(f"\ncompared with {baseline['commit']}")
+    regressions = 0
+    for key, baseline_seconds, seconds, ratio, regressed in compare(results, baseline["results"],
+                                                                    args.max_regression):
+        regressions += regressed
+        print(f"{key:40} {_format_seconds(baseline_seconds)} -> {_format_seconds(seconds)}  x{ratio:6.2f}"
+              + ("  REGRESSION" if regressed else ""))
+    if regressions:
+        print(f"{regressions} benchmark(s) regressed by more than {args.max_regression:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import atexit
+import contextlib
+import functools
+import os
+
+import requests
+
+from UPISAS import validate_schema
+from UPISAS.benchmarks import benchmark
+from UPISAS.columnar import ColumnarStore
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel, SWIMModel
+from UPISAS.retention import LastN
+from UPISAS.strategies.demo_strategy import DemoStrategy
+from UPISAS.strategies.swim_reactive_strategy import ReactiveAdaptationManager
+from UPISAS.utility import swim_utility
+
+_devnull = open(os.devnull, "w")
+atexit.register(_devnull.close)
+
+
+class _DetachedExemplar:
+    ''' Strategies built on it only work on their Knowledge, nothing is ever requested from it.'''
+    base_endpoint = "http://127.0.0.1:1"
+
+
+def _swim_samples(count=1000):
+    model = SWIMModel(seed=0)
+    samples = []
+    for tick in range(count):
+        if tick % 50 == 0:
+            model.execute({"server_number": 1 + tick // 50 % 3, "dimmer_factor": 0.5})
+        samples.append(model.monitor())
+    return samples
+
+
+def _build_swim_history(size):
+    samples = _swim_samples()
+    store = ColumnarStore()
+    for index in range(size):
+        store.append(samples[index % len(samples)], SWIMModel.monitor_schema, float(index))
+    return store
+
+
+@functools.lru_cache(maxsize=None)
+def _swim_history(size):
+    '''A ColumnarStore holding size SWIM samples, shared by the benchmarks that only read it'''
+    return _build_swim_history(size)
+
+
+def _swim_strategy(size, history=None):
+    strategy = ReactiveAdaptationManager(_DetachedExemplar())
+    strategy.knowledge.monitor_schema = SWIMModel.monitor_schema
+    strategy.knowledge.monitored_data = history if history is not None else _swim_history(size)
+    return strategy
+
+
+@benchmark("validate_schema", sized=False)
+def validate_swim_sample():
+    sample = _swim_samples(1)[0]
+    return lambda: validate_schema(sample, SWIMModel.monitor_schema)
+
+
+@benchmark("monitor_ingestion")
+def monitor_ingestion(size):
+    # appends to a history of its own, so that the shared one keeps its size, and which keeps the last size samples
+    # however many times the benchmark runs
+    history = _build_swim_history(size)
+    history.retention = LastN(size)
+    strategy = _swim_strategy(size, history)
+    sample = _swim_samples(1)[0]
+    return lambda: strategy.monitor(with_validation=False, fresh_data=sample)
+
+
+@benchmark("reactive_analyze_plan")
+def reactive_analyze_plan(size):
+    strategy = _swim_strategy(size)
+
+    def analyze_plan():
+        with contextlib.redirect_stdout(_devnull):
+            if strategy.analyze():
+                strategy.plan()
+    return analyze_plan
+
+
+@benchmark("demo_monitor_analyze")
+def demo_monitor_analyze(size):
+    # the mean of f is maintained by an aggregator, analyze does not depend on the length of the history
+    strategy = DemoStrategy(_DetachedExemplar())
+    strategy.knowledge.monitored_data.retention = LastN(size)
+    strategy.knowledge.add_monitored_samples([{"f": float(index % 7)} for index in range(size)])
+
+    def monitor_analyze():
+        strategy.monitor(with_validation=False, fresh_data={"f": 1.0})
+        strategy.analyze()
+    return monitor_analyze
+
+
+@benchmark("swim_utility")
+def swim_utility_history(size):
+    store = _swim_history(size)
+    return lambda: swim_utility(store)
+
+
+def _stand_in_round_trip(request):
+    exemplar = StandInExemplar(DemoModel(), auto_start=True)
+    exemplar.start_run(wait=True)
+    atexit.register(exemplar.stop_container)
+    return request(exemplar)
+
+
+@benchmark("http_round_trip", sized=False)
+def http_round_trip():
+    def request(exemplar):
+        strategy = ReactiveAdaptationManager(exemplar)
+        return lambda: strategy._perform_get_request("monitor")
+    return _stand_in_round_trip(request)
+
+
+@benchmark("http_round_trip_unpooled", sized=False)
+def http_round_trip_unpooled():
+    # a new connection per request, as before Strategy kept a Transport
+    return _stand_in_round_trip(lambda exemplar: lambda: requests.get(f"{exemplar.base_endpoint}/monitor").json())
@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class Clock(ABC):
+    """
+    Where the MAPE-K loop, the readiness waits, the Knowledge timestamps, the execute_filter and the stand-in
+    exemplars take the time from. Durations measured for the metrics always use the real time.
+    """
+
+    @abstractmethod
+    def monotonic(self):
+        """ Seconds on a clock which never goes back, to schedule and measure. """
+        pass
+
+    @abstractmethod
+    def time(self):
+        """ Seconds since the epoch, to timestamp. """
+        pass
+
+    @abstractmethod
+    def sleep(self, seconds):
+        pass
+
+    @abstractmethod
+    def call_later(self, delay, function):
+        """ Calls function() once after delay seconds, returns a handle whose cancel() prevents it. """
+        pass
+
+    @abstractmethod
+    def every(self, period, function):
+        """ Calls function() every period seconds, returns a handle whose cancel() stops it. """
+        pass
+
+
+class _Periodic:
+    # calls a function every period seconds of the system clock from a thread of its own
+    def __init__(self, period, function):
+        self.period = period
+        self.function = function
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="periodic", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._cancelled.wait(self.period):
+            self.function()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+class SystemClock(Clock):
+    """ The real time. """
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def call_later(self, delay, function):
+        timer = threading.Timer(delay, function)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def every(self, period, function):
+        return _Periodic(period, function)
+
+
+system_clock = SystemClock()
+
+
+class _Scheduled:
+    """ A call scheduled on a VirtualClock. """
+    __slots__ = ("due", "period", "function", "cancelled")
+
+    def __init__(self, due, period, function):
+        self.due = due
+        self.period = period
+        self.function = function
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class VirtualClock(Clock):
+    """
+    A clock whose time only moves when it is slept on or advanced, and then jumps at once: a loop with a period of
+    a minute runs an hour of iterations in milliseconds, and always the same way. The calls scheduled with
+    call_later and every are run in the thread which moves the time past them, in the order they are due, with
+    the clock set to their due time.
+    """
+
+    def __init__(self, start: "Initial monotonic() seconds" = 0.0, epoch: "time() when monotonic() is 0" = 0.0):
+        self._now = start
+        self.epoch = epoch
+        self._scheduled = []
+        self._order = itertools.count()
+        self._lock = threading.RLock()
+
+    def monotonic(self):
+        return self._now
+
+    def time(self):
+        return self.epoch + self._now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        '''Moves the time seconds forward, running the calls which fall due meanwhile'''
+        if seconds < 0:
+            raise ValueError("a virtual clock cannot go back in time")
+        self.advance_to(self._now + seconds)
+
+    def advance_to(self, monotonic):
+        '''Moves the time forward to the given monotonic() seconds, if it is not there yet'''
+        with self._lock:
+            while self._scheduled and self._scheduled[0][0] <= monotonic:
+                due, _, scheduled = heapq.heappop(self._scheduled)
+                if scheduled.cancelled:
+                    continue
+                self._now = max(self._now, due)
+                if scheduled.period:
+                    self._push(due + scheduled.period, scheduled)
+                scheduled.function()
+            self._now = max(self._now, monotonic)
+
+    def call_later(self, delay, function):
+        with self._lock:
+            return self._push(self._now + max(delay, 0), _Scheduled(self._now + delay, None, function))
+
+    def every(self, period, function):
+        if period <= 0:
+            raise ValueError("every needs a positive period")
+        with self._lock:
+            return self._push(self._now + period, _Scheduled(self._now + period, period, function))
+
+    def _push(self, due, scheduled):
+        scheduled.due = due
+        heapq.heappush(self._scheduled, (due, next(self._order), scheduled))
+        return scheduled
+
+    def __getstate__(self):
+        # e.g. sent to a worker process with a Knowledge: the copy keeps the time, not the scheduled calls
+        return {"_now": self._now, "epoch": self.epoch}
+
+    def __setstate__(self, state):
+        self.__init__(state["_now"], state["epoch"])
@@ -0,0 +1,296 @@
+import numpy as np
+
+from UPISAS.clock import system_clock
+
+# JSON Schema types which are stored in typed buffers, the value decides between int64 and float64 for "number"
+_NUMERIC_SCHEMA_TYPES = ("number", "integer", "boolean")
+
+
+def _dtype_of(value):
+    if isinstance(value, bool):
+        return np.bool_
+    if isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        return np.int64
+    if isinstance(value, float):
+        return np.float64
+    return None
+
+
+class Column:
+    """
+    The history of one monitored key, with the timestamp of each sample.
+    Numbers and booleans are kept in a typed NumPy buffer grown geometrically (amortized O(1) appends), anything
+    else (e.g. lists of dicts) in a plain list. Indexing with an int returns a Python scalar, as with a list,
+    while slices, values() and window() return zero-copy views of the buffer.
+    Samples evicted from the front (see UPISAS.retention) only move an offset, the buffer is compacted lazily.
+    """
+    __hash__ = None
+
+    def __init__(self, dtype=None, capacity=16):
+        self.dtype = dtype
+        self._buffer = np.empty(capacity, dtype) if dtype is not None else []
+        self._timestamps = np.empty(capacity, np.float64)
+        self._start = 0
+        self._length = 0
+        # number of leading samples which are aggregates of older samples (see retention.Downsample)
+        self.aggregated = 0
+        # number of samples ever appended, evicted ones included (see since())
+        self.total = 0
+
+    @classmethod
+    def for_value(cls, value, property_schema=None):
+        '''Creates a column suited to the type in the JSON Schema of the key, falling back on the first value'''
+        schema_type = property_schema.get("type") if property_schema else None
+        if schema_type is not None and schema_type not in _NUMERIC_SCHEMA_TYPES:
+            return cls(None)
+        return cls(_dtype_of(value))
+
+    def append(self, value, timestamp):
+        if self.dtype is not None and not self._fits(value):
+            self._promote(value)
+        self._reserve()
+        end = self._start + self._length
+        self._timestamps[end] = timestamp
+        if self.dtype is None:
+            self._buffer.append(value)
+        else:
+            self._buffer[end] = value
+        self._length += 1
+        self.total += 1
+
+    def extend(self, values, timestamps):
+        '''Appends several samples at once, copied into the typed buffer in one go'''
+        values = list(values)
+        count = len(values)
+        for value in values:
+            if self.dtype is None:
+                break
+            if not self._fits(value):
+                self._promote(value)
+        self._reserve(count)
+        end = self._start + self._length
+        self._timestamps[end:end + count] = timestamps
+        if self.dtype is None:
+            self._buffer.extend(values)
+        else:
+            self._buffer[end:end + count] = values
+        self._length += count
+        self.total += count
+
+    def values(self):
+        '''The whole history, as a zero-copy view for typed columns'''
+        return self._buffer[self._start:self._start + self._length]
+
+    def timestamps(self):
+        return self._timestamps[self._start:self._start + self._length]
+
+    def window(self, n):
+        '''The last n values, as a zero-copy view for typed columns'''
+        end = self._start + self._length
+        return self._buffer[max(self._start, end - n):end]
+
+    def since(self, total):
+        '''
+        A copy of the values appended after the first `total` ones (a previous value of self.total), the ones
+        evicted meanwhile excepted
+        '''
+        end = self._start + self._length
+        values = self._buffer[end - min(max(self.total - total, 0), self._length):end]
+        return values if self.dtype is None else values.copy()
+
+    def latest(self):
+        if not self._length:
+            raise IndexError("latest() on an empty column")
+        return self[self._length - 1]
+
+    def tolist(self):
+        if self.dtype is None:
+            return self.values()
+        return self.values().tolist()
+
+    def drop_front(self, n):
+        '''Evicts the n oldest samples, returning a copy of their (values, timestamps)'''
+        n = min(n, self._length)
+        evicted = (self._copy(0, n), self._timestamps[self._start:self._start + n].copy())
+        if self.dtype is None:
+            # release the evicted objects before the list is compacted
+            self._buffer[self._start:self._start + n] = [None] * n
+        self._start += n
+        self._length -= n
+        self.aggregated = max(0, self.aggregated - n)
+        return evicted
+
+    def collapse(self, index, count, value, timestamp):
+        '''
+        Replaces the count samples starting at index by a single one, e.g. their aggregate.
+        Returns a copy of the replaced (values, timestamps).
+        '''
+        if self.dtype is not None and not self._fits(value):
+            self._promote(value)
+        start = self._start + index
+        evicted = (self._copy(index, index + count), self._timestamps[start:start + count].copy())
+        shift = count - 1
+        self._timestamps[self._start + shift:start + shift] = self._timestamps[self._start:start]
+        self._buffer[self._start + shift:start + shift] = self._buffer[self._start:start]
+        self._timestamps[start + shift] = timestamp
+        self._buffer[start + shift] = value
+        if self.dtype is None:
+            self._buffer[self._start:self._start + shift] = [None] * shift
+        self._start += shift
+        self._length -= shift
+        if index == self.aggregated:
+            self.aggregated += 1
+        return evicted
+
+    def _copy(self, begin, end):
+        values = self._buffer[self._start + begin:self._start + end]
+        return values if self.dtype is None else values.copy()
+
+    def _fits(self, value):
+        dtype = _dtype_of(value)
+        return dtype == self.dtype or (self.dtype == np.float64 and dtype == np.int64)
+
+    def _promote(self, value):
+        if self.dtype == np.int64 and _dtype_of(value) == np.float64:
+            self._buffer = self._buffer.astype(np.float64)
+            self.dtype = np.float64
+        else:
+            self._buffer = self._buffer[:self._start + self._length].tolist()
+            self.dtype = None
+
+    def _reserve(self, count=1):
+        '''Makes room for count more samples at the end, compacting the evicted front or growing the capacity'''
+        capacity = len(self._timestamps)
+        if self._start + self._length + count <= capacity:
+            return
+        if self._start < capacity // 2 or self._length + count > capacity:
+            capacity = max(capacity * 2, self._length + count)
+        timestamps = np.empty(capacity, np.float64)
+        timestamps[:self._length] = self.timestamps()
+        self._timestamps = timestamps
+        if self.dtype is None:
+            del self._buffer[:self._start]
+        else:
+            buffer = np.empty(capacity, self.dtype)
+            buffer[:self._length] = self.values()
+            self._buffer = buffer
+        self._start = 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.values()[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("column index out of range")
+        if self.dtype is None:
+            return self._buffer[self._start + index]
+        return self._buffer[self._start + index].item()
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.values(), dtype=dtype)
+
+    # compared like the list it replaces: with lists and columns only, anything else is not equal (and not ordered)
+    def _comparable(self, other):
+        if isinstance(other, Column):
+            return other.tolist()
+        return other if isinstance(other, list) else None
+
+    def __eq__(self, other):
+        other = self._comparable(other)
+        return NotImplemented if other is None else self.tolist() == other
+
+    def __lt__(self, other):
+        other = self._comparable(other)
+        return NotImplemented if other is None else self.tolist() < other
+
+    def __le__(self, other):
+        other = self._comparable(other)
+        return NotImplemented if other is None else self.tolist() <= other
+
+    def __gt__(self, other):
+        other = self._comparable(other)
+        return NotImplemented if other is None else self.tolist() > other
+
+    def __ge__(self, other):
+        other = self._comparable(other)
+        return NotImplemented if other is None else self.tolist() >= other
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+
+class ColumnarStore(dict):
+    """
+    The monitored data of a Knowledge: a dict from each monitored key to its Column.
+    The columns are typed following the properties of the monitor schema, when one is given, and trimmed after
+    every append by their retention policy (see UPISAS.retention), everything is kept by default.
+    Columns are not JSON-serializable: dump to_dict() instead.
+    """
+
+    def __init__(self, retention: "Default RetentionPolicy of the keys" = None,
+                 on_evict: "Called as on_evict(key, values, timestamps) with the samples dropped by a policy" = None,
+                 clock: "Clock timestamping the samples appended without a timestamp" = None):
+        super().__init__()
+        self.clock = clock if clock else system_clock
+        self.retention = retention
+        self.retention_per_key = {}
+        self.on_evict = on_evict
+
+    def set_retention(self, key, policy):
+        '''Sets the RetentionPolicy of a single key, overriding the default one'''
+        self.retention_per_key[key] = policy
+        if key in self:
+            self._apply_retention(key, self[key])
+
+    def append(self, fresh_data, monitor_schema=None, timestamp=None):
+        '''Appends a freshly monitored sample, one value per key'''
+        if timestamp is None:
+            timestamp = self.clock.time()
+        properties = monitor_schema.get("properties", {}) if monitor_schema else {}
+        for key, value in fresh_data.items():
+            column = self.get(key)
+            if column is None:
+                column = self[key] = Column.for_value(value, properties.get(key))
+            column.append(value, timestamp)
+            self._apply_retention(key, column)
+
+    def extend(self, samples, monitor_schema=None, timestamps=None):
+        '''Appends several samples at once, column by column, then trims each column once'''
+        samples = list(samples)
+        if timestamps is None:
+            timestamps = [self.clock.time()] * len(samples)
+        properties = monitor_schema.get("properties", {}) if monitor_schema else {}
+        for key in dict.fromkeys(key for sample in samples for key in sample):
+            rows = [(sample[key], timestamp) for sample, timestamp in zip(samples, timestamps) if key in sample]
+            column = self.get(key)
+            if column is None:
+                column = self[key] = Column.for_value(rows[0][0], properties.get(key))
+            column.extend([value for value, _ in rows], [timestamp for _, timestamp in rows])
+            self._apply_retention(key, column)
+
+    def to_dict(self):
+        '''The history of every key as a plain list, e.g. to json.dump the monitored data'''
+        return {key: column.tolist() for key, column in self.items()}
+
+    def latest(self):
+        '''The last value of every key'''
+        return {key: column.latest() for key, column in self.items() if len(column)}
+
+    def window(self, n):
+        '''The last n values of every key'''
+        return {key: column.window(n) for key, column in self.items()}
+
+    def _apply_retention(self, key, column):
+        policy = self.retention_per_key.get(key, self.retention)
+        if policy is None:
+            return
+        for values, timestamps in policy.apply(column):
+            if self.on_evict:
+                self.on_evict(key, values, timestamps)
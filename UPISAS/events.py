@@ -0,0 +1,184 @@
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# values longer than this are cut in the text form of an event
+MAX_VALUE_LENGTH = 200
+
+
+class Event:
+    """
+    The message of the log record of an event. It is only turned into text (or JSON) when a handler formats it,
+    which the off-thread file writer of write_events_to does in its own thread.
+    """
+    __slots__ = ("name", "fields")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __str__(self):
+        fields = " ".join(f"{key}={_shorten(value)}" for key, value in self.fields.items())
+        return f"[{self.name}] {fields}" if fields else f"[{self.name}]"
+
+
+def _shorten(value):
+    text = repr(value) if isinstance(value, str) else str(value)
+    return text if len(text) <= MAX_VALUE_LENGTH else text[:MAX_VALUE_LENGTH] + "..."
+
+
+class EventLog:
+    """
+    Structured events of the MAPE-K loop, on the "UPISAS.events" logger.
+    - level-gated: an event below the level of the logger costs one check, nothing is computed or formatted;
+    - lazy: a field given as a callable is only called when the event is emitted;
+    - deltas: delta() only logs the keys whose value changed since the previous event of the same name;
+    - rate-limited: at most `rate` events per second per name (a token bucket of `rate` tokens), the number of
+      events dropped meanwhile is reported as the `suppressed` field of the next one.
+    The deltas and the rate budgets are those of one emitter: every Strategy has its own child() of `events`.
+    """
+
+    def __init__(self, logger_name="UPISAS.events", rate: "Events per second per name, None for no limit" = 20):
+        self.logger = logging.getLogger(logger_name)
+        self.rate = rate
+        self.rates = {}
+        self._buckets = {}
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    def child(self):
+        '''A new EventLog on the same logger and rate overrides, with deltas and rate budgets of its own'''
+        log = EventLog(self.logger.name, self.rate)
+        log.rates = self.rates
+        return log
+
+    def set_rate(self, name, rate):
+        '''Overrides the rate limit of the events of one name, None for no limit'''
+        self.rates[name] = rate
+
+    def enabled(self, level=logging.INFO):
+        return self.logger.isEnabledFor(level)
+
+    def emit(self, name, /, level=logging.INFO, **fields):
+        '''Logs the event `name` with the given fields, returns whether it was logged'''
+        if not self.logger.isEnabledFor(level):
+            return False
+        suppressed = self._take_token(name)
+        if suppressed is None:
+            return False
+        fields = {key: value() if callable(value) else value for key, value in fields.items()}
+        if suppressed:
+            fields["suppressed"] = suppressed
+        self.logger.log(level, Event(name, fields))
+        return True
+
+    def delta(self, name, state: "Flat dict of the current values", /, level=logging.INFO, **fields):
+        '''Logs the keys of state whose value changed since the previous delta of the same name'''
+        if not self.logger.isEnabledFor(level):
+            return False
+        with self._lock:
+            previous = self._previous.get(name, {})
+        changed = {key: value for key, value in state.items() if key not in previous or previous[key] != value}
+        if not changed or not self.emit(name, level, **changed, **fields):
+            return False
+        # a change dropped by the rate limit is still a change for the next delta
+        with self._lock:
+            self._previous[name] = dict(state)
+        return True
+
+    def reset(self, name=None):
+        '''Forgets the state of the deltas (of one name), the next delta logs every key'''
+        with self._lock:
+            if name is None:
+                self._previous.clear()
+            else:
+                self._previous.pop(name, None)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _take_token(self, name):
+        # None when the event is dropped, otherwise the number of events dropped since the previous one
+        rate = self.rates.get(name, self.rate)
+        if rate is None:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(name, (rate, now, 0))
+            tokens = min(rate, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[name] = (tokens, now, suppressed + 1)
+                return None
+            self._buckets[name] = (tokens - 1, now, 0)
+            return suppressed
+
+
+events = EventLog()
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """ One compact JSON object per event: time, level, event name and fields. """
+
+    def format(self, record):
+        message = record.msg
+        if isinstance(message, Event):
+            document = {"time": round(record.created, 6), "level": record.levelname, "event": message.name,
+                        **message.fields}
+        else:
+            document = {"time": round(record.created, 6), "level": record.levelname, "message": record.getMessage()}
+        return json.dumps(document, default=str, separators=(",", ":"))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # QueueHandler formats records in the emitting thread, the events are formatted by the listener instead
+    def prepare(self, record):
+        return record
+
+
+class EventFileWriter(QueueListener):
+    """ Writes the events of an EventLog to a JSON lines file, see write_events_to. """
+
+    def __init__(self, path, event_log, level, console):
+        records = queue.SimpleQueue()
+        self.file_handler = logging.FileHandler(path)
+        self.file_handler.setFormatter(JSONLinesFormatter())
+        super().__init__(records, self.file_handler)
+        self.event_log = event_log
+        self.queue_handler = _DeferredQueueHandler(records)
+        self._restore = (event_log.logger.level, event_log.logger.propagate)
+        event_log.logger.addHandler(self.queue_handler)
+        event_log.logger.setLevel(level)
+        event_log.logger.propagate = console
+
+    def stop(self):
+        '''Detaches from the logger, writes the events still queued and closes the file'''
+        self.event_log.logger.removeHandler(self.queue_handler)
+        self.event_log.logger.level, self.event_log.logger.propagate = self._restore
+        super().stop()
+        self.file_handler.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def write_events_to(path, level=logging.INFO, event_log: "EventLog whose events are written" = None,
+                    console: "Whether the events still reach the handlers of the root logger" = False):
+    '''
+    Writes the events to a JSON lines file from a background thread: the MAPE-K loop only enqueues them.
+    Returns the started EventFileWriter; stop() it to flush the file, e.g. at the end of the run.
+    '''
+    writer = EventFileWriter(path, event_log if event_log else events, level, console)
+    writer.start()
+    return writer
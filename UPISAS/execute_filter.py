@@ -0,0 +1,122 @@
+import copy
+import logging
+import threading
+
+from UPISAS.clock import system_clock
+
+
+class ExecuteStats:
+    """ What an ExecuteFilter did with the adaptations submitted to it. """
+
+    def __init__(self):
+        self.submitted = 0
+        self.sent = 0
+        self.suppressed = 0
+        self.coalesced = 0
+
+    def __repr__(self):
+        return (f"ExecuteStats(submitted={self.submitted}, sent={self.sent}, suppressed={self.suppressed}, "
+                f"coalesced={self.coalesced})")
+
+
+class ExecuteFilter:
+    """
+    Sits between Strategy.execute and the PUT on the exemplar.
+    With deduplicate=True, an adaptation equal to the last configuration the exemplar acknowledged is not sent
+    again (suppressed). With coalesce_window > 0, at most one adaptation is sent per window: the adaptations
+    planned meanwhile replace each other (coalesced) and only the last one is sent when the window closes.
+    Acknowledged configurations are remembered as copies, plans may be updated in place afterwards.
+    """
+
+    def __init__(self, deduplicate: "Skip adaptations equal to the last acknowledged configuration" = False,
+                 coalesce_window: "Minimum seconds between two sends, 0 to send every adaptation right away" = 0.0,
+                 clock: "Clock of the coalescing window" = None):
+        self.deduplicate = deduplicate
+        self.coalesce_window = coalesce_window
+        self.clock = clock if clock else system_clock
+        self.stats = ExecuteStats()
+        self.last_acknowledged = None
+        self._last_sent_at = None
+        self._pending = None
+        self._timer = None
+        self._error = None
+        self._lock = threading.RLock()
+
+    def submit(self, adaptation, send: "Called as send(adaptation), returns whether the exemplar acknowledged it",
+               force: "Send even if it is a duplicate or within the window" = False):
+        '''Sends, suppresses or delays an adaptation, returns whether it was sent right away'''
+        with self._lock:
+            self._raise_error()
+            self.stats.submitted += 1
+            if self._pending is not None:
+                # the newest plan supersedes the one waiting for the window to close
+                self._pending = None
+                self.stats.coalesced += 1
+            if not force and self.is_duplicate(adaptation):
+                self.stats.suppressed += 1
+                logging.info("adaptation suppressed, the exemplar already has this configuration")
+                return False
+            wait = self._remaining_window()
+            if force or wait <= 0:
+                self._send(adaptation, send)
+                return True
+            self._pending = (copy.deepcopy(adaptation), send)
+            if self._timer is None:
+                self._timer = self.clock.call_later(wait, self._flush_from_timer)
+            return False
+
+    def is_duplicate(self, adaptation):
+        '''Whether submitting the adaptation now would be suppressed'''
+        return self.deduplicate and adaptation == self.last_acknowledged
+
+    def flush(self):
+        '''Sends the adaptation waiting for the window to close, if any, without waiting'''
+        with self._lock:
+            self._cancel_timer()
+            if self._pending is not None:
+                adaptation, send = self._pending
+                self._pending = None
+                self._send(adaptation, send)
+            self._raise_error()
+
+    def forget(self):
+        '''Forgets the acknowledged configuration, e.g. when the exemplar was restarted or changed on its own'''
+        with self._lock:
+            self.last_acknowledged = None
+
+    def _send(self, adaptation, send):
+        self._last_sent_at = self.clock.monotonic()
+        self.stats.sent += 1
+        # until acknowledged, the configuration of the exemplar is unknown
+        self.last_acknowledged = None
+        acknowledged = send(adaptation)
+        self.last_acknowledged = copy.deepcopy(adaptation) if acknowledged else None
+
+    def _remaining_window(self):
+        if not self.coalesce_window or self._last_sent_at is None:
+            return 0
+        return self._last_sent_at + self.coalesce_window - self.clock.monotonic()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+            if self._pending is None:
+                return
+            adaptation, send = self._pending
+            self._pending = None
+            try:
+                self._send(adaptation, send)
+            except Exception as e:
+                # raised by the next submit or flush, in the thread of the strategy
+                logging.error(f"coalesced adaptation could not be executed: {e}")
+                self._error = e
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
@@ -1,45 +1,86 @@
 import docker
+import socket
+import threading
+import uuid
 from abc import ABC, abstractmethod
-from rich.progress import Progress
-from UPISAS import show_progress
+from UPISAS.images import resolve_image, image_cache
+from UPISAS.readiness import HTTPProbe
 import logging
 from docker.errors import DockerException
-from UPISAS.exceptions import DockerImageNotFoundOnDockerHub
+from UPISAS.exceptions import ExemplarNotReady
+from UPISAS.clock import system_clock
 
 logging.getLogger().setLevel(logging.INFO)
 
+_allocated_host_ports = set()
+_allocated_host_ports_lock = threading.Lock()
+
+
+def allocate_host_ports(container_ports):
+    '''
+    Maps each container port to a free host port, never handing out the same port twice in this process
+    (the container may not have bound it yet when the next exemplar asks for ports).
+    '''
+    sockets = []
+    ports = {}
+    try:
+        with _allocated_host_ports_lock:
+            for container_port in container_ports:
+                while True:
+                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    sock.bind(("", 0))
+                    sockets.append(sock)
+                    host_port = sock.getsockname()[1]
+                    if host_port not in _allocated_host_ports:
+                        break
+                _allocated_host_ports.add(host_port)
+                ports[container_port] = host_port
+    finally:
+        for sock in sockets:
+            sock.close()
+    return ports
+
+
+def release_host_ports(ports):
+    '''Makes the host ports of a removed exemplar available to allocate_host_ports again'''
+    with _allocated_host_ports_lock:
+        _allocated_host_ports.difference_update(ports)
+
+
+def unique_container_name(prefix):
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
 
 class Exemplar(ABC):
     """
     A class which encapsulates a self-adaptive exemplar run in a docker container.
     """
     _container_name = ""
+    # the clock of the readiness waits, and of the strategies made for this exemplar (see Strategy.__init__)
+    clock = system_clock
     def __init__(self, base_endpoint: "string with the URL of the exemplar's HTTP server", \
                  docker_kwargs,
                  auto_start: "Whether to immediately start the container after creation" =False,
                  ):
         '''Create an instance of the Exemplar class'''
         self.base_endpoint = base_endpoint
+        self.time_to_ready = None
         image_name = docker_kwargs["image"]
-        image_owner = image_name.split("/")[0]
         try:
             docker_client = docker.from_env()
+            # the cached resolution only spares the search and pull of an image which is already there
+            image_id = resolve_image(docker_client, image_name)
+            docker_kwargs["detach"] = True
             try:
-                docker_client.images.get(image_name)
-                logging.info(f"image '{image_name}' found locally")
+                self.exemplar_container = docker_client.containers.create(**docker_kwargs)
             except docker.errors.ImageNotFound:
-                logging.info(f"image '{image_name}' not found locally")
-                images_from_owner = docker_client.images.search(image_owner)
-                if image_name.split(":")[0] in [i["name"] for i in images_from_owner]:
-                    logging.info(f"image '{image_name}' found on DockerHub, pulling it")
-                    with Progress() as progress:
-                        for line in docker_client.api.pull(image_name, stream=True, decode=True):
-                            show_progress(line, progress)
-                else:
-                    logging.error(f"image '{image_name}' not found on DockerHub, exiting!")
-                    raise DockerImageNotFoundOnDockerHub
-            docker_kwargs["detach"] = True
-            self.exemplar_container = docker_client.containers.create(**docker_kwargs)
+                # the cached resolution is stale, e.g. the image was removed since
+                image_cache.invalidate(image_name)
+                image_id = resolve_image(docker_client, image_name)
+                self.exemplar_container = docker_client.containers.create(**docker_kwargs)
+            # the image the container was actually created from: the tag may point to a newer build than the cache
+            # says, and the schema cache is keyed on this id
+            self.image_id = self.exemplar_container.attrs.get("Image") or image_id
         except DockerException as e:
             # TODO: Properly catch various errors. Currently, a lot of errors might be caught here.
             # Please check the logs if that happens.
@@ -71,19 +112,23 @@ class Exemplar(ABC):
             if container_status == "exited":
                 logging.warning("container already stopped...")
                 if remove:
-                    self.exemplar_container.remove()
-                    self.exemplar_container = None
+                    self._remove_container()
             else:
                 logging.info("stopping container...")
                 self.exemplar_container.stop()
                 if remove:
-                    self.exemplar_container.remove()
-                    self.exemplar_container = None
+                    self._remove_container()
             return True
         except docker.errors.NotFound as e:
             logging.warning(e)
             logging.warning("cannot stop container")
 
+    def _remove_container(self):
+        self.exemplar_container.remove()
+        self.exemplar_container = None
+        # the ports given by allocate_host_ports, if any
+        release_host_ports(getattr(self, "host_ports", {}).values())
+
     def pause_container(self):
         '''Pauses a running docker container made from the given image when constructing this class'''
         try:
@@ -120,6 +165,28 @@ class Exemplar(ABC):
             logging.warning(e)
             logging.warning("cannot unpause container")
 
+    def wait_until_ready(self, probe: "Probe deciding readiness, HTTPProbe() on base_endpoint by default" = None,
+                         timeout: "Seconds before giving up" = 60,
+                         initial_delay: "Seconds between the first two probes" = 0.05,
+                         max_delay: "Upper bound of the seconds between two probes" = 2.0,
+                         backoff: "Factor applied to the delay after each failed probe" = 2.0):
+        '''Probes the exemplar with exponential backoff until it is ready, returns (and stores) the time to ready'''
+        probe = probe if probe else HTTPProbe()
+        clock = self.clock
+        started = clock.monotonic()
+        deadline = started + timeout
+        delay = initial_delay
+        while not probe(self):
+            now = clock.monotonic()
+            if now >= deadline:
+                logging.error(f"exemplar not ready after {timeout}s")
+                raise ExemplarNotReady
+            clock.sleep(min(delay, deadline - now))
+            delay = min(delay * backoff, max_delay)
+        self.time_to_ready = clock.monotonic() - started
+        logging.info(f"exemplar ready after {self.time_to_ready:.3f}s")
+        return self.time_to_ready
+
     def get_container_status(self):
         if self.exemplar_container:
             self.exemplar_container.reload()
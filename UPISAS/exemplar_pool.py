@@ -0,0 +1,113 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+RESTART = "restart"
+REPLACE = "replace"
+
+
+class ExemplarPool:
+    """
+    Keeps `size` exemplars created and started ahead of time, hands them out with acquire() and recycles them in
+    the background on release(): either by restarting their container (RESTART, cheaper) or by replacing them
+    with freshly created ones (REPLACE, clean state). Setup cost is then paid off the critical path of the runs.
+    With size > 1 the factory must create exemplars with distinct container names and host ports.
+    """
+
+    def __init__(self, factory: "Callable returning a new exemplar, e.g. lambda: SWIM()", size=1,
+                 recycle: "RESTART or REPLACE" = REPLACE,
+                 ready_probe: "Probe an exemplar must pass before being handed out, if any" = None,
+                 ready_timeout=60):
+        if size < 1:
+            raise ValueError("an ExemplarPool needs at least one exemplar")
+        if recycle not in (RESTART, REPLACE):
+            raise ValueError(f"unknown recycle policy '{recycle}', use '{RESTART}' or '{REPLACE}'")
+        self.factory = factory
+        self.size = size
+        self.recycle = recycle
+        self.ready_probe = ready_probe
+        self.ready_timeout = ready_timeout
+        self._idle = queue.Queue()
+        self._in_use = set()
+        self._workers = ThreadPoolExecutor(max_workers=size)
+        self._closed = False
+        # held while checking _closed and submitting work, so that close() cannot shut the workers down in between
+        self._lock = threading.Lock()
+        for _ in range(size):
+            self._workers.submit(self._provision)
+
+    def acquire(self, timeout: "Seconds to wait for an exemplar to be ready, forever if None" = None):
+        '''Hands out a started exemplar, blocking until one is ready'''
+        if self._closed:
+            raise RuntimeError("acquire() on a closed ExemplarPool")
+        exemplar = self._idle.get(timeout=timeout)
+        if isinstance(exemplar, Exception):
+            # a failed provisioning takes the place of its exemplar, try again on the next acquire
+            with self._lock:
+                if not self._closed:
+                    self._workers.submit(self._provision)
+            raise exemplar
+        self._in_use.add(exemplar)
+        return exemplar
+
+    def release(self, exemplar):
+        '''Gives an exemplar back to the pool, it is recycled in the background'''
+        with self._lock:
+            self._in_use.discard(exemplar)
+            closed = self._closed
+            if not closed:
+                self._workers.submit(self._recycle, exemplar)
+        if closed:
+            exemplar.stop_container()
+
+    def close(self):
+        '''Waits for the background work and removes the containers of all the exemplars of the pool'''
+        with self._lock:
+            self._closed = True
+        self._workers.shutdown(wait=True)
+        while not self._idle.empty():
+            exemplar = self._idle.get_nowait()
+            if not isinstance(exemplar, Exception):
+                exemplar.stop_container()
+        for exemplar in list(self._in_use):
+            exemplar.stop_container()
+        self._in_use.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _provision(self):
+        try:
+            exemplar = self.factory()
+            self._make_ready(exemplar)
+        except Exception as e:
+            logging.error(f"cannot provision an exemplar for the pool: {e}")
+            self._idle.put(e)
+            return
+        self._idle.put(exemplar)
+
+    def _recycle(self, exemplar):
+        if self.recycle == REPLACE:
+            exemplar.stop_container()
+            self._provision()
+            return
+        try:
+            logging.info("restarting container...")
+            exemplar.exemplar_container.restart()
+            self._make_ready(exemplar)
+        except Exception as e:
+            logging.error(f"cannot restart the exemplar, replacing it: {e}")
+            exemplar.stop_container()
+            self._provision()
+            return
+        self._idle.put(exemplar)
+
+    def _make_ready(self, exemplar):
+        if exemplar.get_container_status() != "running":
+            exemplar.start_container()
+        if self.ready_probe:
+            exemplar.wait_until_ready(probe=self.ready_probe, timeout=self.ready_timeout)
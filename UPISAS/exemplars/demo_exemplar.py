@@ -1,17 +1,24 @@
-from UPISAS.exemplar import Exemplar
+from UPISAS.exemplar import Exemplar, allocate_host_ports, unique_container_name
 
 
 class DemoExemplar(Exemplar):
     """
     A class which encapsulates a self-adaptive exemplar run in a docker container.
     """
-    def __init__(self, auto_start=False, container_name="upisas-demo"):
+    def __init__(self, auto_start=False, container_name="upisas-demo",
+                 dynamic_ports: "Allocate a free host port and a unique container name, to run several instances side by side" =False):
+        self.host_ports = {3000: 3000}
+        if dynamic_ports:
+            self.host_ports = allocate_host_ports(self.host_ports.keys())
+            container_name = unique_container_name(container_name)
         docker_config = {
             "name":  container_name,
             "image": "iliasger/upisas-demo-managed-system",
-            "ports" : {3000: 3000}}
+            "ports" : self.host_ports}
 
-        super().__init__("http://localhost:3000", docker_config, auto_start)
+        super().__init__(f"http://localhost:{self.host_ports[3000]}", docker_config, auto_start)
 
-    def start_run(self, app):
+    def start_run(self, app, wait: "Whether to block until the HTTP server of the app answers" =False, timeout=60):
         self.exemplar_container.exec_run(cmd = f' sh -c "cd /usr/src/app && node {app}" ', detach=True)
+        if wait:
+            return self.wait_until_ready(timeout=timeout)
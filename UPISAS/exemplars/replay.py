@@ -0,0 +1,79 @@
+import logging
+
+from UPISAS.clock import VirtualClock
+from UPISAS.exemplar import Exemplar
+from UPISAS.exceptions import TraceExhausted
+from UPISAS.loop import MAPEKLoop
+from UPISAS.trace import Trace, ReplayTransport
+
+
+class _ReplayContainer:
+    """ Stands in for the docker container of a ReplayExemplar: always running, nothing to start or stop. """
+    status = "running"
+    attrs = {}
+
+    def reload(self):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def remove(self):
+        pass
+
+    def pause(self):
+        pass
+
+    def unpause(self):
+        pass
+
+    def logs(self, **kwargs):
+        return b""
+
+
+class ReplayExemplar(Exemplar):
+    """
+    An exemplar replaying a trace recorded with UPISAS.trace.record, with no container and no HTTP: the strategies
+    made for it are served by a ReplayTransport of their own, as fast as they consume the samples.
+    Its clock, and that of the strategies made for it, is a VirtualClock at the time of the recording, moved to the
+    timestamp of each sample as it is served: the periods, timestamps and coalescing windows of the replayed run are
+    those of the recorded one, however fast it goes.
+    """
+    def __init__(self, trace: "Path of a trace file, or a Trace" = None, auto_start=False,
+                 clock: "VirtualClock following the trace, one starting with the recording by default" = None):
+        '''Create an instance of the ReplayExemplar class, without calling docker'''
+        self.trace = trace if isinstance(trace, Trace) else Trace(trace)
+        self.clock = clock if clock else VirtualClock(epoch=self.trace.started)
+        self.base_endpoint = f"replay://{self.trace.path}"
+        self.time_to_ready = 0.0
+        self.image_id = None
+        self.exemplar_container = _ReplayContainer()
+        logging.info(f"replaying {len(self.trace.samples)} samples of {self.trace.path}")
+
+    def create_transport(self, metrics=None):
+        '''The transport of a Strategy made for this exemplar, see Strategy.__init__'''
+        return ReplayTransport(self.trace, self.base_endpoint, self.clock)
+
+    def start_run(self, wait=False, timeout=60):
+        pass
+
+    def wait_until_ready(self, *args, **kwargs):
+        return self.time_to_ready
+
+
+def replay(strategy, with_validation=True,
+           batched: "Monitor the samples batch by batch as they were recorded, instead of one by one" = False):
+    '''
+    Runs the MAPE-K loop of a strategy made for a ReplayExemplar back to back over the whole trace, returns the
+    LoopStats. The adaptations the strategy executed are in strategy.transport.executed, and where they differ from
+    the recorded ones in strategy.transport.divergences().
+    '''
+    loop = MAPEKLoop(strategy, period=0, with_validation=with_validation, batched=batched)
+    try:
+        loop.run()
+    except TraceExhausted:
+        pass
+    return loop.stats
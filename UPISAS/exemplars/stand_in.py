@@ -0,0 +1,423 @@
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from UPISAS.exemplar import Exemplar, allocate_host_ports
+from UPISAS.clock import system_clock
+
+
+class StandInModel(ABC):
+    """
+    The managed system behind a StandInExemplar: answers the monitor and execute endpoints of openapi.yaml and
+    provides the four schemas/options documents. Calls are serialized by the container, models need no locking.
+    """
+    monitor_schema = {"type": "object"}
+    execute_schema = {"type": "object"}
+    adaptation_options = {}
+    adaptation_options_schema = {"type": "object"}
+
+    @abstractmethod
+    def monitor(self):
+        pass
+
+    @abstractmethod
+    def execute(self, adaptation):
+        pass
+
+    @abstractmethod
+    def reset(self):
+        '''Back to the initial state, as after a restart of the container'''
+        pass
+
+
+class DemoModel(StandInModel):
+    """
+    Port of demo-managed-system/app.js: monitors f(x,y) = 0.4 - (0.3*(1-x)*x + y*(2-y)*0.3 + x*y/100),
+    multiplied by a uniform random factor unless randomness is disabled.
+    """
+    monitor_schema = {"type": "object", "properties": {"f": {"type": "number"}}}
+    execute_schema = {"type": "object", "properties": {"x": {"type": "number"}, "y": {"type": "number"}}}
+    adaptation_options = {"x": {"start": -4.0, "stop": 6.0, "type": "continuous"},
+                          "y": {"start": -10.0, "stop": 10.0, "type": "continuous"}}
+    adaptation_options_schema = {"type": "object", "properties": {
+        option: {"type": "object", "properties": {"start": {"type": "number"}, "stop": {"type": "number"},
+                                                  "type": {"type": "string"}}}
+        for option in ("x", "y")}}
+
+    def __init__(self, randomness=True, seed=None):
+        self.randomness = randomness
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.random = random.Random(self.seed)
+
+    def f(self, x, y):
+        return 0.4 + -1 * (0.3 * (1 - x) * x + y * (2 - y) * 0.3 + x * y / 100)
+
+    def monitor(self):
+        rnd = self.random.random() if self.randomness else 1
+        return {"f": rnd * self.f(self.x, self.y)}
+
+    def execute(self, adaptation):
+        # like app.js, a missing (or zero) value keeps the current one
+        self.x = adaptation.get("x") or self.x
+        self.y = adaptation.get("y") or self.y
+
+
+class SWIMModel(StandInModel):
+    """
+    A synthetic, SWIM-shaped web server cluster: the monitored data has the keys and types of egalberts/swim:http
+    and responds plausibly to adaptations, but is not the SWIM simulation. Every monitor call advances the model by
+    tick_seconds: the arrival rate follows a noisy sine wave, added servers only become active after boot_ticks,
+    and response times follow a per-server M/M/1 approximation, with a backlog building up under overload.
+    """
+    BASIC_SERVICE_TIME = 0.02
+    OPT_SERVICE_TIME = 0.04452713
+
+    monitor_schema = {"type": "object", "properties": {
+        "dimmer_factor": {"type": "number"},
+        "servers": {"type": "integer"},
+        "active_servers": {"type": "integer"},
+        "max_servers": {"type": "integer"},
+        "utilization": {"type": "array", "items": {"type": "object",
+                                                   "properties": {"utilization_value": {"type": "number"}}}},
+        "basic_rt": {"type": "number"},
+        "opt_rt": {"type": "number"},
+        "basic_throughput": {"type": "number"},
+        "opt_throughput": {"type": "number"},
+        "arrival_rate": {"type": "number"}}}
+    execute_schema = {"type": "object", "properties": {"server_number": {"type": "integer"},
+                                                        "dimmer_factor": {"type": "number"}},
+                      "required": ["server_number", "dimmer_factor"]}
+    adaptation_options_schema = {"type": "object", "properties": {
+        option: {"type": "object", "properties": {"start": {"type": "number"}, "stop": {"type": "number"},
+                                                  "type": {"type": "string"}}}
+        for option in ("server_number", "dimmer_factor")}}
+
+    def __init__(self, max_servers=3, boot_ticks=2, tick_seconds=1.0,
+                 arrival_rate: "Mean requests per second" = 30.0,
+                 amplitude: "Relative amplitude of the arrival rate wave" = 0.5,
+                 wave_ticks: "Period of the arrival rate wave, in ticks" = 120,
+                 noise: "Relative standard deviation of the arrival rate" = 0.05, seed=None):
+        self.max_servers = max_servers
+        self.boot_ticks = boot_ticks
+        self.tick_seconds = tick_seconds
+        self.mean_arrival_rate = arrival_rate
+        self.amplitude = amplitude
+        self.wave_ticks = wave_ticks
+        self.noise = noise
+        self.seed = seed
+        self.adaptation_options = {"server_number": {"start": 1, "stop": max_servers, "type": "discrete"},
+                                   "dimmer_factor": {"start": 0.0, "stop": 1.0, "type": "continuous"}}
+        self.reset()
+
+    def reset(self):
+        self.random = random.Random(self.seed)
+        self.tick = 0
+        self.servers = 1
+        self.active_servers = 1
+        self.booting = []
+        self.dimmer_factor = 1.0
+        self.backlog = 0.0
+
+    def monitor(self):
+        self.tick += 1
+        while self.booting and self.booting[0] <= self.tick:
+            self.booting.pop(0)
+            self.active_servers += 1
+
+        wave = 1 + self.amplitude * math.sin(2 * math.pi * self.tick / self.wave_ticks)
+        arrival_rate = max(0.0, self.mean_arrival_rate * wave * (1 + self.random.gauss(0, self.noise)))
+        service_time = (1 - self.dimmer_factor) * self.BASIC_SERVICE_TIME + self.dimmer_factor * self.OPT_SERVICE_TIME
+        capacity = self.active_servers / service_time
+        utilization = min(1.0, (arrival_rate + self.backlog / self.tick_seconds) / capacity)
+
+        self.backlog = max(0.0, self.backlog + (arrival_rate - capacity) * self.tick_seconds)
+        throughput = min(arrival_rate, capacity)
+        # queueing delay of the M/M/1 approximation, capped at 100 service times, plus draining the backlog
+        slowdown = 1 / max(1 - utilization, 0.01) + self.backlog / capacity
+        return {"dimmer_factor": self.dimmer_factor,
+                "servers": self.servers,
+                "active_servers": self.active_servers,
+                "max_servers": self.max_servers,
+                "utilization": [{"utilization_value": utilization} for _ in range(self.active_servers)],
+                "basic_rt": self.BASIC_SERVICE_TIME * slowdown,
+                "opt_rt": self.OPT_SERVICE_TIME * slowdown,
+                "basic_throughput": throughput * (1 - self.dimmer_factor),
+                "opt_throughput": throughput * self.dimmer_factor,
+                "arrival_rate": arrival_rate}
+
+    def execute(self, adaptation):
+        self.dimmer_factor = min(1.0, max(0.0, float(adaptation.get("dimmer_factor", self.dimmer_factor))))
+        servers = min(self.max_servers, max(1, int(adaptation.get("server_number", self.servers))))
+        if servers > self.servers:
+            self.booting.extend([self.tick + self.boot_ticks] * (servers - self.servers))
+        elif servers < self.servers:
+            removed = self.servers - servers
+            cancelled = min(removed, len(self.booting))
+            del self.booting[len(self.booting) - cancelled:]
+            self.active_servers -= removed - cancelled
+        self.servers = servers
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately: with Nagle's algorithm, every keep-alive request would wait
+    # for the delayed ACK of the client (~40ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        container = self.server.container
+        container.unpaused.wait()
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        if path == "/monitor_stream" and container.sample_period:
+            return self._stream(container, url)
+        if path in ("/monitor_schema", "/execute_schema", "/adaptation_options", "/adaptation_options_schema"):
+            return self._send(200, getattr(container.model, path[1:]), cacheable=True)
+        with container.lock:
+            model = container.model
+            if path == "":
+                body = "alive"
+            elif path == "/monitor":
+                body = container.samples[-1][2] if container.samples else model.monitor()
+            elif path == "/monitor_batch" and container.sample_period:
+                query = parse_qs(url.query)
+                try:
+                    since = int(query["since"][0]) if "since" in query else 0
+                    limit = int(query["limit"][0]) if "limit" in query else container.BATCH_LIMIT
+                except ValueError:
+                    return self._send(400, "since and limit must be integers")
+                body = container.batch(since, limit)
+            else:
+                return self._send(404, "not found")
+        self._send(200, body)
+
+    def do_PUT(self):
+        container = self.server.container
+        container.unpaused.wait()
+        if urlsplit(self.path).path.rstrip("/") != "/execute":
+            return self._send(404, "not found")
+        try:
+            adaptation = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        except ValueError:
+            adaptation = None
+        if not isinstance(adaptation, dict):
+            return self._send(405, "invalid input")
+        with container.lock:
+            container.model.execute(adaptation)
+            container.log(f"Got value changes: {adaptation}")
+        self._send(200, "ok")
+
+    def _stream(self, container, url):
+        '''Server-Sent Events of the samples after Last-Event-ID (or since), of the new samples by default'''
+        query = parse_qs(url.query)
+        since = self.headers.get("Last-Event-ID") or (query["since"][0] if "since" in query else None)
+        try:
+            since = int(since) if since is not None else container.last_cursor
+        except ValueError:
+            return self._send(400, "since must be an integer")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                with container.new_sample:
+                    container.new_sample.wait_for(
+                        lambda: container.last_cursor != since or not container.serves(self.server),
+                        timeout=container.HEARTBEAT_PERIOD)
+                    if not container.serves(self.server):
+                        return
+                    batch = container.batch(since, container.BATCH_LIMIT)
+                since = batch["cursor"]
+                events = [f"id: {since - len(batch['samples']) + index + 1}\nevent: monitor\n"
+                          f"data: {json.dumps(sample)}\n\n" for index, sample in enumerate(batch["samples"])]
+                # a comment line when there is nothing new, to notice disconnected clients
+                self.wfile.write(("".join(events) if events else ": heartbeat\n\n").encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send(self, status, body, cacheable: "Send an ETag, and 304 Not Modified when the client has it" = False):
+        payload = (body if isinstance(body, str) else json.dumps(body)).encode()
+        etag = f'"{hashlib.sha1(payload).hexdigest()}"' if cacheable else None
+        if etag and self.headers.get("If-None-Match") == etag:
+            status, payload = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain" if isinstance(body, str) else "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInContainer:
+    """
+    Stands for the docker container of an exemplar, with the subset of the docker-py Container API that
+    Exemplar, the readiness probes and the ExemplarPool use. The "container" is an HTTP server thread in
+    this process; restarting it resets the model.
+    With a sample_period, the model is monitored at that period of the clock into a bounded buffer, served by
+    /monitor_batch and pushed to the clients of /monitor_stream; /monitor then answers the latest sample instead
+    of monitoring the model itself. No samples are taken while paused.
+    """
+    BATCH_LIMIT = 1000
+    HEARTBEAT_PERIOD = 1.0
+
+    def __init__(self, model, host, port, sample_period=None, buffer_size=10000, clock=None):
+        self.model = model
+        self.host = host
+        self.port = port
+        self.sample_period = sample_period
+        self.clock = clock if clock else system_clock
+        self.samples = deque(maxlen=buffer_size)
+        self.last_cursor = 0
+        self.status = "created"
+        self.attrs = {"State": {}}
+        self.lock = threading.Lock()
+        self.new_sample = threading.Condition(self.lock)
+        self.unpaused = threading.Event()
+        self.unpaused.set()
+        self._log_lines = []
+        self._server = None
+        self._thread = None
+        self._sampler = None
+        self._stopped = threading.Event()
+
+    def log(self, line):
+        self._log_lines.append(line)
+
+    def logs(self):
+        return "\n".join(self._log_lines).encode()
+
+    def reload(self):
+        pass
+
+    def batch(self, since, limit):
+        '''The /monitor_batch answer: the samples after cursor since, oldest first'''
+        if since > self.last_cursor:
+            # a cursor from before a restart
+            since = 0
+        samples = [sample for sample in self.samples if sample[0] > since][:limit]
+        oldest = self.samples[0][0] if self.samples else self.last_cursor + 1
+        return {"cursor": samples[-1][0] if samples else max(since, oldest - 1),
+                "more": bool(samples) and samples[-1][0] < self.last_cursor,
+                "dropped": max(0, oldest - since - 1),
+                "samples": [{"timestamp": timestamp, "data": data} for _, timestamp, data in samples]}
+
+    def sample(self):
+        '''Monitors the model into the buffer of /monitor_batch and /monitor_stream'''
+        with self.new_sample:
+            self.last_cursor += 1
+            self.samples.append((self.last_cursor, self.clock.time(), self.model.monitor()))
+            self.new_sample.notify_all()
+
+    def serves(self, server):
+        '''Whether server is still the running server of this container, i.e. it was neither stopped nor restarted'''
+        return self._server is server and not self._stopped.is_set()
+
+    def _sample_unless_paused(self):
+        if self.unpaused.is_set():
+            self.sample()
+
+    def start(self):
+        if self._server:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), _StandInHandler)
+        self._server.container = self
+        # a short poll interval keeps stop() (and thus recycling) fast
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.01},
+                                        name=f"stand-in-{self.port}", daemon=True)
+        self._thread.start()
+        self._stopped.clear()
+        if self.sample_period:
+            self._sampler = self.clock.every(self.sample_period, self._sample_unless_paused)
+        self.status = "running"
+        self.log(f"stand-in exemplar running on http://{self.host}:{self.port}")
+
+    def stop(self):
+        self._stopped.set()
+        self.unpaused.set()
+        with self.new_sample:
+            # ends the streams
+            self.new_sample.notify_all()
+        if self._sampler:
+            self._sampler.cancel()
+            self._sampler = None
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+        self.status = "exited"
+
+    def restart(self):
+        self.stop()
+        with self.lock:
+            self.model.reset()
+            self.samples.clear()
+            self.last_cursor = 0
+        self.start()
+
+    def pause(self):
+        self.unpaused.clear()
+        self.status = "paused"
+
+    def unpause(self):
+        self.unpaused.set()
+        self.status = "running"
+
+    def remove(self):
+        if self._server:
+            self.stop()
+        self.status = "removed"
+
+
+class StandInExemplar(Exemplar):
+    """
+    An exemplar served from this process instead of a docker container: no image, no container startup,
+    a free local port per instance. Runs DemoModel (the demo managed system) by default, or e.g. SWIMModel().
+    With a sample_period, the model is sampled in the background and /monitor_batch is served; with a
+    clock.VirtualClock as clock, the background samples are taken as the strategies sharing that clock move its time.
+    """
+    def __init__(self, model: "StandInModel serving the endpoints, DemoModel() by default" = None,
+                 auto_start: "Whether to immediately start the server after creation" =False,
+                 host="127.0.0.1",
+                 sample_period: "Seconds between two background samples of the model, None to only sample on /monitor" = None,
+                 buffer_size: "Number of background samples kept for /monitor_batch" = 10000,
+                 clock: "Clock of the background samples, and of the strategies made for this exemplar" = None):
+        '''Create an instance of the StandInExemplar class, without calling docker'''
+        self.model = model if model else DemoModel()
+        self.host_ports = allocate_host_ports([3000])
+        self.base_endpoint = f"http://{host}:{self.host_ports[3000]}"
+        self.time_to_ready = None
+        self.image_id = None
+        self.clock = clock if clock else system_clock
+        self.exemplar_container = StandInContainer(self.model, host, self.host_ports[3000], sample_period, buffer_size,
+                                                   self.clock)
+        logging.info(f"stand-in exemplar at {self.base_endpoint}")
+        if auto_start:
+            self.start_container()
+
+    def start_run(self, wait: "Whether to block until the HTTP server answers" =False, timeout=60):
+        '''The app is already served once the container is started; only makes sure of that'''
+        if self.get_container_status() != "running":
+            self.start_container()
+        if wait:
+            return self.wait_until_ready(timeout=timeout)
@@ -1,5 +1,5 @@
 import pprint, time
-from UPISAS.exemplar import Exemplar
+from UPISAS.exemplar import Exemplar, allocate_host_ports, unique_container_name
 import logging
 pp = pprint.PrettyPrinter(indent=4)
 logging.getLogger().setLevel(logging.INFO)
@@ -10,15 +10,22 @@ class SWIM(Exemplar):
     A class which encapsulates a self-adaptive exemplar run in a docker container.
     """
     _container_name = ""
-    def __init__(self, auto_start: "Whether to immediately start the container after creation" =False, container_name = "swim"
+    def __init__(self, auto_start: "Whether to immediately start the container after creation" =False, container_name = "swim",
+                 dynamic_ports: "Allocate free host ports and a unique container name, to run several instances side by side" =False
                  ):
         '''Create an instance of the SWIM exemplar'''
+        self.host_ports = {5901: 5901, 6901: 6901, 3000: 3000, 4242: 4242}
+        if dynamic_ports:
+            self.host_ports = allocate_host_ports(self.host_ports.keys())
+            container_name = unique_container_name(container_name)
         swim_docker_kwargs = {
             "name":  container_name,
             "image": "egalberts/swim:http",
-            "ports" : {5901: 5901, 6901: 6901, 3000: 3000, 4242: 4242}}
+            "ports" : self.host_ports}
 
-        super().__init__("http://localhost:3000", swim_docker_kwargs, auto_start)
+        super().__init__(f"http://localhost:{self.host_ports[3000]}", swim_docker_kwargs, auto_start)
     
-    def start_run(self):
-        self.exemplar_container.exec_run(cmd = ' sh -c "cd ~/seams-swim/swim_HTTP/simulations/swim/ && ./run.sh sim 1" ', detach=True)
\ No newline at end of file
+    def start_run(self, wait: "Whether to block until the HTTP server of the simulation answers" =False, timeout=60):
+        self.exemplar_container.exec_run(cmd = ' sh -c "cd ~/seams-swim/swim_HTTP/simulations/swim/ && ./run.sh sim 1" ', detach=True)
+        if wait:
+            return self.wait_until_ready(timeout=timeout)
\ No newline at end of file
@@ -15,6 +15,12 @@ import statistics
 
 from UPISAS.strategies.swim_reactive_strategy import ReactiveAdaptationManager
 from UPISAS.exemplars.swim import SWIM
+from UPISAS.utility import swim_utility
+from UPISAS.loop import MAPEKLoop
+from UPISAS.readiness import ContainerProbe
+from UPISAS.exemplar_pool import ExemplarPool
+from UPISAS.images import prepull
+from UPISAS.events import events
 
 
 
@@ -37,6 +43,7 @@ class RunnerConfig:
     This can be essential to accommodate for cooldown periods on some systems."""
     time_between_runs_in_ms:    int             = 1000
 
+    exemplar_pool = None
     exemplar = None
     strategy = None
     # Dynamic configurations can be one-time satisfied here before the program takes the config as-is
@@ -74,15 +81,15 @@ class RunnerConfig:
     def before_experiment(self) -> None:
         """Perform any activity required before starting the experiment here
         Invoked only once during the lifetime of the program."""
-
+        prepull(["egalberts/swim:http"])
+        self.exemplar_pool = ExemplarPool(lambda: SWIM(auto_start=True), size=1, ready_probe=ContainerProbe())
         output.console_log("Config.before_experiment() called!")
 
     def before_run(self) -> None:
         """Perform any activity required before starting a run.
         No context is available here as the run is not yet active (BEFORE RUN)"""
-        self.exemplar = SWIM(auto_start=True)
+        self.exemplar = self.exemplar_pool.acquire()
         self.strategy = ReactiveAdaptationManager(self.exemplar)
-        time.sleep(3)
         output.console_log("Config.before_run() called!")
 
     def start_run(self, context: RunnerContext) -> None:
@@ -91,8 +98,7 @@ class RunnerConfig:
         Activities after starting the run should also be performed here."""
         self.strategy.RT_THRESHOLD = float(context.run_variation['rt_threshold'])
 
-        self.exemplar.start_run()
-        time.sleep(3)
+        self.exemplar.start_run(wait=True)
         output.console_log("Config.start_run() called!")
 
     def start_measurement(self, context: RunnerContext) -> None:
@@ -101,23 +107,10 @@ class RunnerConfig:
 
     def interact(self, context: RunnerContext) -> None:
         """Perform any interaction with the running target system here, or block here until the target finishes."""
-        time_slept = 0
-        self.strategy.get_monitor_schema()
-        self.strategy.get_adaptation_options_schema()
-        self.strategy.get_execute_schema()
-
-        
-
-        while time_slept < 10:
-            
-            self.strategy.monitor(verbose=True)
-            if self.strategy.analyze():
-                if self.strategy.plan():
-                    self.strategy.execute()
-
-            time.sleep(3)
-            time_slept+=3
+        self.strategy.bootstrap()
 
+        stats = MAPEKLoop(self.strategy, period=3, verbose=True).run(iterations=4)
+        output.console_log(f"MAPE-K loop: {stats}")
 
         output.console_log("Config.interact() called!")
 
@@ -129,7 +122,7 @@ class RunnerConfig:
     def stop_run(self, context: RunnerContext) -> None:
         """Perform any activity here required for stopping the run.
         Activities after stopping the run should also be performed here."""
-        self.exemplar.stop_container()
+        self.exemplar_pool.release(self.exemplar)
         output.console_log("Config.stop_run() called!")
 
     def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, SupportsStr]]:
@@ -139,43 +132,17 @@ class RunnerConfig:
 
         output.console_log("Config.populate_run_data() called!")
 
-        basicRevenue = 1
-        optRevenue = 1.5
-        serverCost = 10
-        
-        precision = 1e-5
+        # a ColumnarStore: to_dict() gives the JSON-serializable dict of lists, e.g. to save under context.run_dir
         mon_data = self.strategy.knowledge.monitored_data
-        utilities = []
-        print("MON DATA")
-        print(mon_data)
-        for i in range(len(mon_data["max_servers"])):
-
-            maxServers = int(mon_data["max_servers"][i])
-            arrivalRateMean = mon_data["arrival_rate"][i]
-            dimmer = mon_data["dimmer_factor"][i]
-            maxThroughput = maxServers * self.strategy.MAX_SERVICE_RATE
-            avgServers = mon_data["servers"][i]
-            avgResponseTime = (mon_data["basic_rt"][i] * mon_data["basic_throughput"][i] + mon_data["opt_rt"][i] * mon_data["opt_throughput"][i]) / (mon_data["basic_throughput"][i] + mon_data["opt_throughput"][i])
-
-            Ur = (arrivalRateMean * ((1 - dimmer) * basicRevenue + dimmer * optRevenue))
-            Uc = serverCost * (maxServers - avgServers)
-            UrOpt = arrivalRateMean * optRevenue
-            utility = 0
-
-            if(avgResponseTime <= self.strategy.RT_THRESHOLD and Ur >= UrOpt - precision):
-                utility = Ur + Uc
-            else:                
-                if(avgResponseTime <= self.strategy.RT_THRESHOLD):
-                    utility = Ur
-                else:
-                    utility = min(0.0, arrivalRateMean - maxThroughput) * optRevenue
-            utilities.append(utility)
-        
+        events.emit("populate_run_data", keys=len(mon_data), samples=len(mon_data["basic_rt"]))
+        utilities = swim_utility(mon_data, self.strategy.RT_THRESHOLD, self.strategy.MAX_SERVICE_RATE).tolist()
+
         return {"utility" : utilities}
 
     def after_experiment(self) -> None:
         """Perform any activity required after stopping the experiment here
         Invoked only once during the lifetime of the program."""
+        self.exemplar_pool.close()
         output.console_log("Config.after_experiment() called!")
 
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
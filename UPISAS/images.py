@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+from rich.progress import Progress
+
+from UPISAS import show_progress, get_cache_dir
+from UPISAS.exceptions import DockerImageNotFoundOnDockerHub
+
+
+class ImageCache:
+    """
+    Remembers which image id each image name resolved to, so that constructing an exemplar does not query the
+    Docker daemon (or DockerHub) again until the entry is older than `ttl` seconds. Persisted as a JSON file.
+    The id may be stale after a rebuild or re-pull of the tag: Exemplar.image_id is taken from the created container.
+    """
+
+    def __init__(self, path: "JSON file of the cache" = None, ttl: "Seconds an entry stays valid" = 24 * 3600):
+        self.path = path if path else os.path.join(get_cache_dir(), "images.json")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def get(self, image_name):
+        '''The cached image id of image_name, None when missing or expired'''
+        with self._lock:
+            entry = self._load().get(image_name)
+        if entry and time.time() - entry["resolved_at"] < self.ttl:
+            return entry["id"]
+        return None
+
+    def put(self, image_name, image_id):
+        with self._lock:
+            self._load()[image_name] = {"id": image_id, "resolved_at": time.time()}
+            self._save()
+
+    def invalidate(self, image_name):
+        with self._lock:
+            if self._load().pop(image_name, None):
+                self._save()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"cannot write the image cache {self.path}: {e}")
+
+
+image_cache = ImageCache()
+
+
+def pull_image(docker_client, image_name, progress=None):
+    '''Pulls an image, showing its progress with its own tasks (on the given rich Progress, if any)'''
+    if progress is None:
+        with Progress() as progress:
+            return pull_image(docker_client, image_name, progress)
+    tasks = {}
+    try:
+        for line in docker_client.api.pull(image_name, stream=True, decode=True):
+            if "error" in line:
+                logging.error(f"cannot pull image '{image_name}': {line['error']}")
+                raise DockerImageNotFoundOnDockerHub
+            show_progress(line, progress, tasks, image_name)
+    except docker.errors.NotFound:
+        logging.error(f"image '{image_name}' not found on DockerHub, exiting!")
+        raise DockerImageNotFoundOnDockerHub
+
+
+def resolve_image(docker_client, image_name, cache: "ImageCache, the module-level image_cache by default" = None,
+                  progress=None):
+    '''Makes sure an image is available locally, pulling it if needed, and returns its id'''
+    cache = cache if cache else image_cache
+    image_id = cache.get(image_name)
+    if image_id:
+        logging.info(f"image '{image_name}' resolved from cache")
+        return image_id
+    try:
+        image = docker_client.images.get(image_name)
+        logging.info(f"image '{image_name}' found locally")
+    except docker.errors.ImageNotFound:
+        logging.info(f"image '{image_name}' not found locally, pulling it")
+        pull_image(docker_client, image_name, progress)
+        image = docker_client.images.get(image_name)
+    cache.put(image_name, image.id)
+    return image.id
+
+
+def prepull(image_names, max_workers=4, cache=None):
+    '''
+    Resolves (pulling if needed) all the images a run table needs concurrently, e.g. before its first run.
+    Returns a dict from image name to image id.
+    '''
+    image_names = list(dict.fromkeys(image_names))
+    with Progress() as progress, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {image_name: executor.submit(resolve_image, docker.from_env(), image_name, cache, progress)
+                   for image_name in image_names}
+        return {image_name: future.result() for image_name, future in futures.items()}
@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from UPISAS.columnar import ColumnarStore
 
 
 @dataclass
@@ -12,3 +14,41 @@ class Knowledge:
     monitor_schema: dict
     execute_schema: dict
     adaptation_options_schema: dict
+
+    # Aggregators by name, fed with the values of their key as they are monitored
+    aggregates: dict = field(default_factory=dict)
+
+    def bind(self, name, key, aggregator):
+        '''
+        Binds an Aggregator to a monitored key under `name`, e.g. bind("mean_f", "f", RunningMean()): it is fed with
+        the history of the key so far, then with each new value. Returns the aggregator.
+        '''
+        aggregator.key = key
+        if key in self.monitored_data:
+            aggregator.extend(self.monitored_data[key])
+        self.aggregates[name] = aggregator
+        return aggregator
+
+    def add_monitored_data(self, fresh_data, timestamp=None):
+        '''Appends a freshly monitored sample to the history of each of its keys'''
+        for aggregator in self.aggregates.values():
+            if aggregator.key in fresh_data:
+                aggregator.update(fresh_data[aggregator.key])
+        if isinstance(self.monitored_data, ColumnarStore):
+            self.monitored_data.append(fresh_data, self.monitor_schema, timestamp)
+            return
+        for key in list(fresh_data.keys()):
+            if key not in self.monitored_data:
+                self.monitored_data[key] = []
+            self.monitored_data[key].append(fresh_data[key])
+
+    def add_monitored_samples(self, samples, timestamps=None):
+        '''Appends several samples, oldest first, e.g. a batch fetched with Strategy.monitor_batch'''
+        if isinstance(self.monitored_data, ColumnarStore):
+            samples = list(samples)
+            for aggregator in self.aggregates.values():
+                aggregator.extend([sample[aggregator.key] for sample in samples if aggregator.key in sample])
+            self.monitored_data.extend(samples, self.monitor_schema, timestamps)
+            return
+        for sample in samples:
+            self.add_monitored_data(sample)
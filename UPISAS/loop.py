@@ -0,0 +1,208 @@
+import logging
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from UPISAS.clock import system_clock
+
+SKIP = "skip"
+CATCH_UP = "catch_up"
+
+
+class LoopStats:
+    """
+    What happened while a MAPEKLoop ran. Jitter is how late an iteration started with respect to its scheduled
+    tick, the last `history` jitters and iteration durations are kept.
+    """
+
+    def __init__(self, history=10000):
+        self.iterations = 0
+        self.adaptations = 0
+        self.missed_deadlines = 0
+        self.skipped_ticks = 0
+        self.jitters = deque(maxlen=history)
+        self.durations = deque(maxlen=history)
+        self.max_jitter = 0.0
+
+    def record(self, jitter, duration, adapted):
+        self.iterations += 1
+        self.adaptations += adapted
+        self.jitters.append(jitter)
+        self.durations.append(duration)
+        self.max_jitter = max(self.max_jitter, jitter)
+
+    @property
+    def mean_jitter(self):
+        return sum(self.jitters) / len(self.jitters) if self.jitters else 0.0
+
+    def __repr__(self):
+        return (f"LoopStats(iterations={self.iterations}, adaptations={self.adaptations}, "
+                f"missed_deadlines={self.missed_deadlines}, skipped_ticks={self.skipped_ticks}, "
+                f"mean_jitter={self.mean_jitter:.6f}, max_jitter={self.max_jitter:.6f})")
+
+
+class MAPEKLoop:
+    """
+    Runs monitor -> analyze -> plan -> execute of a Strategy at a fixed period, scheduled on the monotonic clock
+    so that the latency of an iteration does not make the loop drift. The clock is the one of the strategy, if it
+    has one: with a clock.VirtualClock the loop never waits, the time jumps to the next tick instead.
+    When an iteration overruns its period, the loop either skips the ticks it missed (SKIP) or runs the late
+    iterations back to back until it is on schedule again (CATCH_UP).
+
+    With pipelined=True, the HTTP request of the next monitor is sent by a background worker while the current
+    analyze/plan run, so an iteration costs about max(I/O, compute) instead of their sum; the price is that the
+    data an iteration analyzes was fetched during the previous one. With a period, there is time to spare between
+    the iterations: the request is rather sent just before the next tick, ahead by the latency of the previous
+    fetches, so that the data is fresh and the iteration starts with it already fetched.
+    With async_execute=True, execute PUTs are sent by another background worker, one at a time and in the order
+    they were planned; an execute failure is raised by a later iteration or at the end of run().
+    With batched=True, each iteration monitors all the samples produced since the previous one (see
+    Strategy.monitor_batch) instead of a single snapshot, and the iterations without any new sample stop there.
+    """
+
+    def __init__(self, strategy, period: "Seconds between the scheduled starts of two iterations",
+                 overrun: "SKIP or CATCH_UP" = SKIP, with_validation=True, verbose=False,
+                 pipelined: "Prefetch the next monitor while analyze/plan run" = False,
+                 async_execute: "Dispatch execute PUTs to an ordered background worker" = False,
+                 batched: "Monitor every sample produced since the previous iteration" = False,
+                 clock: "Clock scheduling the iterations, the one of the strategy by default" = None):
+        if period < 0:
+            raise ValueError("period must be non-negative")
+        if overrun not in (SKIP, CATCH_UP):
+            raise ValueError(f"unknown overrun policy '{overrun}', use '{SKIP}' or '{CATCH_UP}'")
+        if pipelined and batched:
+            raise ValueError("a loop is either pipelined or batched")
+        self.strategy = strategy
+        self.period = period
+        self.overrun = overrun
+        self.with_validation = with_validation
+        self.verbose = verbose
+        self.pipelined = pipelined
+        self.async_execute = async_execute
+        self.batched = batched
+        self.clock = clock if clock else getattr(strategy, "clock", system_clock)
+        self.stats = LoopStats()
+        # started on first use, shut down by close()
+        self._monitor_worker = None
+        self._execute_worker = None
+        self._prefetched = None
+        # mean seconds of a fetch_monitored_data, to send the prefetch of a periodic loop ahead of its tick
+        self._fetch_latency = 0.0
+        self._executions = deque()
+
+    def run_iteration(self):
+        '''Runs one monitor -> analyze -> plan -> execute iteration, returning whether an adaptation was executed'''
+        if self.batched:
+            if not self.strategy.monitor_batch(with_validation=self.with_validation, verbose=self.verbose):
+                # nothing new to analyze
+                return False
+        else:
+            fresh_data = self._next_monitored_data() if self.pipelined else None
+            self.strategy.monitor(with_validation=self.with_validation, verbose=self.verbose, fresh_data=fresh_data)
+        if self.strategy.analyze():
+            if self.strategy.plan():
+                self._execute()
+                return True
+        return False
+
+    def close(self):
+        '''
+        Waits for the pending executions, sends the adaptation held back by the coalescing window of the strategy, if
+        any, and drops the prefetched monitor (waiting for it if it was already sent). The first failure of the pending
+        executions is raised afterwards. The background workers are shut down, a later run() starts new ones.
+        '''
+        if self._prefetched:
+            self._prefetched.cancel()
+            self._prefetched = None
+        try:
+            while self._executions:
+                self._executions.popleft().result()
+        finally:
+            self._executions.clear()
+            for worker in (self._monitor_worker, self._execute_worker):
+                if worker:
+                    worker.shutdown(wait=True)
+            self._monitor_worker = self._execute_worker = None
+            # even when a pending execution failed, the adaptation held back is not lost
+            flush_execute = getattr(self.strategy, "flush_execute", None)
+            if flush_execute:
+                flush_execute()
+
+    def _next_monitored_data(self):
+        future = self._prefetched or self._prefetch()
+        self._prefetched = None
+        try:
+            fresh_data = future.result()
+        finally:
+            if not self.period:
+                self._prefetched = self._prefetch()
+        return fresh_data
+
+    def _prefetch(self):
+        if self._monitor_worker is None:
+            self._monitor_worker = ThreadPoolExecutor(max_workers=1)
+        return self._monitor_worker.submit(self._timed_fetch)
+
+    def _timed_fetch(self):
+        started = self.clock.monotonic()
+        try:
+            return self.strategy.fetch_monitored_data()
+        finally:
+            latency = self.clock.monotonic() - started
+            self._fetch_latency = 0.8 * self._fetch_latency + 0.2 * latency if self._fetch_latency else latency
+
+    def _execute(self):
+        if not self.async_execute:
+            self.strategy.execute(with_validation=self.with_validation)
+            return
+        while self._executions and self._executions[0].done():
+            self._executions.popleft().result()
+        # plans are often updated in place, the worker gets a snapshot
+        adaptation = dict(self.strategy.knowledge.plan_data)
+        if self._execute_worker is None:
+            self._execute_worker = ThreadPoolExecutor(max_workers=1)
+        self._executions.append(self._execute_worker.submit(self.strategy.execute, adaptation,
+                                                            with_validation=self.with_validation))
+
+    def run(self, iterations: "Number of iterations to run" = None,
+            duration: "Seconds after which no more iterations are started" = None):
+        '''Runs the loop until the given number of iterations or duration (forever if neither), returns the LoopStats'''
+        try:
+            return self._run(iterations, duration)
+        finally:
+            self.close()
+
+    def _run(self, iterations, duration):
+        clock = self.clock
+        start = clock.monotonic()
+        tick = 0
+        iteration = 0
+        while (iterations is None or iteration < iterations) and (duration is None or self._elapsed(start, tick) < duration):
+            scheduled = start + tick * self.period if self.period else clock.monotonic()
+            if self.pipelined and self.period and self._prefetched is None:
+                lead = scheduled - self._fetch_latency - clock.monotonic()
+                if lead > 0:
+                    clock.sleep(lead)
+                self._prefetched = self._prefetch()
+            delay = scheduled - clock.monotonic()
+            if delay > 0:
+                clock.sleep(delay)
+            started = clock.monotonic()
+            adapted = self.run_iteration()
+            ended = clock.monotonic()
+            self.stats.record(started - scheduled, ended - started, adapted)
+            iteration += 1
+            tick += 1
+            deadline = start + tick * self.period
+            if ended > deadline and self.period > 0:
+                self.stats.missed_deadlines += 1
+                logging.warning(f"MAPE-K iteration overran its period by {ended - deadline:.3f}s")
+                if self.overrun == SKIP:
+                    missed = math.ceil((ended - deadline) / self.period)
+                    self.stats.skipped_ticks += missed
+                    tick += missed
+        return self.stats
+
+    def _elapsed(self, start, tick):
+        # the scheduled start of the next iteration, or the actual time when running back to back
+        return tick * self.period if self.period else self.clock.monotonic() - start
@@ -0,0 +1,125 @@
+import bisect
+import csv
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# 1us .. ~100s, 4 buckets per decade
+TIME_BUCKETS = tuple(10 ** (exponent / 4) for exponent in range(-24, 9))
+# 64B .. 16MiB, powers of 4
+SIZE_BUCKETS = tuple(4 ** exponent for exponent in range(3, 13))
+
+CSV_COLUMNS = ["metric", "count", "sum", "min", "max", "mean", "p50", "p90", "p99"]
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram: recording a value is a bisection and a few additions, whatever the number of values.
+    Quantiles are estimated as the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                bound = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """
+    Histograms of what a Strategy spends its time on, by name: the wall and CPU seconds of each MAPE-K phase
+    (<phase>_wall_seconds, <phase>_cpu_seconds), HTTP round trips and payload sizes, validation time.
+    Exported with to_csv() and to_prometheus(). Recording can be switched off with enabled=False.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, buckets=TIME_BUCKETS):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def phase(self, name):
+        '''Records the wall and CPU time of the enclosed block as <name>_wall_seconds and <name>_cpu_seconds'''
+        if not self.enabled:
+            yield
+            return
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            self.observe(f"{name}_cpu_seconds", time.thread_time() - cpu_started)
+            self.observe(f"{name}_wall_seconds", time.perf_counter() - wall_started)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def summary(self):
+        '''One dict of statistics per metric, with the CSV_COLUMNS as keys'''
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+        return [{"metric": name, "count": histogram.count, "sum": histogram.sum,
+                 "min": histogram.min, "max": histogram.max, "mean": histogram.mean,
+                 "p50": histogram.quantile(0.5), "p90": histogram.quantile(0.9), "p99": histogram.quantile(0.99)}
+                for name, histogram in histograms if histogram.count]
+
+    def to_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.summary())
+
+    def to_prometheus(self, prefix="upisas_"):
+        '''The histograms in the Prometheus text exposition format'''
+        lines = []
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+        for name, histogram in histograms:
+            metric = prefix + name
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.sum:.9g}")
+            lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
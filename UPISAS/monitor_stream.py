@@ -0,0 +1,208 @@
+import http.client
+import json
+import logging
+import queue
+import socket
+import threading
+
+from urllib3.exceptions import HTTPError
+
+from UPISAS.exceptions import ServerNotReachable
+
+# what makes the subscription reconnect rather than stop
+_BROKEN_STREAM = (OSError, http.client.HTTPException, HTTPError, ServerNotReachable)
+# seconds close() waits for a subscription thread still connecting, which has no socket to shut down yet and stops
+# by itself once connected
+CONNECTING_JOIN_TIMEOUT = 1.0
+
+
+def adapt(strategy):
+    '''An on_arrival reacting to every sample: analyze, then plan and execute if needed'''
+    if strategy.analyze():
+        if strategy.plan():
+            strategy.execute()
+
+
+def read_lines(raw):
+    '''The lines of a streamed response body (response.raw) as soon as they arrive, without their line break'''
+    read = raw.read1 if hasattr(raw, "read1") else lambda size: raw.read(1)
+    pending = b""
+    while True:
+        chunk = read(65536)
+        if not chunk:
+            return
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield line.decode().rstrip("\r")
+
+
+def parse_events(lines):
+    '''The (id, decoded JSON data) of the Server-Sent Events in lines, the id is None when the event has none'''
+    event_id, data = None, []
+    for line in lines:
+        if line:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "id":
+                event_id = int(value)
+            elif field == "data":
+                data.append(value)
+            continue
+        if data:
+            yield event_id, json.loads("\n".join(data))
+        event_id, data = None, []
+
+
+def _socket_of(response):
+    # the socket a streamed response reads from, to interrupt a blocking read from another thread
+    try:
+        return response.raw._fp.fp.raw._sock
+    except AttributeError:
+        return None
+
+
+class MonitorStream:
+    """
+    A subscription to the /monitor_stream Server-Sent Events of an exemplar (see openapi.yaml), read by a
+    background thread which reconnects from the last event it got when the stream breaks. The stream is opened
+    through the Transport of the strategy (Transport.stream), with its session, metrics and, when recording, its
+    trace.
+
+    By default the samples wait in a queue until drain() appends them to the Knowledge, in the thread of the
+    strategy. With on_arrival, the subscription thread ingests each sample as soon as it arrives and then calls
+    on_arrival(strategy), e.g. adapt: the strategy must then not be used from another thread meanwhile.
+    Exemplars without the endpoint answer 404: the subscription stops and `supported` becomes False.
+    Any other failure, e.g. of validation or of on_arrival, stops the subscription and is raised by the next
+    drain() or close().
+    """
+
+    def __init__(self, strategy, endpoint_suffix="monitor_stream", with_validation=True,
+                 on_arrival: "Called as on_arrival(strategy) in the subscription thread after each sample" = None,
+                 reconnect_delay: "Seconds before reconnecting a broken stream" = 1.0,
+                 timeout: "Seconds before giving up connecting, or on a silent stream" = 10.0):
+        self.strategy = strategy
+        self.endpoint_suffix = endpoint_suffix
+        self.with_validation = with_validation
+        self.on_arrival = on_arrival
+        self.reconnect_delay = reconnect_delay
+        self.timeout = timeout
+        self.supported = None
+        self.received = 0
+        self.last_event_id = strategy.monitor_cursor
+        self.error = None
+        self._samples = queue.Queue()
+        self._closed = threading.Event()
+        self._response = None
+        self._socket = None
+        self._thread = None
+
+    def start(self):
+        if self.with_validation and not self.strategy.knowledge.monitor_schema:
+            self.strategy.get_monitor_schema()
+        self._thread = threading.Thread(target=self._run, name="monitor-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def drain(self, timeout: "Seconds to wait for a first sample if none is queued, not waiting if None" = None):
+        '''Appends the queued samples to the Knowledge in bulk, returns how many'''
+        self._raise_error()
+        samples = []
+        try:
+            samples.append(self._samples.get(timeout=timeout) if timeout else self._samples.get_nowait())
+            while True:
+                samples.append(self._samples.get_nowait())
+        except queue.Empty:
+            pass
+        if samples:
+            self._ingest(samples)
+        return len(samples)
+
+    def close(self):
+        self._closed.set()
+        sock = self._socket
+        if sock:
+            # wakes the subscription thread up from its blocking read
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(None if sock else CONNECTING_JOIN_TIMEOUT)
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _raise_error(self):
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def _ingest(self, samples):
+        if self.with_validation:
+            for _, _, data in samples:
+                self.strategy._validate(data, self.strategy.knowledge.monitor_schema)
+        with self.strategy.metrics.phase("monitor"):
+            self.strategy.knowledge.add_monitored_samples([data for _, _, data in samples],
+                                                          [timestamp for _, timestamp, _ in samples])
+        if self.strategy.recorder:
+            self.strategy.recorder.batch([data for _, _, data in samples], [timestamp for _, timestamp, _ in samples])
+        self.strategy.monitor_cursor = samples[-1][0]
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                self._subscribe()
+            except _BROKEN_STREAM as e:
+                if self._closed.is_set():
+                    return
+                logging.warning(f"monitor stream broken ({e}), reconnecting in {self.reconnect_delay}s")
+            except Exception as e:
+                # e.g. a validation or on_arrival failure: the subscription stops, the error is kept
+                logging.error(f"monitor stream stopped: {e}")
+                self.error = e
+                return
+            finally:
+                if self._response is not None:
+                    self._response.close()
+                    self._response = None
+                    self._socket = None
+            if self.supported is False:
+                return
+            self._closed.wait(self.reconnect_delay)
+
+    def _subscribe(self):
+        headers = {"Accept": "text/event-stream"}
+        if self.last_event_id is not None:
+            headers["Last-Event-ID"] = str(self.last_event_id)
+        response = self._response = self.strategy.transport.stream(self.endpoint_suffix, headers=headers,
+                                                                   timeout=self.timeout)
+        # close() shuts it down to wake this thread up, unless it came while connecting
+        self._socket = _socket_of(response)
+        if self._closed.is_set():
+            return
+        if response.status_code == 404:
+            logging.error("the exemplar has no monitor stream endpoint, use monitor() or monitor_batch()")
+            self.supported = False
+            return
+        if response.status_code != 200:
+            raise http.client.HTTPException(f"monitor stream answered {response.status_code}")
+        self.supported = True
+        logging.info(f"subscribed to {self.strategy.exemplar.base_endpoint}/{self.endpoint_suffix}")
+        for event_id, event in parse_events(read_lines(response.raw)):
+            self._arrived(event_id, event)
+            if self._closed.is_set():
+                return
+
+    def _arrived(self, event_id, event):
+        self.last_event_id = event_id
+        self.received += 1
+        sample = (event_id, event["timestamp"], event["data"])
+        if self.on_arrival is None:
+            self._samples.put(sample)
+            return
+        self._ingest([sample])
+        self.on_arrival(self.strategy)
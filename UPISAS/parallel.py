@@ -0,0 +1,66 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from UPISAS.exemplar_pool import ExemplarPool, REPLACE
+
+
+class ParallelRunExecutor:
+    """
+    Spreads the variations of a run table across `workers` exemplar/strategy pairs running concurrently.
+    Exemplars come from an ExemplarPool, so the factory must give each of them its own container name and host
+    ports, e.g. lambda: SWIM(auto_start=True, dynamic_ports=True).
+    """
+
+    def __init__(self, exemplar_factory: "Callable returning a new exemplar",
+                 strategy_factory: "Callable returning a strategy for a given exemplar, e.g. a Strategy subclass",
+                 run: "Callable run(strategy, variation) performing one run and returning its results",
+                 workers: "Number of runs in parallel" = 2, recycle=REPLACE,
+                 ready_probe: "Probe an exemplar must pass before a run starts on it, if any" = None,
+                 ready_timeout=60):
+        self.strategy_factory = strategy_factory
+        self.run = run
+        self.workers = workers
+        self.pool = ExemplarPool(exemplar_factory, size=workers, recycle=recycle,
+                                 ready_probe=ready_probe, ready_timeout=ready_timeout)
+
+    def map(self, variations, return_exceptions: "Return the exception of a failed run in its place" = False):
+        '''
+        Performs a run per variation, returning their results in the order of the variations. A failed run (or a
+        failed provisioning of its exemplar) raises once all the runs are over, unless return_exceptions is set.
+        '''
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._run_variation, variation) for variation in variations]
+        results = []
+        for variation, future in zip(variations, futures):
+            error = future.exception()
+            if error is None:
+                results.append(future.result())
+            elif return_exceptions:
+                logging.error(f"run of variation {variation} failed: {error!r}")
+                results.append(error)
+            else:
+                raise error
+        return results
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run_variation(self, variation):
+        exemplar = self.pool.acquire()
+        try:
+            logging.info(f"run of variation {variation} on {exemplar.base_endpoint}")
+            strategy = self.strategy_factory(exemplar)
+            try:
+                return self.run(strategy, variation)
+            finally:
+                transport = getattr(strategy, "transport", None)
+                if transport:
+                    transport.close()
+        finally:
+            self.pool.release(exemplar)
@@ -0,0 +1,166 @@
+import numpy as np
+
+
+class OptionSpace:
+    """
+    The adaptation options of an exemplar (see Strategy.get_adaptation_options) as a unit hypercube, one dimension
+    per option:
+    - {"start": a, "stop": b, "type": "continuous"}: any number between a and b;
+    - {"start": a, "stop": b, "type": "discrete", "step": s}: a, a + s, ... up to b, the step being 1 by default;
+    - {"values": [...]}: one of the listed values.
+    """
+
+    def __init__(self, adaptation_options):
+        if not adaptation_options:
+            raise ValueError("no adaptation options to plan over")
+        self.names = list(adaptation_options)
+        # per option, None when continuous, otherwise the list of its values
+        self.levels = []
+        self.bounds = []
+        for name, option in adaptation_options.items():
+            if "values" in option:
+                if not option["values"]:
+                    raise ValueError(f"adaptation option {name} has no values")
+                self.levels.append(list(option["values"]))
+                self.bounds.append(None)
+                continue
+            if "start" not in option or "stop" not in option:
+                raise ValueError(f"adaptation option {name} needs either values or a start and a stop")
+            start, stop = option["start"], option["stop"]
+            option_type = option.get("type", "continuous")
+            if option_type == "continuous":
+                self.levels.append(None)
+                self.bounds.append((start, stop))
+            elif option_type == "discrete":
+                step = option.get("step", 1)
+                count = int(np.floor((stop - start) / step + 1e-9)) + 1
+                self.levels.append([start + index * step for index in range(count)])
+                self.bounds.append(None)
+            else:
+                raise ValueError(f"adaptation option {name} has an unknown type {option_type}")
+
+    @property
+    def dimensions(self):
+        return len(self.names)
+
+    def snap(self, points):
+        '''Moves the points of the hypercube to the nearest ones matching a configuration'''
+        points = np.clip(points, 0.0, 1.0)
+        for dimension, levels in enumerate(self.levels):
+            if levels is not None:
+                steps = max(len(levels) - 1, 1)
+                points[:, dimension] = np.round(points[:, dimension] * steps) / steps
+        return points
+
+    def decode(self, point):
+        '''The configuration of a point of the hypercube, as sent to the execute endpoint'''
+        configuration = {}
+        for name, value, levels, bounds in zip(self.names, point, self.levels, self.bounds):
+            if levels is None:
+                start, stop = bounds
+                configuration[name] = float(start + value * (stop - start))
+            else:
+                configuration[name] = levels[int(round(value * (len(levels) - 1)))]
+        return configuration
+
+    def encode(self, configuration):
+        '''The point of the hypercube of a configuration'''
+        point = np.empty(self.dimensions)
+        for dimension, (name, levels, bounds) in enumerate(zip(self.names, self.levels, self.bounds)):
+            value = configuration[name]
+            if levels is None:
+                start, stop = bounds
+                point[dimension] = (value - start) / (stop - start) if stop != start else 0.0
+            else:
+                index = levels.index(value) if value in levels \
+                    else int(np.argmin([abs(level - value) for level in levels]))
+                point[dimension] = index / (len(levels) - 1) if len(levels) > 1 else 0.0
+        return point
+
+
+def _squared_distances(a, b):
+    distances = (a ** 2).sum(1)[:, None] + (b ** 2).sum(1)[None, :] - 2 * a @ b.T
+    return np.maximum(distances, 0.0)
+
+
+class SurrogatePlanner:
+    """
+    Picks the next configuration to try from the history of (configuration, observed utility) pairs, to reach a
+    good configuration in few adaptation rounds. A Gaussian process with an RBF kernel (its length scale chosen by
+    marginal likelihood) is fitted to the history, then a batch of candidate configurations, spread over the whole
+    space and around the best ones so far, is scored at once with the upper confidence bound of the utility.
+    The first suggestions are random, to seed the model. Utilities are maximized.
+    """
+    LENGTH_SCALES = (0.05, 0.1, 0.2, 0.4, 0.8)
+
+    def __init__(self, adaptation_options,
+                 initial_points: "Random configurations tried before the surrogate model is used" = 5,
+                 candidates: "Configurations scored per suggestion" = 2048,
+                 exploration: "Weight of the uncertainty in the score, 0 to only exploit the model" = 2.0,
+                 noise: "Variance of the observation noise, relative to the variance of the utilities" = 1e-2,
+                 max_history: "Observations the model is fitted on, the most recent ones" = 200,
+                 seed=None):
+        self.space = OptionSpace(adaptation_options)
+        self.initial_points = initial_points
+        self.candidates = candidates
+        self.exploration = exploration
+        self.noise = noise
+        self.max_history = max_history
+        self.random = np.random.default_rng(seed)
+        self.points = []
+        self.utilities = []
+        self.length_scale = None
+
+    def observe(self, configuration, utility):
+        '''Records the utility observed with a configuration'''
+        self.points.append(self.space.encode(configuration))
+        self.utilities.append(float(utility))
+        if len(self.points) > self.max_history:
+            del self.points[0], self.utilities[0]
+
+    def best(self):
+        '''The (configuration, utility) observed with the highest utility, None before the first observation'''
+        if not self.utilities:
+            return None
+        index = int(np.argmax(self.utilities))
+        return self.space.decode(self.points[index]), self.utilities[index]
+
+    def suggest(self):
+        '''The configuration to try next'''
+        if len(self.points) < self.initial_points:
+            return self.space.decode(self.space.snap(self.random.random((1, self.space.dimensions)))[0])
+        candidates = self._candidates()
+        mean, std = self.predict(candidates)
+        return self.space.decode(candidates[int(np.argmax(mean + self.exploration * std))])
+
+    def predict(self, points: "Points of the option hypercube, one per row"):
+        '''Mean and standard deviation of the utility at each point, according to the model fitted to the history'''
+        points = np.atleast_2d(points)
+        observed = np.array(self.points)
+        utilities = np.array(self.utilities)
+        offset, scale = utilities.mean(), utilities.std() or 1.0
+        targets = (utilities - offset) / scale
+        distances = _squared_distances(observed, observed)
+        fits = [self._fit(distances, targets, length_scale) for length_scale in self.LENGTH_SCALES]
+        likelihood, self.length_scale, cholesky, weights = max(fits, key=lambda fit: fit[0])
+        cross = np.exp(-0.5 * _squared_distances(points, observed) / self.length_scale ** 2)
+        mean = cross @ weights
+        solved = np.linalg.solve(cholesky, cross.T)
+        variance = np.maximum(1.0 - (solved ** 2).sum(0), 1e-12)
+        return offset + scale * mean, scale * np.sqrt(variance)
+
+    def _fit(self, distances, targets, length_scale):
+        covariance = np.exp(-0.5 * distances / length_scale ** 2) + self.noise * np.eye(len(targets))
+        cholesky = np.linalg.cholesky(covariance)
+        weights = np.linalg.solve(cholesky.T, np.linalg.solve(cholesky, targets))
+        likelihood = -0.5 * targets @ weights - np.log(np.diag(cholesky)).sum()
+        return likelihood, length_scale, cholesky, weights
+
+    def _candidates(self):
+        dimensions = self.space.dimensions
+        spread = self.random.random((self.candidates // 2, dimensions))
+        # the other half perturbs the best configurations so far
+        best = np.array(self.points)[np.argsort(self.utilities)[-5:]]
+        around = best[self.random.integers(len(best), size=self.candidates - len(spread))]
+        around = around + self.random.normal(0.0, 0.1, around.shape)
+        return self.space.snap(np.vstack([spread, around]))
@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+import re
+
+import docker
+import requests
+
+
+class Probe(ABC):
+    """
+    Tells whether an exemplar is ready, see Exemplar.wait_until_ready.
+    A probe must return quickly and never raise for a system that is merely not up yet.
+    """
+
+    @abstractmethod
+    def __call__(self, exemplar):
+        pass
+
+
+class HTTPProbe(Probe):
+    """ Ready once a GET on the given path of the exemplar's base_endpoint answers with a status below 400. """
+
+    def __init__(self, path="", timeout: "Seconds before a single probe request is given up" = 1.0):
+        self.path = path
+        self.timeout = timeout
+
+    def __call__(self, exemplar):
+        url = '/'.join([exemplar.base_endpoint, self.path]) if self.path else exemplar.base_endpoint
+        try:
+            return requests.get(url, timeout=self.timeout).status_code < 400
+        except requests.exceptions.RequestException:
+            return False
+
+
+class ContainerProbe(Probe):
+    """
+    Ready once the container is running and, when its image defines a HEALTHCHECK, reported healthy by Docker.
+    """
+
+    def __call__(self, exemplar):
+        if exemplar.get_container_status() != "running":
+            return False
+        health = exemplar.exemplar_container.attrs.get("State", {}).get("Health")
+        return health is None or health.get("Status") == "healthy"
+
+
+class LogLineProbe(Probe):
+    """ Ready once a line of the container logs matches the given regular expression. """
+
+    def __init__(self, pattern):
+        self.pattern = re.compile(pattern)
+
+    def __call__(self, exemplar):
+        if not exemplar.exemplar_container:
+            return False
+        try:
+            logs = exemplar.exemplar_container.logs().decode(errors="replace")
+        except docker.errors.APIError:
+            return False
+        return any(self.pattern.search(line) for line in logs.splitlines())
@@ -0,0 +1,91 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class RetentionPolicy(ABC):
+    """
+    Decides which samples of a Column of the monitored data are kept.
+    Set on a ColumnarStore, either as the default of all keys or per key with set_retention().
+    """
+
+    @abstractmethod
+    def apply(self, column):
+        """ Trims the column after an append, returning the list of (values, timestamps) it evicted. """
+        pass
+
+
+class KeepAll(RetentionPolicy):
+    """ Keeps the whole history, e.g. to exempt a key from the default policy of the store. """
+
+    def apply(self, column):
+        return []
+
+
+class LastN(RetentionPolicy):
+    """ Ring buffer of the last n samples. """
+
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError("LastN needs to keep at least one sample")
+        self.n = n
+
+    def apply(self, column):
+        if len(column) <= self.n:
+            return []
+        return [column.drop_front(len(column) - self.n)]
+
+
+class TimeWindow(RetentionPolicy):
+    """ Keeps the samples at most `seconds` older than the latest one. """
+
+    def __init__(self, seconds):
+        if seconds < 0:
+            raise ValueError("TimeWindow needs a non-negative window")
+        self.seconds = seconds
+
+    def apply(self, column):
+        timestamps = column.timestamps()
+        if not len(timestamps):
+            return []
+        expired = int(np.searchsorted(timestamps, timestamps[-1] - self.seconds, side="left"))
+        if not expired:
+            return []
+        return [column.drop_front(expired)]
+
+
+def _default_aggregate(values):
+    '''Mean of numbers, last value of anything else (booleans, lists...)'''
+    if isinstance(values, np.ndarray) and values.dtype in (np.int64, np.float64):
+        return float(values.mean())
+    return values[-1].item() if isinstance(values, np.ndarray) else values[-1]
+
+
+class Downsample(RetentionPolicy):
+    """
+    Keeps the `recent` last samples as they are and replaces every `factor` older samples by their aggregate,
+    timestamped as the last of them. With max_samples, the oldest aggregates are then dropped to stay in
+    constant memory.
+    """
+
+    def __init__(self, recent, factor, aggregate: "Callable reducing the values of a block to one" = None,
+                 max_samples: "Upper bound on the aggregates plus the recent samples" = None):
+        if recent < 0 or factor < 2:
+            raise ValueError("Downsample needs a non-negative recent and a factor of at least 2")
+        if max_samples is not None and max_samples < recent + 1:
+            raise ValueError("Downsample needs max_samples to fit the recent samples and an aggregate")
+        self.recent = recent
+        self.factor = factor
+        self.aggregate = aggregate if aggregate else _default_aggregate
+        self.max_samples = max_samples
+
+    def apply(self, column):
+        evicted = []
+        while len(column) - column.aggregated >= self.recent + self.factor:
+            index = column.aggregated
+            block = column.values()[index:index + self.factor]
+            timestamp = column.timestamps()[index + self.factor - 1]
+            evicted.append(column.collapse(index, self.factor, self.aggregate(block), timestamp))
+        if self.max_samples is not None and len(column) > self.max_samples:
+            evicted.append(column.drop_front(len(column) - self.max_samples))
+        return evicted
@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from UPISAS import get_cache_dir
+
+
+class SchemaCache:
+    """
+    Remembers the schemas and adaptation options an exemplar served, keyed by the id of its image and the endpoint,
+    so that Strategy.bootstrap() does not fetch them again for every run of the same exemplar.
+    Entries younger than `max_age` seconds are used as they are; older ones are revalidated with their ETag
+    (If-None-Match), which costs a round trip but no transfer. Persisted as a JSON file.
+    """
+
+    def __init__(self, path: "JSON file of the cache" = None,
+                 max_age: "Seconds an entry is used without revalidation" = 24 * 3600):
+        self.path = path if path else os.path.join(get_cache_dir(), "schemas.json")
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def get(self, image_id, endpoint_suffix):
+        '''The cached entry, a dict with the body, its etag and when it was fetched, None when missing'''
+        with self._lock:
+            return self._load().get(self._key(image_id, endpoint_suffix))
+
+    def is_fresh(self, entry):
+        return time.time() - entry["fetched_at"] < self.max_age
+
+    def put(self, image_id, endpoint_suffix, body, etag=None):
+        with self._lock:
+            self._load()[self._key(image_id, endpoint_suffix)] = {"body": body, "etag": etag,
+                                                                  "fetched_at": time.time()}
+            self._save()
+
+    def revalidated(self, image_id, endpoint_suffix):
+        '''Marks an entry as fresh again, after the exemplar answered 304 Not Modified'''
+        with self._lock:
+            entry = self._load().get(self._key(image_id, endpoint_suffix))
+            if entry:
+                entry["fetched_at"] = time.time()
+                self._save()
+
+    def invalidate(self, image_id, endpoint_suffix=None):
+        '''Drops the entry of an endpoint, or all the entries of an image'''
+        with self._lock:
+            entries = self._load()
+            keys = [self._key(image_id, endpoint_suffix)] if endpoint_suffix \
+                else [key for key in entries if key.startswith(f"{image_id} ")]
+            if [entries.pop(key) for key in keys if key in entries]:
+                self._save()
+
+    def _key(self, image_id, endpoint_suffix):
+        return f"{image_id} {endpoint_suffix}"
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"cannot write the schema cache {self.path}: {e}")
+
+
+schema_cache = SchemaCache()
@@ -0,0 +1,211 @@
+import copy
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+
+from UPISAS.columnar import Column
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+@dataclass
+class ShadowDecision:
+    """ What one strategy decided in one iteration of a ShadowEvaluator, and how long its analyze/plan took. """
+    iteration: int
+    name: str
+    analyzed: bool
+    planned: bool
+    plan: dict
+    seconds: float
+    error: str = None
+
+
+def _decide(strategy):
+    '''Runs analyze, then plan if needed, returning (analyzed, planned, seconds), the error is raised'''
+    started = time.perf_counter()
+    analyzed = bool(strategy.analyze())
+    planned = analyzed and bool(strategy.plan())
+    return analyzed, planned, time.perf_counter() - started
+
+
+def _decide_in_worker(strategy):
+    # in a worker process the strategy is a copy: it is sent back with the outcome
+    try:
+        return strategy, _decide(strategy), None
+    except Exception as e:
+        return strategy, None, repr(e)
+
+
+class ShadowEvaluator:
+    """
+    Runs several strategies on a single exemplar: the primary monitors and executes, while the shadows analyze and
+    plan on the same monitored data without ever executing, so that N strategies are compared for the cost of one
+    exemplar. Used in place of the primary strategy, e.g. by a MAPEKLoop.
+
+    The shadows share the monitored data of the primary (their own Knowledge keeps its analysis and plan data);
+    their aggregators (see Knowledge.bind) are fed with the new samples before each analysis. In every iteration
+    the shadows run analyze/plan in a pool while the primary does in the calling thread, then the decision and the
+    compute time of each of them is recorded in `decisions`. A failing shadow is recorded, not raised.
+
+    With executor=PROCESS the shadows run in worker processes, side-stepping the GIL for pure-Python strategies:
+    they are pickled with their Knowledge (monitored history included, see UPISAS.retention) every iteration,
+    without their exemplar, transport, metrics, execute_filter and clock.
+    """
+
+    def __init__(self, primary, shadows: "Dict of strategies by name, or list of strategies named after their class",
+                 executor: "THREAD or PROCESS" = THREAD,
+                 workers: "Size of the pool, one worker per shadow by default" = None,
+                 history: "Number of decisions kept" = 100000):
+        if executor not in (THREAD, PROCESS):
+            raise ValueError(f"unknown executor '{executor}', use '{THREAD}' or '{PROCESS}'")
+        if not isinstance(shadows, dict):
+            shadows = {self._name_of(shadow, index, shadows): shadow for index, shadow in enumerate(shadows)}
+        self.primary = primary
+        self.primary_name = type(primary).__name__
+        if self.primary_name in shadows:
+            self.primary_name = "primary"
+        self.shadows = shadows
+        self.executor = executor
+        self.decisions = deque(maxlen=history)
+        self.iteration = 0
+        self._pool = (ThreadPoolExecutor if executor == THREAD else ProcessPoolExecutor)(
+            max_workers=workers if workers else max(len(shadows), 1))
+        # per shadow and aggregate, the Column.total of its key up to which it was fed
+        self._aggregate_cursors = {name: {} for name in shadows}
+        self._primary_outcome = (False, False)
+        for shadow in shadows.values():
+            shadow.knowledge.monitored_data = primary.knowledge.monitored_data
+
+    @staticmethod
+    def _name_of(shadow, index, shadows):
+        name = type(shadow).__name__
+        return name if sum(type(other).__name__ == name for other in shadows) == 1 else f"{name}-{index}"
+
+    @property
+    def knowledge(self):
+        return self.primary.knowledge
+
+    @property
+    def exemplar(self):
+        return self.primary.exemplar
+
+    def monitor(self, *args, **kwargs):
+        return self.primary.monitor(*args, **kwargs)
+
+    def monitor_batch(self, *args, **kwargs):
+        return self.primary.monitor_batch(*args, **kwargs)
+
+    def fetch_monitored_data(self, *args, **kwargs):
+        return self.primary.fetch_monitored_data(*args, **kwargs)
+
+    def analyze(self):
+        '''Runs analyze/plan of the primary and of every shadow, returns whether the primary analyzed'''
+        self.iteration += 1
+        for name, shadow in self.shadows.items():
+            self._share(name, shadow)
+        submit = _decide if self.executor == THREAD else _decide_in_worker
+        futures = {name: self._pool.submit(submit, shadow) for name, shadow in self.shadows.items()}
+        try:
+            analyzed, planned, seconds = _decide(self.primary)
+        except Exception as e:
+            self._record(self.primary_name, self.primary, None, repr(e))
+            raise
+        finally:
+            for name, future in futures.items():
+                self._collect(name, future)
+        self._record(self.primary_name, self.primary, (analyzed, planned, seconds))
+        self._primary_outcome = (analyzed, planned)
+        return analyzed
+
+    def plan(self):
+        '''Whether the primary planned an adaptation, it did so during analyze'''
+        return self._primary_outcome[1]
+
+    def execute(self, *args, **kwargs):
+        return self.primary.execute(*args, **kwargs)
+
+    def flush_execute(self):
+        flush_execute = getattr(self.primary, "flush_execute", None)
+        if flush_execute:
+            flush_execute()
+
+    def summary(self):
+        '''
+        Per strategy: the iterations it decided in, its adaptations, the mean and max compute time of analyze/plan,
+        the number of failures and the fraction of iterations where it planned the same as the primary
+        '''
+        primary_plans = {decision.iteration: decision.plan for decision in self.decisions
+                         if decision.name == self.primary_name}
+        summary = {}
+        for decision in self.decisions:
+            entry = summary.setdefault(decision.name, {"iterations": 0, "adaptations": 0, "errors": 0,
+                                                       "mean_seconds": 0.0, "max_seconds": 0.0, "agreement": 0.0})
+            entry["iterations"] += 1
+            entry["adaptations"] += decision.planned
+            entry["errors"] += decision.error is not None
+            entry["mean_seconds"] += decision.seconds
+            entry["max_seconds"] = max(entry["max_seconds"], decision.seconds)
+            entry["agreement"] += decision.plan == primary_plans.get(decision.iteration)
+        for entry in summary.values():
+            entry["mean_seconds"] /= entry["iterations"]
+            entry["agreement"] /= entry["iterations"]
+        return summary
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _share(self, name, shadow):
+        # the shadows see the Knowledge of the primary as of this iteration
+        primary = self.primary.knowledge
+        knowledge = shadow.knowledge
+        knowledge.monitored_data = primary.monitored_data
+        knowledge.monitor_schema = primary.monitor_schema
+        knowledge.execute_schema = primary.execute_schema
+        knowledge.adaptation_options = primary.adaptation_options
+        knowledge.adaptation_options_schema = primary.adaptation_options_schema
+        cursors = self._aggregate_cursors[name]
+        for aggregate, aggregator in knowledge.aggregates.items():
+            column = primary.monitored_data.get(aggregator.key)
+            if isinstance(column, Column):
+                aggregator.extend(column.since(cursors.get(aggregate, 0)))
+                cursors[aggregate] = column.total
+
+    def _collect(self, name, future):
+        if self.executor == THREAD:
+            try:
+                outcome, error = future.result(), None
+            except Exception as e:
+                outcome, error = None, repr(e)
+        else:
+            try:
+                returned, outcome, error = future.result()
+            except Exception as e:
+                # e.g. the strategy cannot be pickled, or the worker died
+                returned, outcome, error = None, None, repr(e)
+            if returned is not None:
+                self._adopt(self.shadows[name], returned)
+        if error is not None:
+            logging.warning(f"shadow strategy {name} failed: {error}")
+        self._record(name, self.shadows[name], outcome, error)
+
+    def _adopt(self, shadow, returned):
+        # the copy decided, its state replaces the one of the shadow, except what was not sent to the worker
+        monitored_data = shadow.knowledge.monitored_data
+        kept = {name: shadow.__dict__[name] for name in shadow.UNPICKLED if name in shadow.__dict__}
+        shadow.__dict__.update(returned.__dict__)
+        shadow.__dict__.update(kept)
+        shadow.knowledge.monitored_data = monitored_data
+
+    def _record(self, name, strategy, outcome, error=None):
+        analyzed, planned, seconds = outcome if outcome else (False, False, 0.0)
+        plan = copy.deepcopy(strategy.knowledge.plan_data) if planned else None
+        self.decisions.append(ShadowDecision(self.iteration, name, analyzed, planned, plan, seconds, error))
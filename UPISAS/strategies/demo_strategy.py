@@ -1,14 +1,18 @@
 from UPISAS.strategy import Strategy
+from UPISAS.aggregators import RunningMean
 
 
 class DemoStrategy(Strategy):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the mean of f over the whole run, updated as f is monitored
+        self.knowledge.bind("mean_f", "f", RunningMean())
+
     def analyze(self):
-        data = self.knowledge.monitored_data
-        print(data)
-        mean_f = sum(data["f"])/len(data["f"])
-        print("[Analysis]\tmean_f: " + str(mean_f))
-        if mean_f > 0:
+        mean_f = self.knowledge.aggregates["mean_f"].mean
+        self.events.emit("analysis", mean_f=mean_f)
+        if mean_f is not None and mean_f > 0:
             self.knowledge.analysis_data["mean_f"] = mean_f
             return True
         return False
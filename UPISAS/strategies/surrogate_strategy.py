@@ -0,0 +1,59 @@
+from abc import abstractmethod
+
+import numpy as np
+
+from UPISAS.strategy import Strategy
+from UPISAS.planner import SurrogatePlanner
+
+
+class SurrogateStrategy(Strategy):
+    """
+    Plans with a SurrogatePlanner over the adaptation options of the exemplar: each round, analyze scores the
+    configuration the exemplar acknowledged last with the utility of the samples monitored since, then plan picks
+    the next one. Plans suppressed, coalesced or never executed (e.g. by a shadow) are not scored.
+    Subclasses define the utility.
+    """
+
+    def __init__(self, *args, planner_options: "Keyword arguments of the SurrogatePlanner, e.g. seed" = None,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.planner_options = planner_options if planner_options else {}
+        self.planner = None
+        # the configuration the exemplar acknowledged last, None until the first one is executed
+        self.configuration = None
+
+    @abstractmethod
+    def utility(self, samples: "Values of each monitored key since the previous analysis, see new_samples"):
+        """ The utility of the current configuration, higher is better, None if the samples do not tell it yet. """
+        pass
+
+    def analyze(self):
+        utility = self.utility(self.new_samples())
+        if utility is None:
+            return False
+        if self.configuration is not None:
+            self.planner.observe(self.configuration, utility)
+            self.knowledge.analysis_data["utility"] = utility
+        return True
+
+    def plan(self):
+        if self.planner is None:
+            if not self.knowledge.adaptation_options: self.get_adaptation_options()
+            self.planner = SurrogatePlanner(self.knowledge.adaptation_options, **self.planner_options)
+        self.knowledge.plan_data = self.planner.suggest()
+        return True
+
+    def _put_adaptation(self, endpoint_suffix, adaptation):
+        acknowledged = super()._put_adaptation(endpoint_suffix, adaptation)
+        self.configuration = dict(adaptation) if acknowledged else None
+        return acknowledged
+
+
+class DemoSurrogateStrategy(SurrogateStrategy):
+    """ Looks for the x and y minimizing f on the demo managed system. """
+
+    def utility(self, samples):
+        values = samples.get("f")
+        if values is None or not len(values):
+            return None
+        return -float(np.mean(values))
@@ -1,3 +1,5 @@
+import logging
+
 from UPISAS.strategy import Strategy
 
 #This is a port of the ReactiveAdaptationManager originally published alongside SWIM.
@@ -10,7 +12,6 @@ class ReactiveAdaptationManager(Strategy):
 
     def analyze(self):
         data = self.knowledge.monitored_data
-        print(data)
         self.knowledge.analysis_data["server_booting"] = data["servers"] > data["active_servers"]
         
         self.knowledge.analysis_data["spare_utilization"] = sum([server["utilization_value"] for server in data["utilization"][-1]])
@@ -21,6 +22,7 @@ class ReactiveAdaptationManager(Strategy):
         self.knowledge.analysis_data["server_room"] = data["servers"][-1] < data["max_servers"][-1]
         self.knowledge.analysis_data["current_dimmer"] = data["dimmer_factor"][-1]
         self.knowledge.analysis_data["current_servers"] = data["servers"][-1]
+        self.events.delta("analysis", self.knowledge.analysis_data, level=logging.DEBUG)
         if(data["basic_rt"][-1] > self.RT_THRESHOLD):
             return True
         elif(data["basic_rt"][-1] < self.RT_THRESHOLD):
@@ -1,57 +1,248 @@
 from abc import ABC, abstractmethod
-import requests
+import functools
 import pprint
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
 
 from UPISAS.exceptions import EndpointNotReachable, ServerNotReachable
 from UPISAS.knowledge import Knowledge
-from UPISAS import validate_schema, get_response_for_get_request
+from UPISAS.columnar import Column, ColumnarStore
+from UPISAS.transport import Transport
+from UPISAS.metrics import Metrics
+from UPISAS.execute_filter import ExecuteFilter
+from UPISAS.monitor_stream import MonitorStream
+from UPISAS.schema_cache import schema_cache
+from UPISAS.events import events
+from UPISAS.clock import system_clock
+from UPISAS import validate_schema
 import logging
 
 pp = pprint.PrettyPrinter(indent=4)
 
 
+def _timed_phase(phase, method):
+    @functools.wraps(method)
+    def timed(self, *args, **kwargs):
+        metrics = getattr(self, "metrics", None)
+        if metrics is None:
+            return method(self, *args, **kwargs)
+        with metrics.phase(phase):
+            return method(self, *args, **kwargs)
+    timed._timed_phase = phase
+    return timed
+
+
 class Strategy(ABC):
+    # left out when a strategy is pickled, e.g. for a worker process of a shadow.ShadowEvaluator
+    UNPICKLED = ("exemplar", "transport", "metrics", "execute_filter", "clock", "recorder")
 
-    def __init__(self, exemplar):
+    def __init__(self, exemplar, transport: "Transport shared by all the HTTP calls, pooled per base_endpoint" = None,
+                 metrics: "Metrics recording the time spent in each phase, HTTP call and validation" = None,
+                 execute_filter: "ExecuteFilter suppressing and coalescing adaptations, sending them all by default" = None,
+                 clock: "Clock of the loop, Knowledge timestamps and execute_filter, the exemplar's by default" = None):
         self.exemplar = exemplar
-        self.knowledge = Knowledge(dict(), dict(), dict(), dict(), dict(), dict(), dict())
+        self.clock = clock if clock else getattr(exemplar, "clock", system_clock)
+        self.metrics = metrics if metrics else Metrics()
+        # deltas and rate limits of its own, on the shared events logger
+        self.events = events.child()
+        self.execute_filter = execute_filter if execute_filter else ExecuteFilter(clock=self.clock)
+        # position of monitor_batch in the samples of the exemplar, and whether the exemplar supports it at all
+        self.monitor_cursor = None
+        self.monitor_batch_supported = True
+        # per monitored key, how many of its samples new_samples() already handed over
+        self.analysis_cursors = {}
+        # TraceRecorder writing the samples as they are appended to the Knowledge, see trace.record
+        self.recorder = None
+        if transport is None:
+            # exemplars served without HTTP, e.g. exemplars.replay.ReplayExemplar, make their own transport
+            create_transport = getattr(exemplar, "create_transport", None)
+            transport = create_transport(self.metrics) if create_transport \
+                else Transport(exemplar.base_endpoint, metrics=self.metrics)
+        self.transport = transport
+        self.knowledge = Knowledge(ColumnarStore(clock=self.clock), dict(), dict(), dict(), dict(), dict(), dict())
+
+    def __init_subclass__(cls, **kwargs):
+        # the analyze and plan of subclasses are timed like monitor and execute
+        super().__init_subclass__(**kwargs)
+        for phase in ("analyze", "plan"):
+            method = cls.__dict__.get(phase)
+            if callable(method) and not getattr(method, "__isabstractmethod__", False) \
+                    and not hasattr(method, "_timed_phase"):
+                setattr(cls, phase, _timed_phase(phase, method))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self.UNPICKLED:
+            if name in state:
+                state[name] = None
+        return state
 
     def ping(self):
         ping_res = self._perform_get_request(self.exemplar.base_endpoint)
         logging.info(f"ping result: {ping_res}")
 
-    def monitor(self, endpoint_suffix="monitor", with_validation=True, verbose=False):
-        fresh_data = self._perform_get_request(endpoint_suffix)
-        if(verbose): print("[Monitor]\tgot fresh_data: " + str(fresh_data))
-        if with_validation:
-            if(not self.knowledge.monitor_schema): self.get_monitor_schema()
-            validate_schema(fresh_data, self.knowledge.monitor_schema)
-        data = self.knowledge.monitored_data
-        for key in list(fresh_data.keys()):
-            if key not in data:
-                data[key] = []
-            data[key].append(fresh_data[key])
-        if(verbose): print("[Knowledge]\tdata monitored so far: " + str(self.knowledge.monitored_data))
+    def monitor(self, endpoint_suffix="monitor", with_validation=True, verbose=False,
+                fresh_data: "Data already fetched with fetch_monitored_data, e.g. prefetched by a pipelined loop" = None):
+        with self.metrics.phase("monitor"):
+            if fresh_data is None: fresh_data = self.fetch_monitored_data(endpoint_suffix)
+            level = logging.INFO if verbose else logging.DEBUG
+            self.events.delta("monitor", fresh_data, level=level)
+            if with_validation:
+                if(not self.knowledge.monitor_schema): self.get_monitor_schema()
+                self._validate(fresh_data, self.knowledge.monitor_schema)
+            self.knowledge.add_monitored_data(fresh_data)
+            if self.recorder: self.recorder.sample(fresh_data)
+            # a summary of the Knowledge, its full history is never formatted
+            self.events.emit("knowledge", level, keys=lambda: len(self.knowledge.monitored_data),
+                             samples=self._monitored_samples)
         return True
 
-    def execute(self, adaptation=None, endpoint_suffix="execute", with_validation=True):
+    def monitor_batch(self, endpoint_suffix="monitor_batch", with_validation=True, verbose=False,
+                      limit: "Maximum number of samples per request, the exemplar's default if None" = None):
+        '''
+        Fetches all the samples the exemplar produced since the previous call and appends them to the Knowledge in
+        bulk. Falls back on monitor() for exemplars without the batch endpoint. Returns the number of samples added.
+        '''
+        if self.monitor_batch_supported:
+            with self.metrics.phase("monitor"):
+                added = self._monitor_batch(endpoint_suffix, with_validation, verbose, limit)
+            if added is not None:
+                return added
+            logging.warning("the exemplar has no batch monitoring endpoint, falling back on single-snapshot polling")
+            self.monitor_batch_supported = False
+        self.monitor(with_validation=with_validation, verbose=verbose)
+        return 1
+
+    def _monitor_batch(self, endpoint_suffix, with_validation, verbose, limit):
+        added = 0
+        while True:
+            params = {key: value for key, value in (("since", self.monitor_cursor), ("limit", limit))
+                      if value is not None}
+            response = self.transport.get(f"{endpoint_suffix}?{urlencode(params)}" if params else endpoint_suffix)
+            if response.status_code == 404:
+                return None
+            batch = response.json()
+            samples = [sample["data"] for sample in batch["samples"]]
+            self.events.emit("monitor_batch", logging.INFO if verbose else logging.DEBUG,
+                             samples=len(samples), since=self.monitor_cursor, cursor=batch["cursor"])
+            if batch.get("dropped"):
+                logging.warning(f"{batch['dropped']} samples were dropped by the exemplar before being monitored")
+            if with_validation:
+                if(not self.knowledge.monitor_schema): self.get_monitor_schema()
+                for sample in samples:
+                    self._validate(sample, self.knowledge.monitor_schema)
+            timestamps = [sample["timestamp"] for sample in batch["samples"]]
+            self.knowledge.add_monitored_samples(samples, timestamps)
+            if self.recorder: self.recorder.batch(samples, timestamps)
+            self.monitor_cursor = batch["cursor"]
+            added += len(samples)
+            if not batch.get("more"):
+                return added
+
+    def subscribe(self, endpoint_suffix="monitor_stream", with_validation=True,
+                  on_arrival: "Called as on_arrival(strategy) after each sample, e.g. monitor_stream.adapt" = None):
+        '''Subscribes to the stream of monitored samples of the exemplar, returns the started MonitorStream'''
+        return MonitorStream(self, endpoint_suffix, with_validation, on_arrival).start()
+
+    def new_samples(self, keys: "Monitored keys to return, all of them if None" = None):
+        '''
+        The values of each monitored key ingested since the previous call (oldest first), so that analyze can work
+        on the new samples only instead of the whole history. Samples evicted by a retention policy before being
+        handed over are skipped.
+        '''
+        data = self.knowledge.monitored_data
+        fresh = {}
+        for key in (keys if keys is not None else list(data)):
+            values = data.get(key, [])
+            seen = self.analysis_cursors.get(key, 0)
+            if isinstance(values, Column):
+                fresh[key], self.analysis_cursors[key] = values.since(seen), values.total
+            else:
+                fresh[key], self.analysis_cursors[key] = values[seen:], len(values)
+        return fresh
+
+    def _monitored_samples(self):
+        return max((len(values) for values in self.knowledge.monitored_data.values()), default=0)
+
+    def fetch_monitored_data(self, endpoint_suffix="monitor"):
+        '''Only the HTTP part of monitor, safe to call from another thread as it does not touch the Knowledge'''
+        return self._perform_get_request(endpoint_suffix)
+
+    def execute(self, adaptation=None, endpoint_suffix="execute", with_validation=True,
+                force: "Send even if the exemplar already has this configuration or within the coalescing window" = False):
         if(not adaptation): adaptation= self.knowledge.plan_data
-        if with_validation:
-            if(not self.knowledge.execute_schema): self.get_execute_schema()
-            validate_schema(adaptation, self.knowledge.execute_schema)
-        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
-        response = requests.put(url, json=adaptation)
-        print("[Execute]\tposted configuration: " + str(adaptation))
+        with self.metrics.phase("execute"):
+            if with_validation:
+                if(not self.knowledge.execute_schema): self.get_execute_schema()
+                self._validate(adaptation, self.knowledge.execute_schema)
+            self.execute_filter.submit(adaptation, functools.partial(self._put_adaptation, endpoint_suffix), force)
+        return True
+
+    def flush_execute(self):
+        '''Sends the adaptation held back by the coalescing window of the execute_filter, if any'''
+        self.execute_filter.flush()
+
+    def _put_adaptation(self, endpoint_suffix, adaptation):
+        response = self.transport.put(endpoint_suffix, json=adaptation)
+        self.events.emit("execute", adaptation=adaptation, status=response.status_code)
         if response.status_code == 404:
             logging.error("Cannot execute adaptation on remote system, check that the execute endpoint exists.")
             raise EndpointNotReachable
-        return True
+        return response.ok
+
+    def bootstrap(self, with_validation=True,
+                  cache: "SchemaCache to use, the module-level schema_cache if None, False to always fetch" = None,
+                  revalidate: "Revalidate the cached entries even when they are fresh" = False):
+        '''
+        Fetches the three schemas and the adaptation options concurrently, in one round trip time, then validates
+        the adaptation options. Exemplars with an image_id are looked up in the cache first. The adaptation options
+        depend on the configuration of the exemplar, not only on its image, so they are always revalidated.
+        '''
+        cache = schema_cache if cache is None else cache
+        image_id = getattr(self.exemplar, "image_id", None)
+        if not image_id:
+            cache = None
+        endpoints = ("monitor_schema", "execute_schema", "adaptation_options_schema", "adaptation_options")
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+            futures = [executor.submit(self._get_cached, endpoint_suffix, cache, image_id,
+                                       revalidate or endpoint_suffix == "adaptation_options")
+                       for endpoint_suffix in endpoints]
+            (self.knowledge.monitor_schema, self.knowledge.execute_schema,
+             self.knowledge.adaptation_options_schema, self.knowledge.adaptation_options) = \
+                [future.result() for future in futures]
+        if with_validation:
+            self._validate(self.knowledge.adaptation_options, self.knowledge.adaptation_options_schema)
+        logging.info(f"bootstrapped {', '.join(endpoints)}")
+
+    def _get_cached(self, endpoint_suffix, cache, image_id, revalidate):
+        entry = cache.get(image_id, endpoint_suffix) if cache else None
+        if entry and not revalidate and cache.is_fresh(entry):
+            logging.info(f"{endpoint_suffix} taken from cache")
+            return entry["body"]
+        headers = {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else None
+        response = self.transport.get(endpoint_suffix, headers=headers)
+        if response.status_code == 304:
+            logging.info(f"{endpoint_suffix} revalidated")
+            cache.revalidated(image_id, endpoint_suffix)
+            return entry["body"]
+        if response.status_code == 404:
+            logging.error("Please check that the endpoint you are trying to reach actually exists.")
+            raise EndpointNotReachable
+        if response.status_code != 200:
+            # e.g. an exemplar still booting, its answer must not be cached as the document
+            logging.error(f"{endpoint_suffix} answered {response.status_code}, not bootstrapped")
+            raise EndpointNotReachable
+        body = response.json()
+        if cache:
+            cache.put(image_id, endpoint_suffix, body, response.headers.get("ETag"))
+        return body
 
     def get_adaptation_options(self, endpoint_suffix: "API Endpoint" = "adaptation_options", with_validation=True):
         self.knowledge.adaptation_options = self._perform_get_request(endpoint_suffix)
         if with_validation:
             if(not self.knowledge.adaptation_options_schema): self.get_adaptation_options_schema()
-            validate_schema(self.knowledge.adaptation_options, self.knowledge.adaptation_options_schema)
+            self._validate(self.knowledge.adaptation_options, self.knowledge.adaptation_options_schema)
         logging.info("adaptation_options set to: ")
         pp.pprint(self.knowledge.adaptation_options)
 
@@ -70,9 +261,13 @@ class Strategy(ABC):
         logging.info("adaptation_options_schema set to: ")
         pp.pprint(self.knowledge.adaptation_options_schema)
 
+    def _validate(self, json_instance, json_schema):
+        started = time.perf_counter()
+        validate_schema(json_instance, json_schema)
+        self.metrics.observe("validation_seconds", time.perf_counter() - started)
+
     def _perform_get_request(self, endpoint_suffix: "API Endpoint"):
-        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
-        response = get_response_for_get_request(url)
+        response = self.transport.get(endpoint_suffix)
         if response.status_code == 404:
             logging.error("Please check that the endpoint you are trying to reach actually exists.")
             raise EndpointNotReachable
@@ -1,7 +1,6 @@
 import unittest
-import time
 
-from UPISAS import get_response_for_get_request, validate_schema
+from UPISAS import validate_schema
 from UPISAS.exemplars.swim import SWIM
 from UPISAS.strategies.empty_strategy import EmptyStrategy
 
@@ -68,15 +67,8 @@ class TestStrategy(unittest.TestCase):
             self.assertTrue("JSON object validated by JSON Schema" in ", ".join(cm.output))
         self.assertTrue(successful)
 
-    def _start_server_and_wait_until_is_up(self, base_endpoint="http://localhost:3000"):
-        self.exemplar.start_run()
-        while True:
-            time.sleep(1)
-            print("trying to connect...")
-            response = get_response_for_get_request(base_endpoint)
-            print(response.status_code)
-            if response.status_code < 400:
-                return
+    def _start_server_and_wait_until_is_up(self):
+        self.exemplar.start_run(wait=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,114 @@
+import unittest
+
+import numpy as np
+
+from UPISAS.aggregators import RunningMean, EWMA, SlidingMinMax, StreamingQuantile
+from UPISAS.columnar import ColumnarStore
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel
+from UPISAS.knowledge import Knowledge
+from UPISAS.retention import LastN
+from UPISAS.strategies.demo_strategy import DemoStrategy
+
+
+class TestAggregators(unittest.TestCase):
+    """
+    Test cases for the incremental aggregators, compared with the statistics recomputed over the whole history.
+    """
+
+    def setUp(self):
+        self.values = np.random.default_rng(7).normal(10, 3, 5000)
+
+    def test_running_mean(self):
+        one_by_one, batched = RunningMean(), RunningMean()
+        for value in self.values:
+            one_by_one.update(value)
+        for chunk in np.array_split(self.values, 7):
+            batched.extend(chunk)
+        for aggregator in (one_by_one, batched):
+            self.assertEqual(aggregator.count, len(self.values))
+            self.assertAlmostEqual(aggregator.mean, self.values.mean())
+            self.assertAlmostEqual(aggregator.variance, self.values.var())
+            self.assertAlmostEqual(aggregator.std, self.values.std())
+        self.assertIsNone(RunningMean().value)
+
+    def test_ewma(self):
+        aggregator = EWMA(alpha=0.5)
+        aggregator.extend([4, 8, 0])
+        self.assertEqual(aggregator.value, 3)
+        self.assertAlmostEqual(EWMA(half_life=2).alpha, 1 - 0.5 ** 0.5)
+        with self.assertRaises(ValueError):
+            EWMA()
+
+    def test_sliding_min_max(self):
+        aggregator = SlidingMinMax(50)
+        for i, value in enumerate(self.values):
+            aggregator.update(value)
+            window = self.values[max(0, i - 49):i + 1]
+            self.assertEqual(aggregator.value, (window.min(), window.max()))
+
+    def test_streaming_quantile(self):
+        exact = StreamingQuantile(0.5)
+        exact.extend([5, 1, 3])
+        self.assertEqual(exact.value, 3)
+        for quantile in (0.5, 0.95):
+            aggregator = StreamingQuantile(quantile)
+            aggregator.extend(self.values)
+            self.assertAlmostEqual(aggregator.value, np.quantile(self.values, quantile), delta=0.1)
+
+
+class TestIncrementalAnalysis(unittest.TestCase):
+    """
+    Test cases for the aggregators bound to the Knowledge and for Strategy.new_samples.
+    """
+
+    def test_bound_aggregators_fed(self):
+        knowledge = Knowledge(ColumnarStore(), dict(), dict(), dict(), dict(), dict(), dict())
+        knowledge.add_monitored_data({"f": 1.0})
+        # primed with the history of the key
+        mean = knowledge.bind("mean_f", "f", RunningMean())
+        maximum = knowledge.bind("max_f", "f", SlidingMinMax(2))
+        knowledge.add_monitored_samples([{"f": 5.0}, {"g": 0}, {"f": 3.0}])
+        knowledge.add_monitored_data({"g": 1})
+        self.assertEqual((mean.count, mean.mean), (3, 3.0))
+        self.assertEqual(maximum.max, 5.0)
+        self.assertIs(knowledge.aggregates["mean_f"], mean)
+
+    def test_new_samples(self):
+        exemplar = StandInExemplar(DemoModel(), auto_start=True)
+        strategy = DemoStrategy(exemplar)
+        try:
+            strategy.monitor()
+            strategy.monitor()
+            first = strategy.new_samples()
+            self.assertEqual(len(first["f"]), 2)
+            self.assertEqual(len(strategy.new_samples()["f"]), 0)
+            strategy.knowledge.monitored_data.set_retention("f", LastN(2))
+            for _ in range(3):
+                strategy.monitor()
+            # the sample evicted before being handed over is skipped
+            self.assertEqual(strategy.new_samples(["f"])["f"].tolist(),
+                             strategy.knowledge.monitored_data["f"].tolist())
+            self.assertEqual(strategy.knowledge.monitored_data["f"].total, 5)
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+
+    def test_demo_mean_over_whole_run(self):
+        exemplar = StandInExemplar(DemoModel(), auto_start=True)
+        strategy = DemoStrategy(exemplar)
+        strategy.knowledge.monitored_data.set_retention("f", LastN(1))
+        seen = []
+        try:
+            for _ in range(5):
+                strategy.monitor()
+                seen.append(strategy.knowledge.monitored_data["f"].latest())
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        # the mean covers the samples evicted by the retention policy
+        self.assertEqual(strategy.knowledge.aggregates["mean_f"].count, 5)
+        self.assertAlmostEqual(strategy.knowledge.aggregates["mean_f"].mean, np.mean(seen))
+
+
+if __name__ == '__main__':
+    unittest.main()
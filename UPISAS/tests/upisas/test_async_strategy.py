@@ -0,0 +1,106 @@
+import unittest
+
+from aiohttp import web
+
+from UPISAS.async_strategy import AsyncStrategy, run_loops
+from UPISAS.exceptions import EndpointNotReachable, ServerNotReachable
+
+
+class AsyncDemoStrategy(AsyncStrategy):
+
+    async def analyze(self):
+        data = self.knowledge.monitored_data
+        self.knowledge.analysis_data["mean_f"] = sum(data["f"]) / len(data["f"])
+        return True
+
+    async def plan(self):
+        self.knowledge.plan_data = {"x": 2, "y": 5}
+        return True
+
+
+class AddressOnlyExemplar:
+    def __init__(self, base_endpoint):
+        self.base_endpoint = base_endpoint
+
+
+class TestAsyncStrategy(unittest.IsolatedAsyncioTestCase):
+    """
+    Test cases for the AsyncStrategy class, against in-process aiohttp servers mimicking the demo managed system.
+    """
+
+    async def asyncSetUp(self):
+        self.executed = []
+        self.runners = []
+
+    async def asyncTearDown(self):
+        for runner in self.runners:
+            await runner.cleanup()
+
+    async def _start_server(self):
+        async def monitor(request):
+            return web.json_response({"f": 1.0})
+
+        async def monitor_schema(request):
+            return web.json_response({"type": "object", "properties": {"f": {"type": "number"}}})
+
+        async def execute_schema(request):
+            return web.json_response({"type": "object",
+                                      "properties": {"x": {"type": "number"}, "y": {"type": "number"}}})
+
+        async def execute(request):
+            self.executed.append(await request.json())
+            return web.Response(text="ok")
+
+        app = web.Application()
+        app.add_routes([web.get("/monitor", monitor), web.get("/monitor_schema", monitor_schema),
+                        web.get("/execute_schema", execute_schema), web.put("/execute", execute)])
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        self.runners.append(runner)
+        port = runner.addresses[0][1]
+        return AddressOnlyExemplar(f"http://127.0.0.1:{port}")
+
+    async def test_monitor_successfully(self):
+        async with AsyncDemoStrategy(await self._start_server()) as strategy:
+            with self.assertLogs() as cm:
+                successful = await strategy.monitor()
+                self.assertTrue("JSON object validated by JSON Schema" in ", ".join(cm.output))
+            self.assertTrue(successful)
+            self.assertEqual(strategy.knowledge.monitored_data, {"f": [1.0]})
+
+    async def test_execute_successfully(self):
+        async with AsyncDemoStrategy(await self._start_server()) as strategy:
+            successful = await strategy.execute({"x": 2.1, "y": 5.3})
+        self.assertTrue(successful)
+        self.assertEqual(self.executed, [{"x": 2.1, "y": 5.3}])
+
+    async def test_endpoint_not_reachable(self):
+        async with AsyncDemoStrategy(await self._start_server()) as strategy:
+            with self.assertRaises(EndpointNotReachable):
+                await strategy.get_adaptation_options()
+
+    async def test_server_not_reachable(self):
+        async with AsyncDemoStrategy(AddressOnlyExemplar("http://127.0.0.1:1")) as strategy:
+            with self.assertRaises(ServerNotReachable):
+                await strategy.ping()
+
+    async def test_run_loops_concurrently(self):
+        strategies = [AsyncDemoStrategy(await self._start_server()) for _ in range(5)]
+        results = await run_loops(strategies, iterations=3)
+        self.assertEqual(results, [3] * 5)
+        self.assertEqual(len(self.executed), 15)
+        for strategy in strategies:
+            self.assertEqual(len(strategy.knowledge.monitored_data["f"]), 3)
+
+    async def test_run_loops_reports_failing_loop(self):
+        strategies = [AsyncDemoStrategy(await self._start_server()),
+                      AsyncDemoStrategy(AddressOnlyExemplar("http://127.0.0.1:1"))]
+        results = await run_loops(strategies, iterations=1)
+        self.assertEqual(results[0], 1)
+        self.assertIsInstance(results[1], ServerNotReachable)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from UPISAS.benchmarks import run, compare, save_results, load_results, latest_results
+from UPISAS.benchmarks.__main__ import main
+from UPISAS.benchmarks import hot_path
+
+
+class TestBenchmarks(unittest.TestCase):
+    """
+    Test cases for the micro-benchmark runner and its comparison against a baseline.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write_baseline(self, seconds):
+        path = os.path.join(self.directory.name, "baseline.json")
+        with open(path, "w") as f:
+            json.dump({"commit": "baseline", "created_at": 0,
+                       "results": {"swim_utility[100]": {"best": seconds, "median": seconds}}}, f)
+        return path
+
+    def _main(self, *args):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            status = main(["--filter", "swim_utility", "--sizes", "100", "--repeat", "1", "--min-time", "0.001",
+                           "--results-dir", self.directory.name, *args])
+        return status, output.getvalue()
+
+    def test_run_sized_benchmark(self):
+        results = run(sizes=[100, 1000], pattern="swim_utility", repeat=2, min_time=0.001)
+        self.assertEqual(sorted(results), ["swim_utility[1000]", "swim_utility[100]"])
+        for result in results.values():
+            self.assertGreater(result["best"], 0)
+            self.assertLessEqual(result["best"], result["median"])
+
+    def test_history_keeps_its_size(self):
+        histories = []
+        build_swim_history = hot_path._build_swim_history
+
+        def build_history(size):
+            histories.append(build_swim_history(size))
+            return histories[-1]
+
+        with mock.patch.object(hot_path, "_build_swim_history", build_history):
+            timed = hot_path.monitor_ingestion(100)
+        for _ in range(1000):
+            timed()
+        self.assertEqual(len(histories[0]["basic_rt"]), 100)
+
+    def test_compare(self):
+        baseline = {"a": {"best": 1.0}, "b": {"best": 1.0}, "gone": {"best": 1.0}}
+        comparison = compare({"a": {"best": 1.2}, "b": {"best": 1.5}, "new": {"best": 1.0}}, baseline, 0.25)
+        self.assertEqual([(key, regressed) for key, _, _, _, regressed in comparison],
+                         [("a", False), ("b", True)])
+
+    def test_results_stored_per_commit(self):
+        save_results({"a": {"best": 1.0}}, "1111111", self.directory.name)
+        save_results({"a": {"best": 2.0}}, "2222222", self.directory.name)
+        self.assertEqual(load_results("1111111", self.directory.name)["results"], {"a": {"best": 1.0}})
+        self.assertEqual(latest_results("2222222", self.directory.name)["commit"], "1111111")
+        self.assertIsNone(latest_results(results_dir=os.path.join(self.directory.name, "missing")))
+
+    def test_fails_on_regression(self):
+        status, output = self._main("--baseline", self._write_baseline(1e-12), "--no-save")
+        self.assertEqual(status, 1)
+        self.assertIn("REGRESSION", output)
+
+    def test_passes_without_regression(self):
+        status, output = self._main("--baseline", self._write_baseline(1e3))
+        self.assertEqual(status, 0)
+        self.assertIn("results stored in", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import tempfile
+import time
+import unittest
+
+from UPISAS.exceptions import EndpointNotReachable
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel, _StandInHandler
+from UPISAS.schema_cache import SchemaCache
+from UPISAS.strategies.demo_strategy import DemoStrategy
+
+
+class SlowDocumentsModel(DemoModel):
+    """ Takes `delay` seconds to serve each schema, as a distant exemplar would, and records when it served them. """
+    delay = 0.2
+
+    def __init__(self):
+        super().__init__()
+        self.intervals = []
+
+    def _serve(self, document):
+        started = time.monotonic()
+        time.sleep(self.delay)
+        self.intervals.append((started, time.monotonic()))
+        return document
+
+    @property
+    def monitor_schema(self):
+        return self._serve(DemoModel.monitor_schema)
+
+    @property
+    def execute_schema(self):
+        return self._serve(DemoModel.execute_schema)
+
+    @property
+    def adaptation_options_schema(self):
+        return self._serve(DemoModel.adaptation_options_schema)
+
+
+class BootingHandler(_StandInHandler):
+    """ Answers 500 to the requests for the monitor schema, as an exemplar still booting would. """
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/monitor_schema":
+            return self._send(500, {"error": "exemplar still booting"})
+        super().do_GET()
+
+
+class TestBootstrap(unittest.TestCase):
+    """
+    Test cases for Strategy.bootstrap and the on-disk cache of the schemas and adaptation options.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SchemaCache(os.path.join(self.directory.name, "schemas.json"))
+        self.exemplar = StandInExemplar(DemoModel(), auto_start=True)
+        self.exemplar.image_id = "sha256:demo"
+
+    def tearDown(self):
+        self.exemplar.stop_container()
+        self.directory.cleanup()
+
+    def _bootstrap(self, cache, **kwargs):
+        strategy = DemoStrategy(self.exemplar)
+        strategy.bootstrap(cache=cache, **kwargs)
+        strategy.transport.close()
+        requests = strategy.metrics.histograms.get("http_get_seconds")
+        return strategy, requests.count if requests else 0
+
+    def test_fetches_everything(self):
+        strategy, requests = self._bootstrap(cache=False)
+        self.assertEqual(requests, 4)
+        self.assertEqual(strategy.knowledge.monitor_schema, DemoModel.monitor_schema)
+        self.assertEqual(strategy.knowledge.execute_schema, DemoModel.execute_schema)
+        self.assertEqual(strategy.knowledge.adaptation_options_schema, DemoModel.adaptation_options_schema)
+        self.assertEqual(strategy.knowledge.adaptation_options, DemoModel.adaptation_options)
+
+    def test_fetches_concurrently(self):
+        model = SlowDocumentsModel()
+        slow = StandInExemplar(model, auto_start=True)
+        try:
+            strategy = DemoStrategy(slow)
+            strategy.bootstrap(cache=False)
+            strategy.transport.close()
+        finally:
+            slow.stop_container()
+        self.assertEqual(len(model.intervals), 3)
+        # every schema was requested before any of them was served
+        self.assertLess(max(start for start, _ in model.intervals), min(end for _, end in model.intervals))
+
+    def test_cached_per_image(self):
+        self._bootstrap(self.cache)
+        with self.assertLogs() as cm:
+            strategy, requests = self._bootstrap(SchemaCache(self.cache.path))
+        # only the adaptation options, which depend on the configuration of the exemplar, are revalidated
+        self.assertEqual(requests, 1)
+        self.assertIn("adaptation_options revalidated", ", ".join(cm.output))
+        self.assertEqual(strategy.knowledge.adaptation_options, DemoModel.adaptation_options)
+        self.exemplar.image_id = "sha256:other"
+        self.assertEqual(self._bootstrap(self.cache)[1], 4)
+
+    def test_stale_entries_revalidated(self):
+        self._bootstrap(self.cache)
+        with self.assertLogs() as cm:
+            strategy, requests = self._bootstrap(SchemaCache(self.cache.path, max_age=0))
+        self.assertEqual(requests, 4)
+        self.assertEqual(", ".join(cm.output).count("revalidated"), 4)
+        self.assertEqual(strategy.knowledge.execute_schema, DemoModel.execute_schema)
+
+    def test_invalidate(self):
+        self._bootstrap(self.cache)
+        self.cache.invalidate("sha256:demo", "monitor_schema")
+        self.assertEqual(self._bootstrap(self.cache)[1], 2)
+        self.cache.invalidate("sha256:demo")
+        self.assertEqual(self._bootstrap(self.cache)[1], 4)
+
+    def test_not_cached_without_image(self):
+        self.exemplar.image_id = None
+        self._bootstrap(self.cache)
+        self.assertEqual(self._bootstrap(self.cache)[1], 4)
+
+    def test_errors_not_cached(self):
+        server = self.exemplar.exemplar_container._server
+        server.RequestHandlerClass = BootingHandler
+        with self.assertLogs(level="ERROR"), self.assertRaises(EndpointNotReachable):
+            self._bootstrap(self.cache)
+        self.assertIsNone(self.cache.get("sha256:demo", "monitor_schema"))
+        server.RequestHandlerClass = _StandInHandler
+        strategy, _ = self._bootstrap(SchemaCache(self.cache.path))
+        self.assertEqual(strategy.knowledge.monitor_schema, DemoModel.monitor_schema)
+
+
+if __name__ == '__main__':
+    unittest.main()
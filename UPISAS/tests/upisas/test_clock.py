@@ -0,0 +1,92 @@
+import os
+import pickle
+import tempfile
+import time
+import unittest
+
+from UPISAS.clock import VirtualClock
+from UPISAS.exceptions import ExemplarNotReady
+from UPISAS.exemplars.replay import ReplayExemplar, replay
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel
+from UPISAS.loop import MAPEKLoop
+from UPISAS.strategies.demo_strategy import DemoStrategy
+from UPISAS.trace import record
+
+
+class TestVirtualClock(unittest.TestCase):
+    """
+    Test cases for the virtual clock, and for the loops, exemplars and replays running on it.
+    """
+
+    def test_scheduled_calls_run_in_order(self):
+        clock = VirtualClock(epoch=1000)
+        calls = []
+        clock.call_later(2, lambda: calls.append(("later", clock.monotonic())))
+        periodic = clock.every(1.5, lambda: calls.append(("every", clock.monotonic())))
+        cancelled = clock.call_later(1, lambda: calls.append(("cancelled", clock.monotonic())))
+        cancelled.cancel()
+        clock.sleep(3.5)
+        self.assertEqual(calls, [("every", 1.5), ("later", 2), ("every", 3.0)])
+        self.assertEqual((clock.monotonic(), clock.time()), (3.5, 1003.5))
+        periodic.cancel()
+        clock.advance_to(10)
+        self.assertEqual(len(calls), 3)
+        # the time does not go back
+        clock.advance_to(5)
+        self.assertEqual(clock.monotonic(), 10)
+        with self.assertRaises(ValueError):
+            clock.advance(-1)
+        with self.assertRaises(ValueError):
+            clock.every(0, lambda: None)
+        copy = pickle.loads(pickle.dumps(clock))
+        self.assertEqual(copy.time(), 1010)
+
+    def test_day_long_run_against_stand_in(self):
+        clock = VirtualClock(epoch=1700000000)
+        exemplar = StandInExemplar(DemoModel(seed=0), auto_start=True, sample_period=60, clock=clock)
+        strategy = DemoStrategy(exemplar)
+        started = time.monotonic()
+        try:
+            self.assertIs(strategy.clock, clock)
+            stats = MAPEKLoop(strategy, period=300, batched=True).run(duration=24 * 3600)
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        self.assertLess(time.monotonic() - started, 30)
+        self.assertEqual(stats.iterations, 288)
+        self.assertEqual(stats.missed_deadlines, 0)
+        # the first iteration, at time 0, finds no sample yet
+        timestamps = strategy.knowledge.monitored_data["f"].timestamps().tolist()
+        self.assertEqual(len(timestamps), 287 * 5)
+        self.assertEqual(timestamps[:2], [1700000060, 1700000120])
+        self.assertEqual(timestamps[-1], 1700000000 + 287 * 300)
+
+    def test_wait_until_ready_times_out_on_virtual_time(self):
+        clock = VirtualClock()
+        exemplar = StandInExemplar(clock=clock)
+        with self.assertLogs(level="ERROR"), self.assertRaises(ExemplarNotReady):
+            exemplar.wait_until_ready(timeout=600)
+        self.assertEqual(clock.monotonic(), 600)
+
+    def test_replay_follows_the_recorded_time(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.trace")
+            exemplar = StandInExemplar(DemoModel(seed=0), auto_start=True, clock=VirtualClock(epoch=5000))
+            strategy = DemoStrategy(exemplar)
+            try:
+                strategy.bootstrap(cache=False)
+                with record(strategy, path):
+                    MAPEKLoop(strategy, period=30).run(iterations=10)
+            finally:
+                strategy.transport.close()
+                exemplar.stop_container()
+            replayed = DemoStrategy(ReplayExemplar(path))
+            replay(replayed)
+        timestamps = replayed.knowledge.monitored_data["f"].timestamps().tolist()
+        self.assertEqual(timestamps, strategy.knowledge.monitored_data["f"].timestamps().tolist())
+        self.assertEqual(timestamps, [5000 + 30 * tick for tick in range(10)])
+        self.assertEqual(replayed.clock.time(), 5270)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import unittest
+
+import numpy as np
+
+from UPISAS.columnar import Column, ColumnarStore
+from UPISAS.events import events
+from UPISAS.knowledge import Knowledge
+from UPISAS.strategies.swim_reactive_strategy import ReactiveAdaptationManager
+
+SWIM_SAMPLE = {"max_servers": 3, "servers": 2, "active_servers": 2, "dimmer_factor": 0.5,
+               "utilization": [{"utilization_value": 0.7}, {"utilization_value": 0.6}],
+               "basic_rt": 0.3, "opt_rt": 0.4, "basic_throughput": 5.0, "opt_throughput": 6.0,
+               "arrival_rate": 11.0}
+
+
+class TestColumnarStore(unittest.TestCase):
+    """
+    Test cases for the columnar store backing Knowledge.monitored_data.
+    """
+
+    def setUp(self):
+        self.store = ColumnarStore()
+
+    def test_columns_typed_from_values(self):
+        for i in range(100):
+            self.store.append({"f": i / 2, "n": i, "on": i % 2 == 0, "list": [i]})
+        self.assertEqual(self.store["f"].dtype, np.float64)
+        self.assertEqual(self.store["n"].dtype, np.int64)
+        self.assertEqual(self.store["on"].dtype, np.bool_)
+        self.assertIsNone(self.store["list"].dtype)
+        self.assertEqual(len(self.store["f"]), 100)
+        self.assertEqual(self.store["list"][-1], [99])
+
+    def test_columns_typed_from_schema(self):
+        schema = {"type": "object", "properties": {"f": {"type": "number"}, "s": {"type": "array"}}}
+        self.store.append({"f": 1.0, "s": [1, 2]}, schema)
+        self.assertEqual(self.store["f"].dtype, np.float64)
+        self.assertIsNone(self.store["s"].dtype)
+
+    def test_int_column_promoted_to_float(self):
+        self.store.append({"f": 1})
+        self.store.append({"f": 2.5})
+        self.assertEqual(self.store["f"].dtype, np.float64)
+        self.assertEqual(self.store["f"], [1.0, 2.5])
+
+    def test_column_degrades_to_list_on_unexpected_value(self):
+        self.store.append({"f": 1.5})
+        self.store.append({"f": None})
+        self.assertIsNone(self.store["f"].dtype)
+        self.assertEqual(self.store["f"], [1.5, None])
+
+    def test_list_like_access(self):
+        for value in [1.0, 2.0, 3.0]:
+            self.store.append({"f": value})
+        column = self.store["f"]
+        self.assertIsInstance(column[-1], float)
+        self.assertEqual(sum(column) / len(column), 2.0)
+        self.assertEqual(column, [1.0, 2.0, 3.0])
+        self.assertTrue(column > [1.0, 1.0])
+        with self.assertRaises(IndexError):
+            column[3]
+        # compared like a list with anything else
+        self.assertFalse(column == 5)
+        self.assertFalse(column == None)
+        self.assertTrue(column != (1.0, 2.0, 3.0))
+        with self.assertRaises(TypeError):
+            column < 5
+        with self.assertRaises(TypeError):
+            hash(column)
+
+    def test_to_dict_is_json_serializable(self):
+        self.store.extend([{"f": 1.5, "s": "a"}, {"f": 2.5, "s": "b"}])
+        self.assertEqual(json.loads(json.dumps(self.store.to_dict())), {"f": [1.5, 2.5], "s": ["a", "b"]})
+
+    def test_zero_copy_slices(self):
+        for value in range(10):
+            self.store.append({"f": float(value)})
+        column = self.store["f"]
+        window = column.window(3)
+        self.assertEqual(window.tolist(), [7.0, 8.0, 9.0])
+        self.assertTrue(np.shares_memory(window, column.values()))
+        self.assertTrue(np.shares_memory(column[2:5], column.values()))
+
+    def test_latest(self):
+        self.assertEqual(self.store.latest(), {})
+        self.store.append({"f": 1.0, "n": 1})
+        self.store.append({"f": 2.0, "n": 2})
+        self.assertEqual(self.store.latest(), {"f": 2.0, "n": 2})
+        with self.assertRaises(IndexError):
+            Column(np.float64).latest()
+
+    def test_extend_in_bulk(self):
+        self.store.append({"f": 1, "s": "a"}, timestamp=0.0)
+        self.store.extend([{"f": 2, "s": "b"}, {"f": 3.5}, {"f": 4, "s": "d"}] * 10,
+                          timestamps=[float(i) for i in range(1, 31)])
+        self.assertEqual(self.store["f"].dtype, np.float64)
+        self.assertEqual(len(self.store["f"]), 31)
+        self.assertEqual(self.store["f"][:4].tolist(), [1.0, 2.0, 3.5, 4.0])
+        self.assertEqual(self.store["s"][:3], ["a", "b", "d"])
+        self.assertEqual(self.store["f"].timestamps().tolist(), [float(i) for i in range(31)])
+
+    def test_knowledge_adds_samples_in_bulk(self):
+        knowledge = Knowledge(dict(), dict(), dict(), dict(), dict(), dict(), dict())
+        knowledge.add_monitored_samples([{"f": 1.0}, {"f": 2.0}])
+        self.assertEqual(knowledge.monitored_data, {"f": [1.0, 2.0]})
+
+    def test_knowledge_keeps_plain_dict_support(self):
+        knowledge = Knowledge(dict(), dict(), dict(), dict(), dict(), dict(), dict())
+        knowledge.add_monitored_data({"f": 1.0})
+        self.assertEqual(knowledge.monitored_data, {"f": [1.0]})
+
+    def test_swim_reactive_strategy_on_columnar_store(self):
+        strategy = ReactiveAdaptationManager.__new__(ReactiveAdaptationManager)
+        strategy.knowledge = Knowledge(ColumnarStore(), dict(), dict(), dict(), dict(), dict(), dict())
+        strategy.events = events.child()
+        for _ in range(3):
+            strategy.knowledge.add_monitored_data(SWIM_SAMPLE)
+        self.assertTrue(strategy.analyze())
+        self.assertTrue(strategy.plan())
+        self.assertEqual(strategy.knowledge.plan_data, {"dimmer_factor": 0.6, "server_number": 2})
+        self.assertIsInstance(strategy.knowledge.plan_data["server_number"], int)
+
+
+if __name__ == '__main__':
+    unittest.main()
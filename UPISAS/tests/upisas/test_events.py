@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import unittest
+
+from UPISAS.events import EventLog, Event, write_events_to, events
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel
+from UPISAS.strategies.demo_strategy import DemoStrategy
+
+
+class ExplodingRepr:
+    """ A monitored value which fails the test if it is ever turned into text. """
+
+    def __repr__(self):
+        raise AssertionError("the value was formatted")
+
+    __str__ = __repr__
+
+
+class TestEvents(unittest.TestCase):
+    """
+    Test cases for the structured events of the MAPE-K loop.
+    """
+
+    def setUp(self):
+        self.log = EventLog(logger_name="UPISAS.tests.events", rate=None)
+        self.log.logger.setLevel(logging.INFO)
+
+    def _fields(self, cm):
+        return [record.msg.fields for record in cm.records]
+
+    def test_level_gated(self):
+        called = []
+        with self.assertNoLogs(self.log.logger):
+            self.assertFalse(self.log.emit("monitor", logging.DEBUG, size=lambda: called.append(1)))
+            self.assertFalse(self.log.delta("monitor", {"a": 1}, level=logging.DEBUG))
+        self.assertEqual(called, [])
+
+    def test_lazy_fields(self):
+        with self.assertLogs(self.log.logger) as cm:
+            self.log.emit("knowledge", samples=lambda: 3, name="demo")
+        self.assertEqual(self._fields(cm), [{"samples": 3, "name": "demo"}])
+        self.assertEqual(cm.output, ["INFO:UPISAS.tests.events:[knowledge] samples=3 name='demo'"])
+
+    def test_delta_only_changed_keys(self):
+        with self.assertLogs(self.log.logger) as cm:
+            self.log.delta("monitor", {"x": 1, "y": 2})
+            self.log.delta("monitor", {"x": 1, "y": 3})
+            self.assertFalse(self.log.delta("monitor", {"x": 1, "y": 3}))
+            self.log.reset("monitor")
+            self.log.delta("monitor", {"x": 1, "y": 3})
+        self.assertEqual(self._fields(cm), [{"x": 1, "y": 2}, {"y": 3}, {"x": 1, "y": 3}])
+
+    def test_rate_limited(self):
+        self.log.set_rate("execute", 2)
+        with self.assertLogs(self.log.logger) as cm:
+            logged = [self.log.emit("execute", i=i) for i in range(5)]
+            self.log.emit("monitor")
+        self.assertEqual(logged, [True, True, False, False, False])
+        # the bucket refills at 2 tokens per second
+        self.log._buckets["execute"] = (1, self.log._buckets["execute"][1], 3)
+        with self.assertLogs(self.log.logger) as cm:
+            self.log.emit("execute", i=5)
+        self.assertEqual(self._fields(cm), [{"i": 5, "suppressed": 3}])
+
+    def test_delta_kept_when_rate_limited(self):
+        self.log.set_rate("monitor", 1)
+        with self.assertLogs(self.log.logger) as cm:
+            self.log.delta("monitor", {"x": 1})
+            self.assertFalse(self.log.delta("monitor", {"x": 2}))
+            self.log._buckets["monitor"] = (1, self.log._buckets["monitor"][1], 0)
+            self.log.delta("monitor", {"x": 2})
+        self.assertEqual(self._fields(cm), [{"x": 1}, {"x": 2}])
+
+    def test_long_values_shortened(self):
+        self.assertEqual(len(str(Event("monitor", {"x": "a" * 1000}))), len("[monitor] x=") + 200 + 3)
+
+    def test_written_off_thread(self):
+        threads = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.jsonl")
+            writer = write_events_to(path, event_log=self.log)
+            original_format = writer.file_handler.formatter.format
+
+            def format(record):
+                threads.append(threading.current_thread())
+                return original_format(record)
+
+            writer.file_handler.formatter.format = format
+            self.log.emit("execute", adaptation={"x": 2})
+            self.log.emit("analysis", mean_f=0.5)
+            writer.stop()
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+            # detached: nothing reaches the file after stop
+            self.log.emit("execute", adaptation={"x": 3})
+        self.assertEqual([(line["event"], line["level"]) for line in lines], [("execute", "INFO"), ("analysis", "INFO")])
+        self.assertEqual(lines[0]["adaptation"], {"x": 2})
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertFalse(self.log.logger.handlers)
+
+    def test_monitor_does_not_format_history(self):
+        exemplar = StandInExemplar(DemoModel(), auto_start=True)
+        strategy = DemoStrategy(exemplar)
+        try:
+            strategy.monitor()
+            strategy.knowledge.monitored_data["history"] = [ExplodingRepr()]
+            strategy.events.reset("monitor")
+            with self.assertLogs(events.logger) as cm:
+                strategy.monitor(verbose=True)
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        names = [record.msg.name for record in cm.records]
+        self.assertIn("monitor", names)
+        self.assertEqual(cm.records[names.index("knowledge")].msg.fields, {"keys": 2, "samples": 2})
+
+    def test_strategies_keep_their_own_deltas(self):
+        exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True)
+        strategies = [DemoStrategy(exemplar), DemoStrategy(exemplar)]
+        try:
+            with self.assertLogs(events.logger) as cm:
+                for strategy in strategies + strategies:
+                    strategy.monitor(verbose=True)
+        finally:
+            for strategy in strategies:
+                strategy.transport.close()
+            exemplar.stop_container()
+        # the same value, monitored by both strategies, is a change for each of them once
+        self.assertEqual([record.msg.fields for record in cm.records if record.msg.name == "monitor"],
+                         [{"f": 0.4}, {"f": 0.4}])
+
+    def test_children_keep_their_own_rate_budgets(self):
+        self.log.rate = 1
+        children = [self.log.child(), pickle.loads(pickle.dumps(self.log.child()))]
+        with self.assertLogs(self.log.logger) as cm:
+            for child in children + children:
+                child.emit("tick")
+        self.assertEqual(len(cm.records), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
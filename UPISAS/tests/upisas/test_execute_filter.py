@@ -0,0 +1,127 @@
+import unittest
+
+import jsonschema
+
+from UPISAS.clock import VirtualClock
+from UPISAS.exceptions import ServerNotReachable
+from UPISAS.execute_filter import ExecuteFilter
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel
+from UPISAS.loop import MAPEKLoop
+from UPISAS.strategies.demo_strategy import DemoStrategy
+
+
+class RecordingSend:
+    def __init__(self, acknowledge=True):
+        self.acknowledge = acknowledge
+        self.sent = []
+
+    def __call__(self, adaptation):
+        self.sent.append(dict(adaptation))
+        return self.acknowledge
+
+
+class TestExecuteFilter(unittest.TestCase):
+    """
+    Test cases for the deduplication and coalescing of the adaptations sent by execute.
+    """
+
+    def test_duplicates_suppressed(self):
+        execute_filter, send = ExecuteFilter(deduplicate=True), RecordingSend()
+        plan = {"server_number": 2, "dimmer_factor": 0.5}
+        self.assertTrue(execute_filter.submit(plan, send))
+        self.assertFalse(execute_filter.submit(plan, send))
+        # plans updated in place are compared with what was acknowledged, not with the same object
+        plan["dimmer_factor"] = 0.6
+        self.assertTrue(execute_filter.submit(plan, send))
+        self.assertTrue(execute_filter.submit(plan, send, force=True))
+        self.assertEqual(len(send.sent), 3)
+        self.assertEqual((execute_filter.stats.submitted, execute_filter.stats.suppressed), (4, 1))
+
+    def test_unacknowledged_sent_again(self):
+        execute_filter, send = ExecuteFilter(deduplicate=True), RecordingSend(acknowledge=False)
+        execute_filter.submit({"x": 1}, send)
+        execute_filter.submit({"x": 1}, send)
+        self.assertEqual(len(send.sent), 2)
+
+    def test_forget(self):
+        execute_filter, send = ExecuteFilter(deduplicate=True), RecordingSend()
+        execute_filter.submit({"x": 1}, send)
+        execute_filter.forget()
+        execute_filter.submit({"x": 1}, send)
+        self.assertEqual(len(send.sent), 2)
+
+    def test_failed_send_not_acknowledged(self):
+        def unreachable(adaptation):
+            raise ServerNotReachable
+        execute_filter, send = ExecuteFilter(deduplicate=True), RecordingSend()
+        execute_filter.submit({"x": 1}, send)
+        with self.assertRaises(ServerNotReachable):
+            execute_filter.submit({"x": 2}, unreachable)
+        execute_filter.submit({"x": 1}, send)
+        self.assertEqual(len(send.sent), 2)
+
+    def test_coalesced_within_window(self):
+        clock = VirtualClock()
+        execute_filter, send = ExecuteFilter(coalesce_window=10, clock=clock), RecordingSend()
+        execute_filter.submit({"x": 1}, send)
+        for x in range(2, 6):
+            clock.advance(1)
+            self.assertFalse(execute_filter.submit({"x": x}, send))
+        clock.advance(5.5)
+        self.assertEqual(send.sent, [{"x": 1}])
+        clock.advance(0.5)
+        self.assertEqual(send.sent, [{"x": 1}, {"x": 5}])
+        self.assertEqual((execute_filter.stats.sent, execute_filter.stats.coalesced), (2, 3))
+
+    def test_flush_sends_pending(self):
+        execute_filter, send = ExecuteFilter(coalesce_window=10), RecordingSend()
+        execute_filter.submit({"x": 1}, send)
+        execute_filter.submit({"x": 2}, send)
+        execute_filter.flush()
+        self.assertEqual(send.sent, [{"x": 1}, {"x": 2}])
+
+    def test_back_to_acknowledged_cancels_pending(self):
+        execute_filter, send = ExecuteFilter(deduplicate=True, coalesce_window=10), RecordingSend()
+        execute_filter.submit({"x": 1}, send)
+        execute_filter.submit({"x": 2}, send)
+        execute_filter.submit({"x": 1}, send)
+        execute_filter.flush()
+        self.assertEqual(send.sent, [{"x": 1}])
+
+    def test_not_deduplicated_by_default(self):
+        execute_filter, send = ExecuteFilter(), RecordingSend()
+        execute_filter.submit({"x": 1}, send)
+        execute_filter.submit({"x": 1}, send)
+        self.assertEqual(len(send.sent), 2)
+
+    def test_demo_strategy_sends_unchanged_plan_once(self):
+        exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True)
+        try:
+            strategy = DemoStrategy(exemplar, execute_filter=ExecuteFilter(deduplicate=True))
+            MAPEKLoop(strategy, period=0).run(iterations=5)
+            strategy.transport.close()
+            changes = [line for line in exemplar.exemplar_container.logs().decode().splitlines()
+                       if line.startswith("Got value changes")]
+            self.assertEqual(len(changes), 1)
+            self.assertEqual(strategy.execute_filter.stats.suppressed, 4)
+        finally:
+            exemplar.stop_container()
+
+    def test_duplicates_still_validated(self):
+        exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True)
+        strategy = DemoStrategy(exemplar, execute_filter=ExecuteFilter(deduplicate=True))
+        invalid = {"x": "two", "y": 5}
+        strategy.execute_filter.last_acknowledged = dict(invalid)
+        try:
+            with self.assertLogs(level="ERROR"), self.assertRaises(jsonschema.exceptions.ValidationError):
+                strategy.execute(invalid)
+            with self.assertLogs(level="ERROR"), self.assertRaises(jsonschema.exceptions.ValidationError):
+                strategy.execute(invalid, force=True)
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        self.assertEqual(strategy.execute_filter.stats.submitted, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
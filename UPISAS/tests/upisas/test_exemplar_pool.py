@@ -0,0 +1,150 @@
+import itertools
+import queue
+import threading
+import time
+import unittest
+
+from UPISAS.exemplar_pool import ExemplarPool, RESTART, REPLACE
+
+
+class FakeContainer:
+    def __init__(self):
+        self.restarts = 0
+
+    def restart(self):
+        self.restarts += 1
+
+
+class FakeExemplar:
+    """ Stands in for an Exemplar, tracking the container lifecycle calls of the pool. """
+    ids = itertools.count()
+
+    def __init__(self):
+        self.id = next(self.ids)
+        self.base_endpoint = f"http://localhost:{3000 + self.id}"
+        self.status = "created"
+        self.exemplar_container = FakeContainer()
+        self.ready_probes = 0
+
+    def start_container(self):
+        self.status = "running"
+        return True
+
+    def stop_container(self, remove=True):
+        self.status = "removed"
+        return True
+
+    def get_container_status(self):
+        return self.status
+
+    def wait_until_ready(self, probe=None, timeout=60):
+        self.ready_probes += 1
+        return 0.0
+
+
+class TestExemplarPool(unittest.TestCase):
+    """
+    Test cases for the warm pool of exemplars, using fake exemplars instead of containers.
+    """
+
+    def setUp(self):
+        self.created = []
+        self.lock = threading.Lock()
+
+    def _factory(self):
+        exemplar = FakeExemplar()
+        with self.lock:
+            self.created.append(exemplar)
+        return exemplar
+
+    def test_exemplars_created_and_started_ahead(self):
+        with ExemplarPool(self._factory, size=3, ready_probe=object()) as pool:
+            exemplars = [pool.acquire(timeout=1) for _ in range(3)]
+            self.assertEqual(len(set(exemplars)), 3)
+            for exemplar in exemplars:
+                self.assertEqual(exemplar.get_container_status(), "running")
+                self.assertEqual(exemplar.ready_probes, 1)
+            with self.assertRaises(queue.Empty):
+                pool.acquire(timeout=0.05)
+
+    def test_replace_on_release(self):
+        with ExemplarPool(self._factory, size=1, recycle=REPLACE) as pool:
+            first = pool.acquire(timeout=1)
+            pool.release(first)
+            second = pool.acquire(timeout=1)
+            self.assertIsNot(first, second)
+            self.assertEqual(first.get_container_status(), "removed")
+            self.assertEqual(second.get_container_status(), "running")
+
+    def test_restart_on_release(self):
+        with ExemplarPool(self._factory, size=1, recycle=RESTART) as pool:
+            first = pool.acquire(timeout=1)
+            pool.release(first)
+            second = pool.acquire(timeout=1)
+            self.assertIs(first, second)
+            self.assertEqual(first.exemplar_container.restarts, 1)
+        self.assertEqual(len(self.created), 1)
+
+    def test_close_removes_all_containers(self):
+        pool = ExemplarPool(self._factory, size=2)
+        in_use = pool.acquire(timeout=1)
+        pool.close()
+        self.assertEqual(len(self.created), 2)
+        for exemplar in self.created:
+            self.assertEqual(exemplar.get_container_status(), "removed")
+        self.assertEqual(in_use.get_container_status(), "removed")
+        with self.assertRaises(RuntimeError):
+            pool.acquire()
+
+    def test_release_racing_close(self):
+        pool = ExemplarPool(self._factory, size=1, recycle=RESTART)
+        exemplar = pool.acquire(timeout=1)
+        submitting = threading.Event()
+        submit = pool._workers.submit
+
+        def slow_submit(*args):
+            # close() is called while release() is between its check and the submit
+            submitting.set()
+            time.sleep(0.1)
+            return submit(*args)
+
+        pool._workers.submit = slow_submit
+        errors = []
+        releasing = threading.Thread(target=lambda: self._catch(errors, pool.release, exemplar))
+        releasing.start()
+        submitting.wait(timeout=1)
+        pool.close()
+        releasing.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(exemplar.exemplar_container.restarts, 1)
+        self.assertEqual(exemplar.get_container_status(), "removed")
+
+    def _catch(self, errors, function, *args):
+        try:
+            function(*args)
+        except Exception as e:
+            errors.append(e)
+
+    def test_failed_provisioning_is_raised_then_retried(self):
+        attempts = []
+
+        def flaky_factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("docker daemon unavailable")
+            return self._factory()
+
+        with ExemplarPool(flaky_factory, size=1) as pool:
+            with self.assertRaises(OSError):
+                pool.acquire(timeout=1)
+            self.assertEqual(pool.acquire(timeout=1).get_container_status(), "running")
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            ExemplarPool(self._factory, size=0)
+        with self.assertRaises(ValueError):
+            ExemplarPool(self._factory, recycle="reuse")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import docker
+
+from UPISAS.exceptions import DockerImageNotFoundOnDockerHub
+from UPISAS.exemplar import Exemplar
+from UPISAS.images import ImageCache, resolve_image, pull_image, prepull
+
+
+class FakeImages:
+    def __init__(self, local):
+        self.local = local
+        self.gets = 0
+
+    def get(self, image_name):
+        self.gets += 1
+        if image_name not in self.local:
+            raise docker.errors.ImageNotFound(image_name)
+        return mock.Mock(id=self.local[image_name])
+
+
+class FakeApi:
+    def __init__(self, images, remote):
+        self.images = images
+        self.remote = remote
+        self.pulls = []
+
+    def pull(self, image_name, stream=True, decode=True):
+        self.pulls.append(image_name)
+        if image_name not in self.remote:
+            yield {"error": f"pull access denied for {image_name}"}
+            return
+        yield {"status": "Downloading", "id": "layer", "progressDetail": {"current": 1, "total": 2}}
+        yield {"status": "Downloading", "id": "layer", "progressDetail": {"current": 2, "total": 2}}
+        self.images.local[image_name] = self.remote[image_name]
+
+
+class FakeContainers:
+    def __init__(self, images):
+        self.images = images
+
+    def create(self, image, **kwargs):
+        return mock.Mock(attrs={"Image": self.images.local[image]})
+
+
+class FakeDockerClient:
+    def __init__(self, local=None, remote=None):
+        self.images = FakeImages(dict(local or {}))
+        self.api = FakeApi(self.images, dict(remote or {}))
+        self.containers = FakeContainers(self.images)
+
+
+class FakeExemplar(Exemplar):
+    def start_run(self):
+        pass
+
+
+class TestImages(unittest.TestCase):
+    """
+    Test cases for the image resolution cache and the pre-pulling of images, with a fake Docker client.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ImageCache(os.path.join(self.directory.name, "images.json"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_local_image_resolved_then_cached(self):
+        client = FakeDockerClient(local={"owner/demo": "sha256:1"})
+        self.assertEqual(resolve_image(client, "owner/demo", self.cache), "sha256:1")
+        self.assertEqual(resolve_image(client, "owner/demo", self.cache), "sha256:1")
+        self.assertEqual(client.images.gets, 1)
+        self.assertEqual(client.api.pulls, [])
+
+    def test_cache_persisted(self):
+        self.cache.put("owner/demo", "sha256:1")
+        self.assertEqual(ImageCache(self.cache.path).get("owner/demo"), "sha256:1")
+
+    def test_cache_expires(self):
+        cache = ImageCache(self.cache.path, ttl=0.01)
+        cache.put("owner/demo", "sha256:1")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("owner/demo"))
+
+    def test_invalidate(self):
+        self.cache.put("owner/demo", "sha256:1")
+        self.cache.invalidate("owner/demo")
+        self.assertIsNone(ImageCache(self.cache.path).get("owner/demo"))
+
+    def test_missing_image_pulled_without_registry_search(self):
+        client = FakeDockerClient(remote={"owner/swim:http": "sha256:2"})
+        self.assertEqual(resolve_image(client, "owner/swim:http", self.cache), "sha256:2")
+        self.assertEqual(client.api.pulls, ["owner/swim:http"])
+
+    def test_image_not_found_on_dockerhub(self):
+        with self.assertRaises(DockerImageNotFoundOnDockerHub):
+            pull_image(FakeDockerClient(), "very_strange_image_name_3456876", progress=mock.Mock())
+
+    def test_prepull_concurrently(self):
+        client = FakeDockerClient(remote={"owner/a": "sha256:a", "owner/b": "sha256:b"})
+        with mock.patch("docker.from_env", return_value=client):
+            resolved = prepull(["owner/a", "owner/b", "owner/a"], cache=self.cache)
+        self.assertEqual(resolved, {"owner/a": "sha256:a", "owner/b": "sha256:b"})
+        self.assertEqual(sorted(client.api.pulls), ["owner/a", "owner/b"])
+
+
+    def test_exemplar_image_id_from_its_container(self):
+        # the tag was rebuilt since it was cached
+        client = FakeDockerClient(local={"owner/demo": "sha256:new"})
+        with mock.patch("docker.from_env", return_value=client), \
+                mock.patch("UPISAS.exemplar.resolve_image", return_value="sha256:old"):
+            exemplar = FakeExemplar("http://localhost:3000", {"image": "owner/demo"})
+        self.assertEqual(exemplar.image_id, "sha256:new")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import threading
+import unittest
+
+from UPISAS.clock import VirtualClock, system_clock
+from UPISAS.loop import MAPEKLoop, SKIP, CATCH_UP
+
+
+class RecordingStrategy:
+    """ Stands in for a Strategy, recording the start time of each iteration on its clock. """
+
+    def __init__(self, analyze_seconds=0.0, slow_iterations=(), fetch_seconds=0.0, execute_seconds=0.0,
+                 clock=system_clock):
+        self.clock = clock
+        self.analyze_seconds = analyze_seconds
+        self.slow_iterations = slow_iterations
+        self.fetch_seconds = fetch_seconds
+        self.execute_seconds = execute_seconds
+        self.monitor_times = []
+        # (start, end) of every fetch_monitored_data and analyze
+        self.fetch_intervals = []
+        self.analyze_intervals = []
+        self.fetched = 0
+        self.monitored = []
+        self.executed = 0
+        self.executed_plans = []
+        self.execute_threads = set()
+        self.knowledge = type("Knowledge", (), {"plan_data": {}})()
+
+    def fetch_monitored_data(self):
+        started = self.clock.monotonic()
+        self.clock.sleep(self.fetch_seconds)
+        self.fetched += 1
+        self.fetch_intervals.append((started, self.clock.monotonic()))
+        return {"sample": self.fetched}
+
+    def monitor(self, with_validation=True, verbose=False, fresh_data=None):
+        self.monitor_times.append(self.clock.monotonic())
+        self.monitored.append(fresh_data if fresh_data is not None else self.fetch_monitored_data())
+        return True
+
+    def analyze(self):
+        started = self.clock.monotonic()
+        if len(self.monitor_times) - 1 in self.slow_iterations or not self.slow_iterations:
+            self.clock.sleep(self.analyze_seconds)
+        self.analyze_intervals.append((started, self.clock.monotonic()))
+        return True
+
+    def plan(self):
+        self.knowledge.plan_data["iteration"] = len(self.monitor_times)
+        return len(self.monitor_times) % 2 == 0
+
+    def execute(self, adaptation=None, with_validation=True):
+        self.clock.sleep(self.execute_seconds)
+        self.executed += 1
+        self.executed_plans.append(adaptation if adaptation else dict(self.knowledge.plan_data))
+        self.execute_threads.add(threading.current_thread())
+        return True
+
+
+class TestMAPEKLoop(unittest.TestCase):
+    """
+    Test cases for the fixed-rate MAPE-K loop driver. The scheduling is tested on a virtual clock, exactly.
+    """
+
+    def test_runs_at_fixed_period_without_drift(self):
+        strategy = RecordingStrategy(analyze_seconds=0.125, clock=VirtualClock())
+        stats = MAPEKLoop(strategy, period=0.25).run(iterations=10)
+        self.assertEqual(stats.iterations, 10)
+        self.assertEqual(stats.adaptations, 5)
+        self.assertEqual(strategy.executed, 5)
+        self.assertEqual(strategy.monitor_times, [0.25 * tick for tick in range(10)])
+        self.assertEqual(stats.missed_deadlines, 0)
+        self.assertEqual(stats.max_jitter, 0)
+
+    def test_duration(self):
+        clock = VirtualClock()
+        stats = MAPEKLoop(RecordingStrategy(clock=clock), period=60).run(duration=3600)
+        self.assertEqual(stats.iterations, 60)
+        self.assertEqual(clock.monotonic(), 59 * 60)
+
+    def test_skip_overrun(self):
+        strategy = RecordingStrategy(analyze_seconds=0.625, slow_iterations=(0,), clock=VirtualClock())
+        with self.assertLogs(level="WARNING"):
+            stats = MAPEKLoop(strategy, period=0.25, overrun=SKIP).run(iterations=3)
+        self.assertEqual(stats.missed_deadlines, 1)
+        self.assertEqual(stats.skipped_ticks, 2)
+        # the iteration after the overrun waits for the next tick still ahead
+        self.assertEqual(strategy.monitor_times, [0, 0.75, 1.0])
+
+    def test_catch_up_overrun(self):
+        strategy = RecordingStrategy(analyze_seconds=0.625, slow_iterations=(0,), clock=VirtualClock())
+        with self.assertLogs(level="WARNING"):
+            stats = MAPEKLoop(strategy, period=0.25, overrun=CATCH_UP).run(iterations=4)
+        # the slow iteration and the first late one end after their deadlines
+        self.assertEqual(stats.missed_deadlines, 2)
+        self.assertEqual(stats.skipped_ticks, 0)
+        # the late iterations run back to back
+        self.assertEqual(strategy.monitor_times, [0, 0.625, 0.625, 0.75])
+        self.assertEqual(stats.max_jitter, 0.375)
+
+    def test_clock_of_the_strategy(self):
+        clock = VirtualClock()
+        self.assertIs(MAPEKLoop(RecordingStrategy(clock=clock), period=1).clock, clock)
+        self.assertIs(MAPEKLoop(object(), period=1).clock, system_clock)
+
+    def test_pipelined_overlaps_monitor_with_analyze(self):
+        pipelined = RecordingStrategy(analyze_seconds=0.03, fetch_seconds=0.03)
+        MAPEKLoop(pipelined, period=0, pipelined=True).run(iterations=6)
+        self.assertEqual([sample["sample"] for sample in pipelined.monitored], [1, 2, 3, 4, 5, 6])
+        # the fetch of the next iteration runs during the analyze of the current one
+        for (fetch_start, fetch_end), (analyze_start, analyze_end) in zip(pipelined.fetch_intervals[1:],
+                                                                          pipelined.analyze_intervals):
+            self.assertLess(fetch_start, analyze_end)
+            self.assertGreater(fetch_end, analyze_start)
+
+    def test_pipelined_prefetches_at_the_tick(self):
+        strategy = RecordingStrategy(analyze_seconds=0.25, clock=VirtualClock())
+        MAPEKLoop(strategy, period=1, pipelined=True).run(iterations=5)
+        # the data of each iteration is fetched at its tick, not one period earlier
+        self.assertEqual([start for start, _ in strategy.fetch_intervals], [0, 1, 2, 3, 4])
+        self.assertEqual(strategy.monitor_times, [0, 1, 2, 3, 4])
+
+    def test_async_execute_keeps_order(self):
+        strategy = RecordingStrategy(execute_seconds=0.01)
+        stats = MAPEKLoop(strategy, period=0, async_execute=True).run(iterations=10)
+        self.assertEqual(stats.adaptations, 5)
+        self.assertEqual([plan["iteration"] for plan in strategy.executed_plans], [2, 4, 6, 8, 10])
+        self.assertNotIn(threading.current_thread(), strategy.execute_threads)
+
+    def test_workers_shut_down(self):
+        threads = threading.active_count()
+        for _ in range(5):
+            loop = MAPEKLoop(RecordingStrategy(), period=0, pipelined=True, async_execute=True)
+            loop.run(iterations=4)
+        self.assertEqual(threading.active_count(), threads)
+        # and started again by a later run
+        self.assertEqual(loop.run(iterations=2).iterations, 6)
+
+    def test_async_execute_failure_is_raised(self):
+        strategy = RecordingStrategy()
+        strategy.execute = lambda adaptation=None, with_validation=True: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            MAPEKLoop(strategy, period=0, async_execute=True).run(iterations=2)
+
+    def test_held_back_adaptation_flushed_despite_failure(self):
+        strategy = RecordingStrategy()
+        strategy.execute = lambda adaptation=None, with_validation=True: 1 / 0
+        flushed = []
+        strategy.flush_execute = lambda: flushed.append(True)
+        with self.assertRaises(ZeroDivisionError):
+            MAPEKLoop(strategy, period=0, async_execute=True).run(iterations=2)
+        self.assertEqual(flushed, [True])
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            MAPEKLoop(RecordingStrategy(), period=1, overrun="wait")
+        with self.assertRaises(ValueError):
+            MAPEKLoop(RecordingStrategy(), period=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
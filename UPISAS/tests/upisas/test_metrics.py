@@ -0,0 +1,110 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from UPISAS.metrics import Histogram, Metrics
+from UPISAS.strategies.demo_strategy import DemoStrategy
+
+
+class DemoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    responses = {"/monitor": {"f": 1.5},
+                 "/monitor_schema": {"type": "object", "properties": {"f": {"type": "number"}}},
+                 "/execute_schema": {"type": "object",
+                                     "properties": {"x": {"type": "number"}, "y": {"type": "number"}}}}
+
+    def _send(self, body):
+        body = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send(self.responses[self.path])
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self._send("ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class AddressOnlyExemplar:
+    def __init__(self, base_endpoint):
+        self.base_endpoint = base_endpoint
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Test cases for the histograms and the instrumentation of the Strategy.
+    """
+
+    def test_histogram(self):
+        histogram = Histogram(buckets=(1, 2, 4, 8))
+        for value in [0.5, 1.5, 3, 3, 7, 100]:
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 1, 2, 1, 1])
+        self.assertEqual(histogram.count, 6)
+        self.assertEqual(histogram.min, 0.5)
+        self.assertEqual(histogram.max, 100)
+        self.assertEqual(histogram.quantile(0.5), 4)
+        self.assertEqual(histogram.quantile(1.0), 100)
+
+    def test_disabled_metrics_record_nothing(self):
+        metrics = Metrics(enabled=False)
+        with metrics.phase("analyze"):
+            pass
+        metrics.observe("validation_seconds", 1.0)
+        self.assertEqual(metrics.histograms, {})
+
+    def test_exports(self):
+        metrics = Metrics()
+        metrics.observe("monitor_wall_seconds", 0.002)
+        metrics.observe("monitor_wall_seconds", 0.004)
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE upisas_monitor_wall_seconds histogram", text)
+        self.assertIn('upisas_monitor_wall_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn("upisas_monitor_wall_seconds_count 2", text)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.csv")
+            metrics.to_csv(path)
+            with open(path) as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0]["metric"], "monitor_wall_seconds")
+        self.assertEqual(rows[0]["count"], "2")
+        self.assertAlmostEqual(float(rows[0]["mean"]), 0.003)
+
+    def test_strategy_phases_recorded(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), DemoHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            strategy = DemoStrategy(AddressOnlyExemplar(f"http://127.0.0.1:{server.server_address[1]}"))
+            for _ in range(3):
+                strategy.monitor()
+                strategy.analyze()
+                strategy.plan()
+                strategy.execute()
+            strategy.transport.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+        histograms = strategy.metrics.histograms
+        for phase in ("monitor", "analyze", "plan", "execute"):
+            self.assertEqual(histograms[f"{phase}_wall_seconds"].count, 3)
+            self.assertEqual(histograms[f"{phase}_cpu_seconds"].count, 3)
+        self.assertEqual(histograms["validation_seconds"].count, 6)
+        # monitor and execute schemas, then one monitor per iteration
+        self.assertEqual(histograms["http_get_seconds"].count, 5)
+        self.assertEqual(histograms["http_put_seconds"].count, 3)
+        self.assertGreater(histograms["http_response_bytes"].sum, 0)
+        self.assertGreater(histograms["http_request_bytes"].sum, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import time
+import unittest
+
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel, SWIMModel
+from UPISAS.loop import MAPEKLoop
+from UPISAS.strategies.demo_strategy import DemoStrategy
+from UPISAS.strategies.swim_reactive_strategy import ReactiveAdaptationManager
+
+
+class TestMonitorBatch(unittest.TestCase):
+    """
+    Test cases for the batched monitoring since a cursor, against stand-in exemplars sampled by hand.
+    """
+
+    def setUp(self):
+        # sampled by the tests only, the period is never reached
+        self.exemplar = StandInExemplar(DemoModel(), auto_start=True, sample_period=3600, buffer_size=50)
+        self.container = self.exemplar.exemplar_container
+        self.strategy = DemoStrategy(self.exemplar)
+
+    def tearDown(self):
+        self.strategy.transport.close()
+        self.exemplar.stop_container()
+
+    def _sample(self, count):
+        for _ in range(count):
+            self.container.sample()
+
+    def test_samples_since_cursor(self):
+        self._sample(5)
+        self.assertEqual(self.strategy.monitor_batch(), 5)
+        self.assertEqual(self.strategy.monitor_batch(), 0)
+        self._sample(3)
+        self.assertEqual(self.strategy.monitor_batch(), 3)
+        self.assertEqual(self.strategy.monitor_cursor, 8)
+        monitored = self.strategy.knowledge.monitored_data["f"]
+        self.assertEqual(monitored, [data["f"] for _, _, data in self.container.samples])
+        self.assertEqual(monitored.timestamps().tolist(),
+                         [timestamp for _, timestamp, _ in self.container.samples])
+
+    def test_paged_by_limit(self):
+        self._sample(10)
+        self.assertEqual(self.strategy.monitor_batch(limit=3), 10)
+        self.assertEqual(len(self.strategy.knowledge.monitored_data["f"]), 10)
+
+    def test_dropped_samples_reported(self):
+        self._sample(60)
+        with self.assertLogs(level="WARNING") as cm:
+            self.assertEqual(self.strategy.monitor_batch(), 50)
+        self.assertIn("10 samples were dropped", "\n".join(cm.output))
+
+    def test_cursor_from_before_restart(self):
+        self._sample(5)
+        self.strategy.monitor_batch()
+        self.container.restart()
+        self._sample(2)
+        self.assertEqual(self.strategy.monitor_batch(), 2)
+
+    def test_monitor_answers_latest_sample(self):
+        self._sample(2)
+        self.strategy.monitor()
+        self.assertEqual(self.strategy.knowledge.monitored_data["f"][-1], self.container.samples[-1][2]["f"])
+
+    def test_fallback_on_single_snapshot(self):
+        exemplar = StandInExemplar(DemoModel(), auto_start=True)
+        strategy = DemoStrategy(exemplar)
+        try:
+            with self.assertLogs(level="WARNING"):
+                self.assertEqual(strategy.monitor_batch(), 1)
+            self.assertFalse(strategy.monitor_batch_supported)
+            self.assertEqual(strategy.monitor_batch(), 1)
+            self.assertEqual(len(strategy.knowledge.monitored_data["f"]), 2)
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+
+    def test_batched_loop_on_sampled_swim(self):
+        swim = StandInExemplar(SWIMModel(seed=1), auto_start=True, sample_period=0.002)
+        strategy = ReactiveAdaptationManager(swim)
+        try:
+            loop = MAPEKLoop(strategy, period=0.05, batched=True)
+            loop.run(iterations=4)
+            monitored = strategy.knowledge.monitored_data["arrival_rate"]
+            # all the samples of the run, far more than one per iteration and without duplicates
+            self.assertGreater(len(monitored), 10)
+            timestamps = monitored.timestamps()
+            self.assertTrue((timestamps[1:] > timestamps[:-1]).all())
+        finally:
+            strategy.transport.close()
+            swim.stop_container()
+
+    def test_batched_and_pipelined_rejected(self):
+        with self.assertRaises(ValueError):
+            MAPEKLoop(self.strategy, period=1, pipelined=True, batched=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
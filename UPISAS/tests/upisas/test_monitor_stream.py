@@ -0,0 +1,138 @@
+import threading
+import time
+import unittest
+
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel, _StandInHandler
+from UPISAS.monitor_stream import MonitorStream, adapt
+from UPISAS.strategies.demo_strategy import DemoStrategy
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class HeldStreamHandler(_StandInHandler):
+    """ Holds the subscriptions to the stream until the `release` event of its server is set. """
+
+    def do_GET(self):
+        if self.path.startswith("/monitor_stream"):
+            self.server.connecting.set()
+            self.server.release.wait(timeout=5)
+        super().do_GET()
+
+
+class TestMonitorStream(unittest.TestCase):
+    """
+    Test cases for the push-based monitoring, against a stand-in exemplar sampled by hand.
+    """
+
+    def setUp(self):
+        # sampled by the tests only, the period is never reached
+        self.exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True, sample_period=3600)
+        self.container = self.exemplar.exemplar_container
+        self.strategy = DemoStrategy(self.exemplar)
+
+    def tearDown(self):
+        self.strategy.transport.close()
+        self.exemplar.stop_container()
+
+    def _subscribe(self, **kwargs):
+        stream = MonitorStream(self.strategy, reconnect_delay=0.05, **kwargs).start()
+        self.addCleanup(stream.close)
+        wait_for(lambda: stream.supported is not None)
+        return stream
+
+    def _drain(self, stream, count):
+        drained = 0
+        deadline = time.monotonic() + 5
+        while drained < count and time.monotonic() < deadline:
+            drained += stream.drain(timeout=0.1)
+        return drained
+
+    def test_samples_queued_until_drained(self):
+        stream = self._subscribe()
+        for _ in range(3):
+            self.container.sample()
+        wait_for(lambda: stream.received == 3)
+        self.assertNotIn("f", self.strategy.knowledge.monitored_data)
+        self.assertEqual(self._drain(stream, 3), 3)
+        self.assertEqual(self.strategy.knowledge.monitored_data["f"].timestamps().tolist(),
+                         [timestamp for _, timestamp, _ in self.container.samples])
+        self.assertEqual(self.strategy.monitor_cursor, 3)
+
+    def test_adapt_on_arrival(self):
+        self._subscribe(on_arrival=adapt)
+        self.container.sample()
+        wait_for(lambda: (self.exemplar.model.x, self.exemplar.model.y) == (2, 5))
+        self.assertEqual(len(self.strategy.knowledge.monitored_data["f"]), 1)
+
+    def test_resumes_after_restart(self):
+        stream = self._subscribe()
+        self.container.sample()
+        self.assertEqual(self._drain(stream, 1), 1)
+        self.container.restart()
+        # the stream reconnects with Last-Event-ID 1, from before the restart
+        deadline = time.monotonic() + 5
+        while stream.drain(timeout=0.1) == 0 and time.monotonic() < deadline:
+            self.container.sample()
+        self.assertEqual(len(self.strategy.knowledge.monitored_data["f"]), 2)
+
+    def test_unsupported(self):
+        exemplar = StandInExemplar(DemoModel(), auto_start=True)
+        strategy = DemoStrategy(exemplar)
+        try:
+            with self.assertLogs(level="ERROR"):
+                stream = strategy.subscribe()
+                wait_for(lambda: stream.supported is not None)
+            self.assertFalse(stream.supported)
+            stream.close()
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+
+    def test_failure_raised_by_drain(self):
+        def fail(strategy):
+            raise RuntimeError("no adaptation")
+
+        with self.assertLogs(level="ERROR"):
+            stream = self._subscribe(on_arrival=fail)
+            self.container.sample()
+            wait_for(lambda: not stream._thread.is_alive())
+        with self.assertRaises(RuntimeError):
+            stream.drain()
+        # raised once
+        stream.close()
+
+    def test_through_the_transport(self):
+        stream = self._subscribe()
+        self.container.sample()
+        self.assertEqual(self._drain(stream, 1), 1)
+        self.assertGreaterEqual(self.strategy.metrics.histograms["http_get_seconds"].count, 1)
+
+    def test_close_is_prompt(self):
+        stream = self._subscribe()
+        started = time.monotonic()
+        stream.close()
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_close_while_connecting(self):
+        server = self.container._server
+        server.RequestHandlerClass = HeldStreamHandler
+        server.connecting, server.release = threading.Event(), threading.Event()
+        stream = MonitorStream(self.strategy).start()
+        self.assertTrue(server.connecting.wait(timeout=5))
+        stream.close()
+        # close() did not wait for the answer of the exemplar
+        self.assertTrue(stream._thread.is_alive())
+        server.release.set()
+        stream._thread.join(timeout=5)
+        self.assertFalse(stream._thread.is_alive())
+        self.assertIsNone(stream.supported)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import socket
+import threading
+import time
+import unittest
+
+from UPISAS.exemplar import allocate_host_ports, unique_container_name, _allocated_host_ports
+from UPISAS.exemplars.stand_in import StandInExemplar
+from UPISAS.parallel import ParallelRunExecutor
+from UPISAS.tests.upisas.test_exemplar_pool import FakeExemplar
+
+
+class NamedStrategy:
+    def __init__(self, exemplar):
+        self.exemplar = exemplar
+
+
+class TestParallelRuns(unittest.TestCase):
+    """
+    Test cases for the dynamic allocation of host ports and the parallel run executor.
+    """
+
+    def test_allocated_host_ports_are_free_and_distinct(self):
+        ports = allocate_host_ports([3000, 4242, 5901, 6901])
+        more_ports = allocate_host_ports([3000])
+        self.assertEqual(sorted(ports.keys()), [3000, 4242, 5901, 6901])
+        all_ports = list(ports.values()) + list(more_ports.values())
+        self.assertEqual(len(set(all_ports)), 5)
+        for port in all_ports:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind(("", port))
+
+    def test_host_ports_released_on_remove(self):
+        exemplar = StandInExemplar(auto_start=True)
+        port = exemplar.host_ports[3000]
+        self.assertIn(port, _allocated_host_ports)
+        exemplar.stop_container(remove=False)
+        self.assertIn(port, _allocated_host_ports)
+        exemplar.stop_container()
+        self.assertNotIn(port, _allocated_host_ports)
+
+    def test_unique_container_names(self):
+        self.assertNotEqual(unique_container_name("swim"), unique_container_name("swim"))
+        self.assertTrue(unique_container_name("swim").startswith("swim-"))
+
+    def test_variations_run_concurrently_in_order(self):
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def run(strategy, variation):
+            with lock:
+                running.append(variation)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(variation)
+            return (variation, strategy.exemplar.base_endpoint)
+
+        with ParallelRunExecutor(FakeExemplar, NamedStrategy, run, workers=3) as executor:
+            results = executor.map([0.75, 0.50, 0.25, 0.10, 0.05, 0.01])
+        self.assertEqual([variation for variation, _ in results], [0.75, 0.50, 0.25, 0.10, 0.05, 0.01])
+        self.assertEqual(max(max_running), 3)
+
+    def test_failed_run_is_raised(self):
+        def run(strategy, variation):
+            if variation == "bad":
+                raise ValueError(variation)
+            return variation
+
+        with ParallelRunExecutor(FakeExemplar, NamedStrategy, run, workers=2) as executor:
+            with self.assertRaises(ValueError):
+                executor.map(["good", "bad"])
+
+    def test_failures_returned_in_place(self):
+        created = []
+
+        def factory():
+            created.append(1)
+            if len(created) == 2:
+                raise OSError("docker daemon unavailable")
+            return FakeExemplar()
+
+        with ParallelRunExecutor(factory, NamedStrategy, lambda strategy, variation: variation, workers=1) as executor:
+            with self.assertLogs(level="ERROR"):
+                results = executor.map(["first", "second", "third"], return_exceptions=True)
+        self.assertEqual(results[0], "first")
+        self.assertIsInstance(results[1], OSError)
+        self.assertEqual(results[2], "third")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+
+import numpy as np
+
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel, SWIMModel
+from UPISAS.execute_filter import ExecuteFilter
+from UPISAS.planner import OptionSpace, SurrogatePlanner
+from UPISAS.strategies.surrogate_strategy import DemoSurrogateStrategy
+
+ROUNDS = 25
+
+
+def f_minimum():
+    x, y = np.meshgrid(np.linspace(-4, 6, 1001), np.linspace(-10, 10, 2001))
+    return DemoModel(randomness=False).f(x, y).min()
+
+
+class TestOptionSpace(unittest.TestCase):
+    """
+    Test cases for the mapping between adaptation options and the unit hypercube of the planner.
+    """
+
+    def test_continuous_and_discrete(self):
+        space = OptionSpace(SWIMModel().adaptation_options)
+        configuration = space.decode(space.snap(np.array([[0.8, 0.25]]))[0])
+        self.assertEqual(configuration, {"server_number": 3, "dimmer_factor": 0.25})
+        self.assertEqual(space.encode(configuration).tolist(), [1.0, 0.25])
+        for point in space.snap(np.random.default_rng(0).random((100, 2))):
+            self.assertIn(space.decode(point)["server_number"], (1, 2, 3))
+
+    def test_values_and_step(self):
+        space = OptionSpace({"mode": {"values": ["eco", "fast"]}, "level": {"start": 0, "stop": 1, "step": 0.25,
+                                                                           "type": "discrete"}})
+        self.assertEqual(space.levels[1], [0, 0.25, 0.5, 0.75, 1.0])
+        self.assertEqual(space.decode(space.snap(np.array([[0.9, 0.4]]))[0]), {"mode": "fast", "level": 0.5})
+        self.assertEqual(space.encode({"mode": "eco", "level": 0.75}).tolist(), [0.0, 0.75])
+
+    def test_invalid_options(self):
+        for options in ({}, {"x": {"start": 0, "stop": 1, "type": "ordinal"}}, {"x": {"type": "continuous"}}):
+            with self.assertRaises(ValueError):
+                OptionSpace(options)
+
+
+class TestSurrogatePlanner(unittest.TestCase):
+    """
+    Test cases for the SurrogatePlanner, minimizing f of the demo managed system without noise.
+    """
+
+    def test_beats_random_search(self):
+        model = DemoModel(randomness=False)
+        minimum = f_minimum()
+        for seed in range(3):
+            planner = SurrogatePlanner(DemoModel.adaptation_options, seed=seed)
+            for _ in range(ROUNDS):
+                configuration = planner.suggest()
+                planner.observe(configuration, -model.f(configuration["x"], configuration["y"]))
+            random = np.random.default_rng(seed)
+            random_best = min(model.f(random.uniform(-4, 6), random.uniform(-10, 10)) for _ in range(ROUNDS))
+            self.assertLess(-planner.best()[1] - minimum, 0.15)
+            self.assertLess(-planner.best()[1], random_best)
+
+    def test_predicts_observations(self):
+        planner = SurrogatePlanner({"x": {"start": 0, "stop": 1, "type": "continuous"}}, seed=0)
+        for x in np.linspace(0, 1, 9):
+            planner.observe({"x": x}, np.sin(3 * x))
+        mean, std = planner.predict(np.array([[0.5], [0.55]]))
+        self.assertAlmostEqual(mean[0], np.sin(1.5), delta=0.05)
+        self.assertAlmostEqual(mean[1], np.sin(1.65), delta=0.05)
+        self.assertTrue((std < 0.1).all())
+
+    def test_bounded_history(self):
+        planner = SurrogatePlanner(DemoModel.adaptation_options, max_history=10, seed=0)
+        for _ in range(15):
+            planner.observe(planner.suggest(), 0.0)
+        self.assertEqual(len(planner.points), 10)
+
+
+class TestSurrogateStrategy(unittest.TestCase):
+    """
+    Test cases for the DemoSurrogateStrategy, run against a stand-in exemplar.
+    """
+
+    def test_adapts_towards_minimum(self):
+        exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True)
+        strategy = DemoSurrogateStrategy(exemplar, planner_options={"seed": 1})
+        try:
+            for _ in range(ROUNDS):
+                strategy.monitor()
+                if strategy.analyze() and strategy.plan():
+                    strategy.execute()
+            strategy.monitor()
+            strategy.analyze()
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        self.assertEqual(len(strategy.planner.utilities), ROUNDS)
+        best, utility = strategy.planner.best()
+        self.assertAlmostEqual(-utility, exemplar.model.f(best["x"], best["y"]))
+        self.assertLess(-utility - f_minimum(), 0.15)
+
+    def test_scores_only_the_executed_configuration(self):
+        exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True)
+        # the first plan is sent, the following ones wait for the window to close
+        strategy = DemoSurrogateStrategy(exemplar, execute_filter=ExecuteFilter(coalesce_window=3600),
+                                         planner_options={"seed": 1})
+        shadow = DemoSurrogateStrategy(exemplar, planner_options={"seed": 1})
+        try:
+            for _ in range(5):
+                for planner in (strategy, shadow):
+                    planner.monitor()
+                    if planner.analyze() and planner.plan() and planner is strategy:
+                        strategy.execute()
+        finally:
+            strategy.transport.close()
+            shadow.transport.close()
+            exemplar.stop_container()
+        executed = {"x": exemplar.model.x, "y": exemplar.model.y}
+        self.assertEqual(strategy.configuration, executed)
+        self.assertEqual(len(strategy.planner.utilities), 4)
+        self.assertEqual(strategy.planner.best(), (executed, -exemplar.model.f(executed["x"], executed["y"])))
+        self.assertIsNone(shadow.configuration)
+        self.assertEqual(shadow.planner.utilities, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
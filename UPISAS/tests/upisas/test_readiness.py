@@ -0,0 +1,69 @@
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from UPISAS.exceptions import ExemplarNotReady
+from UPISAS.exemplars.demo_exemplar import DemoExemplar
+from UPISAS.readiness import HTTPProbe
+
+
+class AliveHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == "/" else 404)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class CountingProbe:
+    def __init__(self, ready_after):
+        self.ready_after = ready_after
+        self.calls = 0
+
+    def __call__(self, exemplar):
+        self.calls += 1
+        return self.calls > self.ready_after
+
+
+class TestReadiness(unittest.TestCase):
+    """
+    Test cases for Exemplar.wait_until_ready and its probes, without creating any container.
+    """
+
+    def setUp(self):
+        self.exemplar = DemoExemplar.__new__(DemoExemplar)
+        self.exemplar.base_endpoint = "http://127.0.0.1:1"
+        self.exemplar.exemplar_container = None
+        self.exemplar.time_to_ready = None
+
+    def test_ready_after_backoff(self):
+        probe = CountingProbe(ready_after=3)
+        time_to_ready = self.exemplar.wait_until_ready(probe=probe, initial_delay=0.01, backoff=2)
+        self.assertEqual(probe.calls, 4)
+        # 0.01 + 0.02 + 0.04 seconds of backoff
+        self.assertGreaterEqual(time_to_ready, 0.07)
+        self.assertEqual(self.exemplar.time_to_ready, time_to_ready)
+
+    def test_not_ready_before_deadline(self):
+        probe = CountingProbe(ready_after=10 ** 6)
+        with self.assertRaises(ExemplarNotReady):
+            self.exemplar.wait_until_ready(probe=probe, timeout=0.1, initial_delay=0.01, max_delay=0.02)
+        self.assertGreater(probe.calls, 3)
+
+    def test_http_probe(self):
+        self.assertFalse(HTTPProbe()(self.exemplar))
+        server = ThreadingHTTPServer(("127.0.0.1", 0), AliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            self.exemplar.base_endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+            self.assertTrue(HTTPProbe()(self.exemplar))
+            self.assertFalse(HTTPProbe("monitor")(self.exemplar))
+            self.exemplar.wait_until_ready(timeout=1)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
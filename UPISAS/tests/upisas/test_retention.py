@@ -0,0 +1,94 @@
+import unittest
+
+from UPISAS.columnar import ColumnarStore
+from UPISAS.retention import KeepAll, LastN, TimeWindow, Downsample
+
+
+class TestRetention(unittest.TestCase):
+    """
+    Test cases for the retention policies of the columnar store.
+    """
+
+    def setUp(self):
+        self.evicted = []
+        self.store = ColumnarStore(on_evict=lambda key, values, timestamps:
+                                   self.evicted.append((key, list(values), list(timestamps))))
+
+    def _fill(self, n, **extra):
+        for i in range(n):
+            self.store.append(dict(f=float(i), **extra), timestamp=float(i))
+
+    def test_keep_all_by_default(self):
+        self._fill(1000)
+        self.assertEqual(len(self.store["f"]), 1000)
+        self.assertEqual(self.evicted, [])
+
+    def test_last_n(self):
+        self.store.retention = LastN(10)
+        self._fill(1000)
+        self.assertEqual(self.store["f"], [float(i) for i in range(990, 1000)])
+        self.assertEqual(self.store["f"].timestamps().tolist(), [float(i) for i in range(990, 1000)])
+        self.assertEqual(len(self.evicted), 990)
+        self.assertEqual(self.evicted[0], ("f", [0.0], [0.0]))
+
+    def test_last_n_bounds_the_buffer(self):
+        self.store.retention = LastN(10)
+        self._fill(10000)
+        self.assertLessEqual(len(self.store["f"]._timestamps), 32)
+
+    def test_last_n_on_object_column(self):
+        self.store.retention = LastN(3)
+        for i in range(50):
+            self.store.append({"utilization": [i]}, timestamp=float(i))
+        self.assertEqual(self.store["utilization"], [[47], [48], [49]])
+        self.assertEqual(self.store["utilization"][-1], [49])
+
+    def test_per_key_retention(self):
+        self.store.retention = LastN(5)
+        self.store.set_retention("g", KeepAll())
+        self._fill(20, g=1)
+        self.assertEqual(len(self.store["f"]), 5)
+        self.assertEqual(len(self.store["g"]), 20)
+
+    def test_set_retention_trims_existing_key(self):
+        self._fill(20)
+        self.store.set_retention("f", LastN(2))
+        self.assertEqual(self.store["f"], [18.0, 19.0])
+
+    def test_time_window(self):
+        self.store.retention = TimeWindow(4.5)
+        self._fill(100)
+        self.assertEqual(self.store["f"], [95.0, 96.0, 97.0, 98.0, 99.0])
+
+    def test_downsample(self):
+        self.store.retention = Downsample(recent=4, factor=3)
+        self._fill(10)
+        # 0..5 aggregated by 3, 6..9 kept as they are
+        self.assertEqual(self.store["f"], [1.0, 4.0, 6.0, 7.0, 8.0, 9.0])
+        self.assertEqual(self.store["f"].timestamps().tolist(), [2.0, 5.0, 6.0, 7.0, 8.0, 9.0])
+        self.assertEqual(self.store["f"].aggregated, 2)
+        self.assertEqual(self.evicted[0], ("f", [0.0, 1.0, 2.0], [0.0, 1.0, 2.0]))
+
+    def test_downsample_in_constant_memory(self):
+        self.store.retention = Downsample(recent=10, factor=5, max_samples=20)
+        self._fill(10000)
+        self.assertLessEqual(len(self.store["f"]), 20)
+        self.assertEqual(self.store["f"][-1], 9999.0)
+        self.assertLessEqual(len(self.store["f"]._timestamps), 64)
+
+    def test_downsample_custom_aggregate(self):
+        self.store.retention = Downsample(recent=0, factor=2, aggregate=max)
+        self._fill(4)
+        self.assertEqual(self.store["f"], [1.0, 3.0])
+
+    def test_invalid_policies(self):
+        with self.assertRaises(ValueError):
+            LastN(0)
+        with self.assertRaises(ValueError):
+            Downsample(recent=10, factor=1)
+        with self.assertRaises(ValueError):
+            Downsample(recent=10, factor=2, max_samples=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
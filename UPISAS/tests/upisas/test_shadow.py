@@ -0,0 +1,88 @@
+import pickle
+import unittest
+
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel
+from UPISAS.loop import MAPEKLoop
+from UPISAS.shadow import ShadowEvaluator, PROCESS
+from UPISAS.strategies.demo_strategy import DemoStrategy
+from UPISAS.strategies.empty_strategy import EmptyStrategy
+from UPISAS.strategies.surrogate_strategy import DemoSurrogateStrategy
+
+
+class FailingStrategy(EmptyStrategy):
+
+    def analyze(self):
+        raise RuntimeError("no analysis")
+
+
+class TestShadowEvaluator(unittest.TestCase):
+    """
+    Test cases for the shadow evaluation of strategies, against a stand-in exemplar.
+    """
+
+    def setUp(self):
+        self.exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True)
+        self.strategies = []
+
+    def tearDown(self):
+        for strategy in self.strategies:
+            strategy.transport.close()
+        self.exemplar.stop_container()
+
+    def _strategy(self, cls, **kwargs):
+        strategy = cls(self.exemplar, **kwargs)
+        self.strategies.append(strategy)
+        return strategy
+
+    def test_only_primary_executes(self):
+        primary = self._strategy(DemoStrategy)
+        shadows = {"demo": self._strategy(DemoStrategy),
+                   "surrogate": self._strategy(DemoSurrogateStrategy, planner_options={"seed": 0}),
+                   "failing": self._strategy(FailingStrategy)}
+        primary.get_adaptation_options()
+        with ShadowEvaluator(primary, shadows) as evaluator:
+            with self.assertLogs(level="WARNING"):
+                MAPEKLoop(evaluator, period=0).run(iterations=5)
+        self.assertEqual((self.exemplar.model.x, self.exemplar.model.y), (2, 5))
+        # the plan of every iteration, of the primary only
+        self.assertEqual(self.exemplar.exemplar_container.logs().count(b"Got value changes"), 5)
+        self.assertEqual(len(evaluator.decisions), 5 * 4)
+        summary = evaluator.summary()
+        self.assertEqual(summary["DemoStrategy"]["adaptations"], 5)
+        self.assertEqual(summary["demo"]["agreement"], 1.0)
+        self.assertEqual(summary["surrogate"]["adaptations"], 5)
+        self.assertEqual(summary["failing"]["errors"], 5)
+        # the shadow aggregates were fed with the samples monitored by the primary
+        self.assertEqual(shadows["demo"].knowledge.aggregates["mean_f"].count, 5)
+        self.assertEqual(shadows["demo"].knowledge.analysis_data, primary.knowledge.analysis_data)
+        self.assertGreater(summary["surrogate"]["mean_seconds"], 0)
+
+    def test_worker_processes(self):
+        primary = self._strategy(DemoStrategy)
+        shadow = self._strategy(DemoStrategy)
+        transport = shadow.transport
+        with ShadowEvaluator(primary, [shadow, self._strategy(FailingStrategy)], executor=PROCESS) as evaluator:
+            for _ in range(3):
+                evaluator.monitor()
+                if evaluator.analyze() and evaluator.plan():
+                    evaluator.execute()
+        self.assertEqual(evaluator.summary()["DemoStrategy"]["iterations"], 3)
+        self.assertEqual(evaluator.summary()["FailingStrategy"]["errors"], 3)
+        # the state of the copies which decided in the workers was adopted, except what was not sent
+        self.assertEqual(shadow.knowledge.aggregates["mean_f"].count, 3)
+        self.assertEqual(shadow.knowledge.plan_data, {"x": 2, "y": 5})
+        self.assertIs(shadow.transport, transport)
+        self.assertIs(shadow.knowledge.monitored_data, primary.knowledge.monitored_data)
+
+    def test_pickled_without_connections(self):
+        strategy = self._strategy(DemoStrategy)
+        strategy.monitor()
+        copy = pickle.loads(pickle.dumps(strategy))
+        for name in ("exemplar", "transport", "metrics", "execute_filter"):
+            self.assertIsNone(getattr(copy, name))
+        self.assertEqual(copy.knowledge.monitored_data["f"].tolist(), strategy.knowledge.monitored_data["f"].tolist())
+        self.assertTrue(copy.analyze())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import requests
+
+from UPISAS.exceptions import EndpointNotReachable
+from UPISAS.exemplar_pool import ExemplarPool, RESTART
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel, SWIMModel
+from UPISAS.loop import MAPEKLoop
+from UPISAS.strategies.demo_strategy import DemoStrategy
+from UPISAS.strategies.swim_reactive_strategy import ReactiveAdaptationManager
+
+
+class TestStandIn(unittest.TestCase):
+    """
+    Test cases for the in-process stand-in exemplar, running the strategies without docker.
+    """
+
+    def setUp(self):
+        self.exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True)
+        self.exemplar.start_run(wait=True)
+
+    def tearDown(self):
+        if self.exemplar.exemplar_container:
+            self.exemplar.stop_container()
+
+    def test_demo_model_matches_app_js(self):
+        model = DemoModel(randomness=False)
+        self.assertAlmostEqual(model.monitor()["f"], 0.4)
+        model.execute({"x": 0.51681, "y": 1.00861})
+        self.assertAlmostEqual(model.monitor()["f"], 0.0198944, places=6)
+        model.execute({"x": 0})
+        self.assertEqual(model.x, 0.51681)
+
+    def test_demo_strategy_loop_with_validation(self):
+        strategy = DemoStrategy(self.exemplar)
+        strategy.get_adaptation_options()
+        MAPEKLoop(strategy, period=0).run(iterations=3)
+        self.assertEqual(len(strategy.knowledge.monitored_data["f"]), 3)
+        self.assertEqual((self.exemplar.model.x, self.exemplar.model.y), (2, 5))
+        strategy.transport.close()
+
+    def test_unknown_endpoint(self):
+        strategy = DemoStrategy(self.exemplar)
+        with self.assertRaises(EndpointNotReachable):
+            strategy.monitor(endpoint_suffix="not_an_endpoint", with_validation=False)
+        strategy.transport.close()
+
+    def test_invalid_execute(self):
+        response = requests.put(f"{self.exemplar.base_endpoint}/execute", data="[1, 2]")
+        self.assertEqual(response.status_code, 405)
+
+    def test_container_lifecycle(self):
+        self.exemplar.model.execute({"x": 3})
+        self.assertTrue(self.exemplar.pause_container())
+        self.assertEqual(self.exemplar.get_container_status(), "paused")
+        self.assertTrue(self.exemplar.unpause_container())
+        self.exemplar.exemplar_container.restart()
+        self.assertEqual(self.exemplar.model.x, 0.0)
+        self.assertTrue(self.exemplar.stop_container())
+        self.assertEqual(self.exemplar.get_container_status(), "removed")
+
+    def test_swim_model_with_reactive_strategy(self):
+        swim = StandInExemplar(SWIMModel(seed=1, arrival_rate=60), auto_start=True)
+        try:
+            strategy = ReactiveAdaptationManager(swim)
+            strategy.get_adaptation_options()
+            MAPEKLoop(strategy, period=0).run(iterations=10)
+            strategy.transport.close()
+            data = strategy.knowledge.monitored_data
+            self.assertEqual(len(data["arrival_rate"]), 10)
+            # overloaded with one server, the strategy scales out
+            self.assertGreater(data["servers"][-1], 1)
+            self.assertLessEqual(data["active_servers"][-1], data["servers"][-1])
+        finally:
+            swim.stop_container()
+
+    def test_swim_model_boot_delay(self):
+        model = SWIMModel(boot_ticks=2)
+        model.monitor()
+        model.execute({"server_number": 3, "dimmer_factor": 0.5})
+        self.assertEqual(model.monitor()["active_servers"], 1)
+        self.assertEqual(model.monitor()["active_servers"], 3)
+        model.execute({"server_number": 1, "dimmer_factor": 0.5})
+        self.assertEqual(model.monitor()["active_servers"], 1)
+
+    def test_pool_of_stand_ins(self):
+        with ExemplarPool(lambda: StandInExemplar(auto_start=True), size=2, recycle=RESTART) as pool:
+            first = pool.acquire(timeout=5)
+            second = pool.acquire(timeout=5)
+            self.assertNotEqual(first.base_endpoint, second.base_endpoint)
+            first.model.execute({"x": 3})
+            pool.release(first)
+            pool.release(second)
+            recycled = pool.acquire(timeout=5)
+            self.assertEqual(recycled.model.x, 0.0)
+            pool.release(recycled)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,8 @@
 import unittest
-import time
 
 import jsonschema
 
-from UPISAS import get_response_for_get_request, ServerNotReachable
+from UPISAS import ServerNotReachable
 from UPISAS.exceptions import EndpointNotReachable, IncompleteJSONSchema
 from UPISAS.exemplars.demo_exemplar import DemoExemplar
 from UPISAS.strategies.demo_strategy import DemoStrategy
@@ -170,15 +169,8 @@ class TestStrategy(unittest.TestCase):
         with self.assertRaises(jsonschema.exceptions.ValidationError):
             self.strategy.monitor()
 
-    def _start_server_and_wait_until_is_up(self, base_endpoint="http://localhost:3000", app="app.js"):
-        self.exemplar.start_run(app)
-        while True:
-            time.sleep(1)
-            print("trying to connect...")
-            response = get_response_for_get_request(base_endpoint)
-            print(response.status_code)
-            if response.status_code < 400:
-                return
+    def _start_server_and_wait_until_is_up(self, app="app.js"):
+        self.exemplar.start_run(app, wait=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from UPISAS.exemplars.replay import ReplayExemplar, replay
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel, SWIMModel
+from UPISAS.exceptions import TraceExhausted
+from UPISAS.loop import MAPEKLoop
+from UPISAS.strategies.demo_strategy import DemoStrategy
+from UPISAS.trace import TraceRecorder, Trace, read_trace, record, SAMPLE, EXECUTE
+
+
+class OtherPlanStrategy(DemoStrategy):
+
+    def plan(self):
+        self.knowledge.plan_data = {"x": 3, "y": 5}
+        return True
+
+
+class TestTrace(unittest.TestCase):
+    """
+    Test cases for the recording of runs to trace files and their offline replay.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "run.trace")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _record_demo_run(self, iterations=20):
+        exemplar = StandInExemplar(DemoModel(seed=0), auto_start=True)
+        strategy = DemoStrategy(exemplar)
+        try:
+            strategy.bootstrap(cache=False)
+            with record(strategy, self.path):
+                MAPEKLoop(strategy, period=0).run(iterations=iterations)
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        return strategy
+
+    def test_values_round_trip(self):
+        values = [None, True, False, 0, -1, 2 ** 70, -2 ** 40, 0.5, 0.1, float("inf"), "", "été",
+                  [1, [2.5, {"a": None}]], {"a": 1, "b": {"a": [True]}}, {}]
+        with TraceRecorder(self.path, {"run": 1}) as recorder:
+            for value in values:
+                recorder.sample(value, timestamp=1.5)
+            with self.assertRaises(TypeError):
+                recorder.sample({"new key": object()})
+            recorder.execute({"new key": 1})
+        records = list(read_trace(self.path))
+        self.assertEqual([value for _, _, value in records[1:-1]], values)
+        self.assertEqual(records[-1][::2], (EXECUTE, {"new key": 1}))
+        self.assertEqual(records[1][:2], (SAMPLE, 1.5))
+
+    def test_compact_and_truncation_tolerated(self):
+        model = SWIMModel(seed=0)
+        samples = [model.monitor() for _ in range(500)]
+        with TraceRecorder(self.path) as recorder:
+            for sample in samples:
+                recorder.sample(sample)
+        json_size = sum(len(json.dumps(sample)) + 1 for sample in samples)
+        self.assertLess(os.path.getsize(self.path), json_size / 2)
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(Trace(self.path).samples[-1][1], samples[-2])
+
+    def test_replay_reproduces_run(self):
+        recorded = self._record_demo_run()
+        trace = Trace(self.path)
+        self.assertEqual(len(trace.samples), 20)
+        self.assertEqual(trace.documents["execute_schema"], DemoModel.execute_schema)
+        self.assertEqual([adaptation for _, _, adaptation in trace.executions], [{"x": 2, "y": 5}] * 20)
+
+        strategy = DemoStrategy(ReplayExemplar(trace))
+        stats = replay(strategy)
+        self.assertEqual(stats.iterations, 20)
+        self.assertEqual(strategy.knowledge.monitored_data["f"].tolist(),
+                         recorded.knowledge.monitored_data["f"].tolist())
+        self.assertEqual(strategy.transport.divergences(), [])
+        with self.assertRaises(TraceExhausted):
+            strategy.monitor()
+
+        other = OtherPlanStrategy(ReplayExemplar(self.path))
+        replay(other)
+        self.assertEqual(other.transport.divergences(),
+                         [(position, [{"x": 2, "y": 5}], [{"x": 3, "y": 5}]) for position in range(1, 21)])
+
+    def test_stream_recorded(self):
+        exemplar = StandInExemplar(DemoModel(seed=0), auto_start=True, sample_period=3600)
+        strategy = DemoStrategy(exemplar)
+        try:
+            with record(strategy, self.path):
+                with strategy.subscribe() as stream:
+                    while stream.supported is None:
+                        time.sleep(0.01)
+                    for _ in range(3):
+                        exemplar.exemplar_container.sample()
+                    drained = 0
+                    while drained < 3:
+                        drained += stream.drain(timeout=5)
+            samples = exemplar.exemplar_container.samples
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        trace = Trace(self.path)
+        self.assertEqual([data for _, data in trace.samples], [data for _, _, data in samples])
+        self.assertEqual(trace.exemplar_timestamps, [timestamp for _, timestamp, _ in samples])
+
+    def test_dropped_prefetch_not_recorded(self):
+        exemplar = StandInExemplar(DemoModel(seed=0), auto_start=True)
+        strategy = DemoStrategy(exemplar)
+        try:
+            strategy.bootstrap(cache=False)
+            with record(strategy, self.path):
+                # the monitor prefetched for a sixth iteration is dropped by the loop
+                MAPEKLoop(strategy, period=0, pipelined=True).run(iterations=5)
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        trace = Trace(self.path)
+        self.assertEqual([data["f"] for _, data in trace.samples], strategy.knowledge.monitored_data["f"].tolist())
+        self.assertEqual(len(trace.samples), 5)
+
+    def test_replay_batches(self):
+        exemplar = StandInExemplar(DemoModel(seed=0), auto_start=True, sample_period=3600)
+        strategy = DemoStrategy(exemplar)
+        try:
+            strategy.bootstrap(cache=False)
+            with record(strategy, self.path):
+                for size in (3, 1, 2):
+                    for _ in range(size):
+                        exemplar.exemplar_container.sample()
+                    strategy.monitor_batch()
+            samples = exemplar.exemplar_container.samples
+        finally:
+            strategy.transport.close()
+            exemplar.stop_container()
+        # the records are timestamped by the recorder, when the batches were fetched, not by the exemplar
+        trace = Trace(self.path)
+        self.assertEqual(trace.exemplar_timestamps, [timestamp for _, timestamp, _ in samples])
+        recorded = [timestamp for timestamp, _ in trace.samples]
+        self.assertEqual(recorded, sorted(recorded))
+        self.assertTrue(all(fetched >= taken for fetched, taken in zip(recorded, trace.exemplar_timestamps)))
+        replayed = DemoStrategy(ReplayExemplar(self.path))
+        self.assertEqual([replayed.monitor_batch() for _ in range(3)], [3, 1, 2])
+        self.assertEqual(replayed.knowledge.monitored_data["f"].timestamps().tolist(),
+                         strategy.knowledge.monitored_data["f"].timestamps().tolist())
+        # one sample per request with a limit, and one by one with monitor
+        limited = DemoStrategy(ReplayExemplar(self.path))
+        self.assertEqual(limited.monitor_batch(limit=1), 3)
+        self.assertEqual(limited.monitor_cursor, 3)
+        single = DemoStrategy(ReplayExemplar(self.path))
+        self.assertEqual(replay(single).iterations, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
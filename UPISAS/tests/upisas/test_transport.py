@@ -0,0 +1,77 @@
+import time
+import unittest
+
+from UPISAS.exceptions import ServerNotReachable
+from UPISAS.exemplars.stand_in import StandInExemplar, DemoModel, _StandInHandler
+from UPISAS.metrics import Metrics
+from UPISAS.transport import Transport
+
+
+class SlowModel(DemoModel):
+
+    def monitor(self):
+        time.sleep(0.5)
+        return super().monitor()
+
+
+class UnavailableHandler(_StandInHandler):
+    """ Answers 503 to the first `failures` requests of its server, then serves the stand-in. """
+
+    def do_GET(self):
+        server = self.server
+        if server.failures > 0:
+            server.failures -= 1
+            return self._send(503, "unavailable")
+        super().do_GET()
+
+
+class TestTransport(unittest.TestCase):
+    """
+    Test cases for the pooled HTTP transport of the strategies, against a stand-in exemplar.
+    """
+
+    def setUp(self):
+        self.exemplar = StandInExemplar(DemoModel(randomness=False), auto_start=True)
+        self.server = self.exemplar.exemplar_container._server
+        self.connections = 0
+        get_request = self.server.get_request
+
+        def counting_get_request():
+            self.connections += 1
+            return get_request()
+
+        self.server.get_request = counting_get_request
+
+    def tearDown(self):
+        self.exemplar.stop_container()
+
+    def test_connection_reused(self):
+        metrics = Metrics()
+        with Transport(self.exemplar.base_endpoint, metrics=metrics) as transport:
+            for _ in range(10):
+                self.assertEqual(transport.get("monitor").json(), {"f": 0.4})
+            self.assertTrue(transport.put("execute", {"x": 1}).ok)
+        self.assertEqual(self.connections, 1)
+        self.assertEqual(metrics.histograms["http_get_seconds"].count, 10)
+
+    def test_retries_on_unavailable(self):
+        self.server.RequestHandlerClass = UnavailableHandler
+        self.server.failures = 2
+        with Transport(self.exemplar.base_endpoint, retries=3, backoff_factor=0.01) as transport:
+            response = transport.get("monitor")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([retry.status for retry in response.raw.retries.history], [503, 503])
+        self.server.failures = 1
+        with Transport(self.exemplar.base_endpoint) as transport:
+            self.assertEqual(transport.get("monitor").status_code, 503)
+
+    def test_timeout_applied(self):
+        self.exemplar.exemplar_container.model = SlowModel()
+        with Transport(self.exemplar.base_endpoint, timeout=0.1) as transport:
+            # the stand-in answers after 0.5s
+            with self.assertLogs(level="ERROR"), self.assertRaises(ServerNotReachable):
+                transport.get("monitor")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import random
+import unittest
+
+import numpy as np
+
+from UPISAS.columnar import ColumnarStore
+from UPISAS.utility import swim_utility, MAX_SERVICE_RATE
+
+
+def reference_swim_utility(mon_data, rt_threshold):
+    '''The per-sample loop SWIM_example.populate_run_data used before swim_utility'''
+    utilities = []
+    for i in range(len(mon_data["max_servers"])):
+        max_servers = int(mon_data["max_servers"][i])
+        arrival_rate = mon_data["arrival_rate"][i]
+        dimmer = mon_data["dimmer_factor"][i]
+        response_time = ((mon_data["basic_rt"][i] * mon_data["basic_throughput"][i]
+                          + mon_data["opt_rt"][i] * mon_data["opt_throughput"][i])
+                         / (mon_data["basic_throughput"][i] + mon_data["opt_throughput"][i]))
+        ur = arrival_rate * ((1 - dimmer) * 1 + dimmer * 1.5)
+        uc = 10 * (max_servers - mon_data["servers"][i])
+        if response_time <= rt_threshold and ur >= arrival_rate * 1.5 - 1e-5:
+            utilities.append(ur + uc)
+        elif response_time <= rt_threshold:
+            utilities.append(ur)
+        else:
+            utilities.append(min(0.0, arrival_rate - max_servers * MAX_SERVICE_RATE) * 1.5)
+    return utilities
+
+
+class TestSwimUtility(unittest.TestCase):
+    """
+    Test cases for the batched SWIM utility computation.
+    """
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.mon_data = ColumnarStore()
+        for _ in range(500):
+            self.mon_data.append({"max_servers": 3, "servers": rng.randint(1, 3),
+                                  "dimmer_factor": rng.choice([0.0, 0.5, 1.0]),
+                                  "arrival_rate": rng.uniform(5, 80),
+                                  "basic_rt": rng.uniform(0, 1.5), "opt_rt": rng.uniform(0, 1.5),
+                                  "basic_throughput": rng.uniform(0.1, 30), "opt_throughput": rng.uniform(0.1, 30)})
+
+    def test_matches_per_sample_computation(self):
+        utilities = swim_utility(self.mon_data, 0.75)
+        self.assertEqual(utilities.shape, (500,))
+        np.testing.assert_allclose(utilities, reference_swim_utility(self.mon_data, 0.75))
+
+    def test_several_thresholds_in_one_pass(self):
+        thresholds = [0.75, 0.50, 0.25]
+        utilities = swim_utility(self.mon_data, thresholds)
+        self.assertEqual(utilities.shape, (3, 500))
+        for row, threshold in zip(utilities, thresholds):
+            np.testing.assert_allclose(row, reference_swim_utility(self.mon_data, threshold))
+
+    def test_plain_lists(self):
+        mon_data = {key: list(column) for key, column in self.mon_data.items()}
+        np.testing.assert_allclose(swim_utility(mon_data), swim_utility(self.mon_data))
+
+    def test_no_throughput_gets_penalty(self):
+        mon_data = {"max_servers": [3], "servers": [1], "dimmer_factor": [0.5], "arrival_rate": [200.0],
+                    "basic_rt": [0.1], "opt_rt": [0.1], "basic_throughput": [0.0], "opt_throughput": [0.0]}
+        self.assertEqual(swim_utility(mon_data).tolist(), [min(0.0, 200.0 - 3 * MAX_SERVICE_RATE) * 1.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
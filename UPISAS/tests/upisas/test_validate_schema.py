@@ -0,0 +1,74 @@
+import json
+import unittest
+from unittest import mock
+
+import jsonschema
+
+from UPISAS import validate_schema, clear_validator_cache
+from UPISAS.exceptions import IncompleteJSONSchema
+
+
+class TestValidateSchema(unittest.TestCase):
+    """
+    Test cases for validate_schema and its cache of compiled validators.
+    """
+
+    def setUp(self):
+        clear_validator_cache()
+        self.schema = {"type": "object", "properties": {"x": {"type": "number"}, "y": {"type": "number"}}}
+
+    def test_validate_successfully(self):
+        with self.assertLogs() as cm:
+            validate_schema({"y": 5.3, "x": 2.1}, self.schema)
+            self.assertTrue("JSON object validated by JSON Schema" in ", ".join(cm.output))
+
+    def test_keys_misaligned(self):
+        with self.assertRaises(IncompleteJSONSchema):
+            validate_schema({"x": 2.1}, self.schema)
+
+    def test_type_and_properties_absent(self):
+        with self.assertRaises(IncompleteJSONSchema):
+            validate_schema({"x": 2.1}, {"type": "object"})
+
+    def test_instance_not_conforming_to_schema(self):
+        with self.assertRaises(jsonschema.exceptions.ValidationError):
+            validate_schema({"x": "2.1", "y": 5.3}, self.schema)
+
+    def test_schema_invalid_on_every_call(self):
+        schema = {"type": "strange_value", "properties": {"f": {"type": "number"}}}
+        for _ in range(2):
+            with self.assertRaises(jsonschema.exceptions.SchemaError):
+                validate_schema({"f": 1}, schema)
+
+    def test_schema_checked_only_on_first_use(self):
+        validator_class = jsonschema.validators.validator_for(self.schema)
+        with mock.patch.object(validator_class, "check_schema") as check_schema:
+            for _ in range(3):
+                validate_schema({"x": 2.1, "y": 5.3}, self.schema)
+        check_schema.assert_called_once()
+
+    def test_equal_schemas_compiled_once(self):
+        validator_class = jsonschema.validators.validator_for(self.schema)
+        with mock.patch.object(validator_class, "check_schema") as check_schema:
+            for schema in (self.schema, json.loads(json.dumps(self.schema))):
+                validate_schema({"x": 2.1, "y": 5.3}, schema)
+        check_schema.assert_called_once()
+
+    def test_least_recently_used_evicted(self):
+        schemas = [{"type": "object", "properties": {key: {"type": "number"}}} for key in "abc"]
+        validator_class = jsonschema.validators.validator_for(self.schema)
+        with mock.patch("UPISAS._COMPILED_SCHEMAS_MAX_SIZE", 2), \
+                mock.patch.object(validator_class, "check_schema") as check_schema:
+            for schema in (schemas[0], schemas[1], schemas[0], schemas[2], schemas[0]):
+                validate_schema({key: 1 for key in schema["properties"]}, schema)
+        # the first schema was used before the third one was compiled, the second one was evicted
+        self.assertEqual(check_schema.call_count, 3)
+
+    def test_new_schema_object_is_not_confused_with_cached_one(self):
+        validate_schema({"x": 2.1, "y": 5.3}, self.schema)
+        with self.assertRaises(IncompleteJSONSchema):
+            validate_schema({"x": 2.1, "y": 5.3}, {"type": "object", "properties": {"f": {"type": "number"}}})
+
+
+if __name__ == '__main__':
+    unittest.main()
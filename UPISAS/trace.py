@@ -0,0 +1,466 @@
+import bisect
+import json
+import logging
+import struct
+import threading
+
+from UPISAS.exceptions import TraceExhausted
+from UPISAS.clock import system_clock
+
+# a trace file starts with MAGIC, then a sequence of records: kind (1 byte), timestamp (float64), length of the
+# payload (varint) and the payload, a value encoded with _Encoder. The timestamp of every record is the time of the
+# recorder's clock
+MAGIC = b"UPISAS-TRACE\x01"
+METADATA = 0
+DOCUMENT = 1
+SAMPLE = 2
+# a sample fetched in the same batch as the previous one
+BATCHED_SAMPLE = 3
+EXECUTE = 4
+# samples along with the time the exemplar took them, as monitor_batch and the monitor stream serve them: the
+# payload is [exemplar timestamp, data]
+TIMED_SAMPLE = 5
+BATCHED_TIMED_SAMPLE = 6
+
+# endpoints whose bodies are recorded as documents, served as they are by the replay
+DOCUMENT_ENDPOINTS = ("monitor_schema", "execute_schema", "adaptation_options", "adaptation_options_schema")
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT64, _FLOAT32, _STR, _LIST, _DICT = range(9)
+_FLOAT64_FORMAT = struct.Struct("<d")
+_FLOAT32_FORMAT = struct.Struct("<f")
+_RECORD_HEADER = struct.Struct("<Bd")
+
+
+def _write_varint(out, number):
+    while number >= 0x80:
+        out.append(number & 0x7F | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _read_varint(data, position):
+    number = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, position
+        shift += 7
+
+
+class _Encoder:
+    """
+    Encodes JSON values compactly: varints for integers, float32 when it is exact, and every dict key spelled out
+    only the first time it appears in the file, later occurrences being its index.
+    """
+
+    def __init__(self):
+        self.keys = {}
+
+    def encode(self, value):
+        out = bytearray()
+        known = len(self.keys)
+        try:
+            self._encode(value, out)
+        except TypeError:
+            # the keys first seen in a value which is not written are not known to the reader
+            self.keys = {key: index for key, index in self.keys.items() if index < known}
+            raise
+        return out
+
+    def _encode(self, value, out):
+        if value is None:
+            out.append(_NONE)
+        elif value is True or value is False:
+            out.append(_TRUE if value else _FALSE)
+        elif isinstance(value, int):
+            out.append(_INT)
+            _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+        elif isinstance(value, float):
+            single = _FLOAT32_FORMAT.pack(value)
+            if _FLOAT32_FORMAT.unpack(single)[0] == value:
+                out.append(_FLOAT32)
+                out += single
+            else:
+                out.append(_FLOAT64)
+                out += _FLOAT64_FORMAT.pack(value)
+        elif isinstance(value, str):
+            out.append(_STR)
+            self._encode_str(value, out)
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self._encode(item, out)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                index = self.keys.get(key)
+                if index is None:
+                    index = self.keys[key] = len(self.keys)
+                    _write_varint(out, index)
+                    self._encode_str(str(key), out)
+                else:
+                    _write_varint(out, index)
+                self._encode(item, out)
+        elif hasattr(value, "item"):
+            # NumPy scalars
+            self._encode(value.item(), out)
+        else:
+            raise TypeError(f"cannot record a {type(value).__name__}")
+
+    def _encode_str(self, text, out):
+        encoded = text.encode()
+        _write_varint(out, len(encoded))
+        out += encoded
+
+
+class _Decoder:
+
+    def __init__(self):
+        self.keys = []
+
+    def decode(self, data):
+        value, _ = self._decode(data, 0)
+        return value
+
+    def _decode(self, data, position):
+        tag = data[position]
+        position += 1
+        if tag == _NONE:
+            return None, position
+        if tag in (_FALSE, _TRUE):
+            return tag == _TRUE, position
+        if tag == _INT:
+            number, position = _read_varint(data, position)
+            return (number >> 1) ^ -(number & 1), position
+        if tag == _FLOAT32:
+            return _FLOAT32_FORMAT.unpack_from(data, position)[0], position + 4
+        if tag == _FLOAT64:
+            return _FLOAT64_FORMAT.unpack_from(data, position)[0], position + 8
+        if tag == _STR:
+            return self._decode_str(data, position)
+        if tag == _LIST:
+            count, position = _read_varint(data, position)
+            items = []
+            for _ in range(count):
+                item, position = self._decode(data, position)
+                items.append(item)
+            return items, position
+        if tag == _DICT:
+            count, position = _read_varint(data, position)
+            items = {}
+            for _ in range(count):
+                index, position = _read_varint(data, position)
+                if index == len(self.keys):
+                    key, position = self._decode_str(data, position)
+                    self.keys.append(key)
+                item, position = self._decode(data, position)
+                items[self.keys[index]] = item
+            return items, position
+        raise ValueError(f"corrupted trace: unknown tag {tag}")
+
+    def _decode_str(self, data, position):
+        length, position = _read_varint(data, position)
+        return bytes(data[position:position + length]).decode(), position + length
+
+
+class TraceRecorder:
+    """
+    Writes the samples monitored from an exemplar, the documents it served (schemas, adaptation options) and the
+    adaptations executed on it to an append-only binary trace file, to be replayed offline with
+    exemplars.replay.ReplayExemplar. Records are buffered: close() (or flush()) the recorder at the end of the run.
+    """
+
+    def __init__(self, path, metadata: "JSON-serializable description of the run, e.g. the exemplar" = None,
+                 clock: "Clock timestamping the records, the system clock by default" = None):
+        self.path = path
+        self.clock = clock if clock else system_clock
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._encoder = _Encoder()
+        self._lock = threading.Lock()
+        self.records = 0
+        self._write(METADATA, self.clock.time(), metadata if metadata else {})
+
+    def document(self, endpoint_suffix, body):
+        self._write(DOCUMENT, self.clock.time(), [endpoint_suffix, body])
+
+    def sample(self, data, timestamp=None, batched: "Fetched in the same batch as the previous sample" = False,
+               exemplar_timestamp: "Time the exemplar took the sample, if it told it" = None):
+        timestamp = timestamp if timestamp is not None else self.clock.time()
+        if exemplar_timestamp is None:
+            self._write(BATCHED_SAMPLE if batched else SAMPLE, timestamp, data)
+        else:
+            self._write(BATCHED_TIMED_SAMPLE if batched else TIMED_SAMPLE, timestamp, [exemplar_timestamp, data])
+
+    def batch(self, samples, exemplar_timestamps: "Time the exemplar took each sample, if it told it" = None):
+        '''Writes samples appended to the Knowledge together, e.g. by monitor_batch, oldest first'''
+        timestamp = self.clock.time()
+        for index, data in enumerate(samples):
+            self.sample(data, timestamp, batched=index > 0,
+                        exemplar_timestamp=exemplar_timestamps[index] if exemplar_timestamps else None)
+
+    def execute(self, adaptation):
+        self._write(EXECUTE, self.clock.time(), adaptation)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write(self, kind, timestamp, value):
+        with self._lock:
+            payload = self._encoder.encode(value)
+            record = bytearray(_RECORD_HEADER.pack(kind, timestamp))
+            _write_varint(record, len(payload))
+            self._file.write(record + payload)
+            self.records += 1
+
+
+def read_trace(path):
+    '''Yields the (kind, timestamp, value) records of a trace file, ignoring a record truncated by a crash'''
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a UPISAS trace")
+    decoder = _Decoder()
+    position = len(MAGIC)
+    while position < len(data):
+        try:
+            kind, timestamp = _RECORD_HEADER.unpack_from(data, position)
+            length, start = _read_varint(data, position + _RECORD_HEADER.size)
+        except (struct.error, IndexError):
+            break
+        if start + length > len(data):
+            logging.warning(f"{path} ends with a truncated record, ignored")
+            break
+        yield kind, timestamp, decoder.decode(memoryview(data)[start:start + length])
+        position = start + length
+
+
+class Trace:
+    """ A trace file loaded in memory, see TraceRecorder. """
+
+    def __init__(self, path):
+        self.path = path
+        self.metadata = {}
+        # time the recording started
+        self.started = 0.0
+        self.documents = {}
+        # (timestamp, data) of every sample, and the index of the first sample of each batch
+        self.samples = []
+        self.batch_starts = []
+        # the time the exemplar took each sample, None when it was served without it (by monitor)
+        self.exemplar_timestamps = []
+        # (number of samples monitored before, timestamp, adaptation) of every execute
+        self.executions = []
+        for kind, timestamp, value in read_trace(path):
+            if kind == METADATA:
+                self.metadata = value
+                self.started = timestamp
+            elif kind == DOCUMENT:
+                self.documents[value[0]] = value[1]
+            elif kind in (SAMPLE, BATCHED_SAMPLE, TIMED_SAMPLE, BATCHED_TIMED_SAMPLE):
+                if kind in (SAMPLE, TIMED_SAMPLE) or not self.samples:
+                    self.batch_starts.append(len(self.samples))
+                exemplar_timestamp, value = value if kind in (TIMED_SAMPLE, BATCHED_TIMED_SAMPLE) else (None, value)
+                self.samples.append((timestamp, value))
+                self.exemplar_timestamps.append(exemplar_timestamp)
+            elif kind == EXECUTE:
+                self.executions.append((len(self.samples), timestamp, value))
+
+    @property
+    def duration(self):
+        '''Seconds between the first and the last sample'''
+        return self.samples[-1][0] - self.samples[0][0] if self.samples else 0.0
+
+
+class TraceResponse:
+    """ The parts of a requests.Response a Strategy uses, for a body already at hand. """
+
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers if headers else {}
+        self._body = body
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def content(self):
+        return json.dumps(self._body).encode()
+
+    def json(self):
+        return self._body
+
+
+class _ParsedResponse:
+    # a response whose body was parsed by the RecordingTransport, so that the strategy does not parse it again
+    def __init__(self, response, body):
+        self._response = response
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class RecordingTransport:
+    """
+    Wraps the Transport of a Strategy to write the documents of DOCUMENT_ENDPOINTS and the executed adaptations to
+    a TraceRecorder. The samples are not recorded as they are fetched but as the strategy appends them to its
+    Knowledge (see Strategy.recorder): a prefetched monitor dropped by the loop is not part of the trace.
+    """
+
+    def __init__(self, transport, recorder):
+        self.transport = transport
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.transport, name)
+
+    def get(self, endpoint_suffix, headers=None):
+        response = self.transport.get(endpoint_suffix, headers=headers)
+        endpoint = endpoint_suffix.split("?", 1)[0]
+        if response.status_code != 200 or endpoint not in DOCUMENT_ENDPOINTS:
+            return response
+        body = response.json()
+        self.recorder.document(endpoint, body)
+        return _ParsedResponse(response, body)
+
+    def put(self, endpoint_suffix, json):
+        response = self.transport.put(endpoint_suffix, json=json)
+        if response.ok:
+            self.recorder.execute(json)
+        return response
+
+
+
+def record(strategy, path, metadata=None):
+    '''
+    Records the samples a strategy monitors and its traffic with its exemplar to a trace file from now on, starting
+    with the documents already in its Knowledge. Returns the TraceRecorder, to be closed at the end of the run.
+    '''
+    recorder = TraceRecorder(path, metadata if metadata is not None else
+                             {"base_endpoint": strategy.exemplar.base_endpoint,
+                              "image_id": getattr(strategy.exemplar, "image_id", None),
+                              "strategy": type(strategy).__name__},
+                             getattr(strategy, "clock", None))
+    for endpoint in DOCUMENT_ENDPOINTS:
+        body = getattr(strategy.knowledge, endpoint)
+        if body:
+            recorder.document(endpoint, body)
+    strategy.transport = RecordingTransport(strategy.transport, recorder)
+    strategy.recorder = recorder
+    return recorder
+
+
+class ReplayTransport:
+    """
+    Serves the requests of a Strategy from a Trace instead of an exemplar: monitor returns the recorded samples one
+    by one, monitor_batch the recorded batches (with the timestamps the exemplar gave them), the documents are the
+    recorded ones and the adaptations are collected in `executed` instead of being sent. A monitor past the end of
+    the trace raises TraceExhausted.
+    With a clock.VirtualClock whose epoch is the start of the recording, its time is moved to the recorded time of
+    every sample served, so that the replayed run sees the time pass as the recorded one did.
+    """
+
+    def __init__(self, trace, base_endpoint="replay", clock: "VirtualClock following the trace" = None):
+        self.trace = trace
+        self.base_endpoint = base_endpoint
+        self.clock = clock
+        self.metrics = None
+        # index of the next sample, and the (number of samples monitored before, adaptation) executed
+        self.position = 0
+        self.executed = []
+
+    def get(self, endpoint_suffix, headers=None):
+        endpoint = endpoint_suffix.split("?", 1)[0]
+        if endpoint in ("", self.base_endpoint):
+            return TraceResponse(200, "alive")
+        if endpoint == "monitor":
+            return TraceResponse(200, self._next_samples(1)[0][1])
+        if endpoint == "monitor_batch":
+            return TraceResponse(200, self._next_batch(endpoint_suffix))
+        if endpoint in self.trace.documents:
+            return TraceResponse(200, self.trace.documents[endpoint])
+        return TraceResponse(404, "not found")
+
+    def put(self, endpoint_suffix, json):
+        if endpoint_suffix != "execute":
+            return TraceResponse(404, "not found")
+        self.executed.append((self.position, json))
+        return TraceResponse(200, "ok")
+
+    def divergences(self):
+        '''
+        The (number of samples monitored before, recorded adaptation, replayed adaptation) where the replayed
+        strategy did not execute the same adaptations as the recorded one at the same point, None for no adaptation
+        '''
+        recorded = {}
+        for position, _, adaptation in self.trace.executions:
+            recorded.setdefault(position, []).append(adaptation)
+        replayed = {}
+        for position, adaptation in self.executed:
+            replayed.setdefault(position, []).append(adaptation)
+        differences = []
+        for position in sorted(set(recorded) | set(replayed)):
+            if position > self.position:
+                break
+            if recorded.get(position) != replayed.get(position):
+                differences.append((position, recorded.get(position), replayed.get(position)))
+        return differences
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _next_samples(self, count):
+        if self.position >= len(self.trace.samples):
+            raise TraceExhausted
+        samples = self.trace.samples[self.position:self.position + count]
+        self.position += len(samples)
+        if self.clock is not None:
+            self.clock.advance_to(samples[-1][0] - self.clock.epoch)
+        return samples
+
+    def _next_batch(self, endpoint_suffix):
+        limit = None
+        if "?" in endpoint_suffix:
+            for parameter in endpoint_suffix.split("?", 1)[1].split("&"):
+                name, _, value = parameter.partition("=")
+                if name == "limit":
+                    limit = int(value)
+        starts = self.trace.batch_starts
+        # the end of the recorded batch the next sample belongs to
+        index = bisect.bisect_right(starts, self.position)
+        end = starts[index] if index < len(starts) else len(self.trace.samples)
+        count = min(end - self.position, limit) if limit else end - self.position
+        first = self.position
+        samples = self._next_samples(count)
+        exemplar_timestamps = self.trace.exemplar_timestamps[first:self.position]
+        return {"cursor": self.position, "more": self.position < end, "dropped": 0,
+                "samples": [{"timestamp": timestamp if exemplar_timestamp is None else exemplar_timestamp,
+                             "data": data}
+                            for (timestamp, data), exemplar_timestamp in zip(samples, exemplar_timestamps)]}
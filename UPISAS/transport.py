@@ -0,0 +1,87 @@
+import logging
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from UPISAS import get_response_for_get_request
+from UPISAS.exceptions import ServerNotReachable
+from UPISAS.metrics import SIZE_BUCKETS
+
+
+class Transport:
+    """
+    A pooled, keep-alive HTTP session towards the base endpoint of an exemplar.
+    All the monitor/execute/schema/adaptation_options calls of a Strategy go through the same Transport,
+    so that the TCP connection is reused across the iterations of the MAPE-K loop.
+    """
+    def __init__(self, base_endpoint: "string with the URL of the exemplar's HTTP server",
+                 pool_connections: "Number of connection pools to cache" = 1,
+                 pool_maxsize: "Maximum number of connections kept alive in the pool" = 4,
+                 timeout: "Seconds (or a (connect, read) tuple) before giving up on a request" = None,
+                 retries: "Number of retries on connection errors and on the status codes in retry_on_status" = 0,
+                 backoff_factor: "Exponential backoff factor between retries, in seconds" = 0,
+                 retry_on_status: "HTTP status codes on which to retry" = (502, 503, 504),
+                 metrics: "Metrics recording round trip times and payload sizes, if any" = None,
+                 ):
+        '''Create an instance of the Transport class'''
+        self.base_endpoint = base_endpoint
+        self.metrics = metrics
+        self.timeout = timeout
+        retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=retry_on_status,
+                      allowed_methods=["GET", "PUT"], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, endpoint_suffix):
+        return '/'.join([self.base_endpoint, endpoint_suffix])
+
+    def get(self, endpoint_suffix: "API Endpoint", headers=None):
+        started = time.perf_counter()
+        response = get_response_for_get_request(self.url(endpoint_suffix), session=self.session, timeout=self.timeout,
+                                                headers=headers)
+        if self.metrics:
+            self.metrics.observe("http_get_seconds", time.perf_counter() - started)
+            self.metrics.observe("http_response_bytes", len(response.content), SIZE_BUCKETS)
+        return response
+
+    def stream(self, endpoint_suffix: "API Endpoint", headers=None,
+               timeout: "Seconds before giving up connecting, or on a silent stream, the transport's by default" = None):
+        '''Opens a streamed GET, e.g. of Server-Sent Events: the body is read from response.raw as it arrives'''
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.url(endpoint_suffix), headers=headers, stream=True,
+                                        timeout=timeout if timeout is not None else self.timeout)
+        except requests.exceptions.ConnectionError as e:
+            raise ServerNotReachable from e
+        if self.metrics:
+            self.metrics.observe("http_get_seconds", time.perf_counter() - started)
+        return response
+
+    def put(self, endpoint_suffix: "API Endpoint", json):
+        url = self.url(endpoint_suffix)
+        started = time.perf_counter()
+        try:
+            logging.info("PUT request to " + str(url))
+            response = self.session.put(url, json=json, timeout=self.timeout)
+        except requests.exceptions.ConnectionError as e:
+            logging.error(e)
+            logging.error("Please check that the server is reachable and retry.")
+            raise ServerNotReachable
+        if self.metrics:
+            self.metrics.observe("http_put_seconds", time.perf_counter() - started)
+            self.metrics.observe("http_request_bytes", len(response.request.body or b""), SIZE_BUCKETS)
+        return response
+
+    def close(self):
+        '''Closes all the pooled connections'''
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
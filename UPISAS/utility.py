@@ -0,0 +1,43 @@
+import numpy as np
+
+# These come from the swim.ini file, as in ReactiveAdaptationManager.
+RT_THRESHOLD = 0.75
+MAX_SERVICE_RATE = 1 / 0.04452713
+BASIC_REVENUE = 1
+OPT_REVENUE = 1.5
+SERVER_COST = 10
+PRECISION = 1e-5
+
+
+def _column(monitored_data, key):
+    return np.asarray(monitored_data[key], dtype=np.float64)
+
+
+def swim_utility(monitored_data: "dict of columns (or lists) of SWIM monitored data",
+                 rt_threshold: "One threshold, or a sequence of thresholds to evaluate in the same pass" = RT_THRESHOLD,
+                 max_service_rate=MAX_SERVICE_RATE, basic_revenue=BASIC_REVENUE, opt_revenue=OPT_REVENUE,
+                 server_cost=SERVER_COST, precision=PRECISION):
+    '''
+    Computes the SWIM utility of every monitored sample in one batched call.
+    Returns an array with one utility per sample, or one row of utilities per threshold when a sequence of
+    thresholds is given. Samples without any throughput have no response time and get the penalty utility.
+    '''
+    max_servers = np.trunc(_column(monitored_data, "max_servers"))
+    arrival_rate = _column(monitored_data, "arrival_rate")
+    dimmer = _column(monitored_data, "dimmer_factor")
+    servers = _column(monitored_data, "servers")
+    basic_throughput = _column(monitored_data, "basic_throughput")
+    opt_throughput = _column(monitored_data, "opt_throughput")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        response_time = ((_column(monitored_data, "basic_rt") * basic_throughput
+                          + _column(monitored_data, "opt_rt") * opt_throughput)
+                         / (basic_throughput + opt_throughput))
+
+    revenue = arrival_rate * ((1 - dimmer) * basic_revenue + dimmer * opt_revenue)
+    cost = server_cost * (max_servers - servers)
+    penalty = np.minimum(0.0, arrival_rate - max_servers * max_service_rate) * opt_revenue
+    optimal_revenue = revenue >= arrival_rate * opt_revenue - precision
+
+    thresholds = np.asarray(rt_threshold, dtype=np.float64)
+    rt_sufficient = response_time <= thresholds[..., np.newaxis]
+    return np.where(rt_sufficient, np.where(optimal_revenue, revenue + cost, revenue), penalty)
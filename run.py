@@ -1,6 +1,7 @@
 from UPISAS.strategies.swim_reactive_strategy import ReactiveAdaptationManager
 from UPISAS.exemplar import Exemplar
 from UPISAS.exemplars.swim import SWIM
+from UPISAS.readiness import ContainerProbe
 import signal
 import sys
 import time
@@ -8,16 +9,13 @@ import time
 if __name__ == '__main__':
     
     exemplar = SWIM(auto_start=True)
-    time.sleep(3)
-    exemplar.start_run()
-    time.sleep(3)
+    exemplar.wait_until_ready(probe=ContainerProbe())
+    exemplar.start_run(wait=True)
 
     try:
         strategy = ReactiveAdaptationManager(exemplar)
 
-        strategy.get_monitor_schema()
-        strategy.get_adaptation_options_schema()
-        strategy.get_execute_schema()
+        strategy.bootstrap()
 
         while True:
             input("Try to adapt?")